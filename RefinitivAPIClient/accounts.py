@@ -0,0 +1,123 @@
+"""Accounts Module spreading batches of work across several DSS accounts"""
+
+import contextvars
+import queue
+import threading
+import time
+
+from RefinitivAPIClient.datashelf import Datashelf
+from RefinitivAPIClient.metrics import MetricsClass
+from RefinitivAPIClient.notes import ExtractionNotes, ExtractionResult
+from RefinitivAPIClient.utility import Utility
+
+
+class AccountPool:
+    """
+    Run batches of work with several DSS accounts at the same time, to raise the aggregate throughput while each
+    account stays within its own limits: every account has its own workers (its maximum number of calls in flight) and
+    the optional rate limiter of its Datashelf. The workers take the batches from a shared queue, so a slower or
+    throttled account simply takes fewer batches
+    """
+
+    def __init__(self, datashelves, workers_per_account=2):
+        """
+        Initialize the pool
+        :param list datashelves: list of Datashelf, one per account
+        :param int workers_per_account: number of batches run at the same time with each account
+        """
+        if not datashelves:
+            raise ValueError("The pool needs at least one Datashelf")
+        self.datashelves = list(datashelves)
+        self.workers_per_account = workers_per_account
+        self.batches = {i.username: 0 for i in self.datashelves}
+        self.busy = {i.username: 0.0 for i in self.datashelves}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def from_credentials(credentials, rate=None, workers_per_account=2):
+        """
+        Log in with each account and build the pool
+        :param list credentials: list of tuples with pair (username, password)
+        :param float rate: maximum number of calls per second of each account
+        :param int workers_per_account: number of batches run at the same time with each account
+        :return: the pool
+        :rtype: AccountPool
+        """
+        return AccountPool([Datashelf(username, password, rate=rate) for username, password in credentials],
+                           workers_per_account)
+
+    def map(self, func, items):
+        """
+        Call func on each item with one of the accounts active
+        :param callable func: function accepting a single item, e.g. a batch of identifiers
+        :param list items: items to process
+        :return: a list with the results, in the same order of the items
+        :rtype: list
+        """
+        items = list(items)
+        results = [None] * len(items)
+        pending = queue.Queue()
+        for position, item in enumerate(items):
+            pending.put((position, item))
+        errors = list()
+
+        def work(datashelf):
+            with datashelf.activate():
+                while not errors:
+                    try:
+                        position, item = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    started = time.perf_counter()
+                    try:
+                        results[position] = func(item)
+                    except Exception as e:
+                        errors.append(e)
+                        return
+                    finally:
+                        with self._lock:
+                            self.batches[datashelf.username] += 1
+                            self.busy[datashelf.username] += time.perf_counter() - started
+                    MetricsClass.increment("refinitiv_account_batches_total", labels={"account": datashelf.username})
+
+        threads = [threading.Thread(target=contextvars.copy_context().run, args=(work, datashelf),
+                                    name=f"AccountPool-{datashelf.username}-{i}", daemon=True)
+                   for datashelf in self.datashelves for i in range(self.workers_per_account)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return results
+
+    def dispatch(self, func, sec_list, batch_size=1000):
+        """
+        Split the identifiers in batches, run them across the accounts and merge the rows returned
+        :param callable func: function accepting a list of tuples (identifier, identifierType) and returning a list of
+        rows or a message of error, e.g. Requests.request_eod_pricing
+        :param list or IdentifierBatch sec_list: List of tuples with pair (identifier, identifierType)
+        :param int batch_size: number of identifiers of each batch
+        :return: the rows of all the batches in order, with the combined notes, or the message of error of the first
+        batch which failed
+        :rtype: ExtractionResult or str
+        """
+        identifiers = [(i[0], i[1]) for i in sec_list]
+        results = self.map(func, Utility.split_list(identifiers, batch_size))
+        errors = [i for i in results if type(i) is str]
+        if errors:
+            return errors[0]
+        return ExtractionResult([row for result in results for row in result],
+                                ExtractionNotes.combine([getattr(i, "notes", None) for i in results]))
+
+    def statistics(self):
+        """
+        Return the batches run and the seconds spent by each account
+        :return: a dictionary with the username as key
+        :rtype: dict
+        """
+        with self._lock:
+            return {i: {"batches": self.batches[i], "busy_seconds": round(self.busy[i], 6)} for i in self.batches}
+
+
+MetricsClass.describe("refinitiv_account_batches_total", "counter", "Batches run by each account of an AccountPool")
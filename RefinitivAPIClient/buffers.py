@@ -0,0 +1,200 @@
+"""Buffers Module holding large extraction results within a memory ceiling, spilling the excess to disk"""
+
+import os
+import shutil
+import tempfile
+import weakref
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+class ResultBuffer:
+    """
+    Collect the rows of an extraction in columnar chunks. The chunks are kept in memory until their size exceeds
+    memory_limit, then the oldest ones are spilled to a temporary directory: as memory-mapped Arrow IPC files when
+    pyarrow is installed, pickled DataFrames otherwise. The rows can be iterated, read chunk by chunk or loaded in a
+    DataFrame on demand, optionally keeping only some columns. The parsed Notes of the extraction, if any, are in the
+    notes attribute
+    """
+
+    def __init__(self, memory_limit=256 * 1024 * 1024, chunk_rows=10000, spill_dir=None):
+        """
+        Initialize the empty buffer
+        :param int memory_limit: number of bytes of the chunks kept in memory before spilling them
+        :param int chunk_rows: number of rows of each chunk
+        :param str spill_dir: directory where the temporary directory of the spilled chunks is created. Default: the
+        temporary directory of the system
+        """
+        self.memory_limit = memory_limit
+        self.chunk_rows = chunk_rows
+        self.spill_dir = spill_dir
+        self.memory_used = 0
+        self.spilled_rows = 0
+        self._pending = list()
+        self._chunks = list()
+        self._rows = 0
+        self._directory = None
+        self._finalizer = None
+        self.notes = None
+
+    def __len__(self):
+        return self._rows
+
+    def __repr__(self):
+        return f"ResultBuffer({self._rows} rows, {self.spilled_rows} spilled, {self.memory_used} bytes in memory)"
+
+    @property
+    def spilled(self):
+        """
+        Check if some rows have been spilled to disk
+        :rtype: bool
+        """
+        return self.spilled_rows > 0
+
+    def append(self, row):
+        """
+        Add a row to the buffer
+        :param dict row: row of the extraction
+        """
+        self._pending.append(row)
+        self._rows += 1
+        if len(self._pending) >= self.chunk_rows:
+            self._seal()
+
+    def extend(self, rows):
+        """
+        Add many rows to the buffer
+        :param iterable rows: rows of the extraction
+        """
+        for row in rows:
+            self.append(row)
+
+    def append_frame(self, dataframe):
+        """
+        Add the rows of a DataFrame to the buffer as a chunk
+        :param pd.DataFrame dataframe: rows to add
+        """
+        self._seal()
+        self._rows += len(dataframe)
+        self._add_chunk(dataframe.reset_index(drop=True))
+
+    def _seal(self):
+        """Turn the pending rows in a columnar chunk"""
+        if self._pending:
+            chunk = pd.DataFrame(self._pending)
+            self._pending = list()
+            self._add_chunk(chunk)
+
+    def _add_chunk(self, dataframe):
+        """
+        Keep a chunk in memory, spilling the oldest chunks while the memory used exceeds the ceiling
+        :param pd.DataFrame dataframe: chunk to add
+        """
+        size = int(dataframe.memory_usage(index=False, deep=True).sum())
+        self._chunks.append({"frame": dataframe, "size": size, "rows": len(dataframe)})
+        self.memory_used += size
+        for chunk in self._chunks:
+            if self.memory_used <= self.memory_limit:
+                break
+            if "frame" in chunk:
+                self._spill(chunk)
+
+    def _spill(self, chunk):
+        """
+        Write a chunk on disk and drop it from memory
+        :param dict chunk: chunk to spill
+        """
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix="refinitiv_buffer_", dir=self.spill_dir)
+            self._finalizer = weakref.finalize(self, shutil.rmtree, self._directory, True)
+        path = os.path.join(self._directory, f"chunk-{len(os.listdir(self._directory)):05d}")
+        dataframe = chunk.pop("frame")
+        try:
+            if pa is None:
+                raise TypeError("pyarrow is not installed")
+            table = pa.Table.from_pandas(dataframe, preserve_index=False)
+            with pa.OSFile(path + ".arrow", "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            chunk["path"] = path + ".arrow"
+        except (TypeError, ValueError, getattr(pa, "ArrowException", TypeError)):
+            # Columns mixing types can't be converted to Arrow: the chunk is pickled as it is
+            dataframe.to_pickle(path + ".pickle")
+            chunk["path"] = path + ".pickle"
+        self.memory_used -= chunk["size"]
+        self.spilled_rows += chunk["rows"]
+
+    @staticmethod
+    def _load(chunk, columns=None):
+        """
+        Return the DataFrame of a chunk, reading it from disk if it has been spilled
+        :param dict chunk: chunk to read
+        :param list columns: optional list of columns to keep
+        :return: the rows of the chunk
+        :rtype: pd.DataFrame
+        """
+        if "frame" in chunk:
+            dataframe = chunk["frame"]
+        elif chunk["path"].endswith(".arrow"):
+            table = pa.ipc.open_file(pa.memory_map(chunk["path"], "r")).read_all()
+            if columns is not None:
+                table = table.select([i for i in columns if i in table.column_names])
+            return table.to_pandas()
+        else:
+            dataframe = pd.read_pickle(chunk["path"])
+        if columns is not None:
+            dataframe = dataframe[[i for i in columns if i in dataframe.columns]]
+        return dataframe
+
+    def iter_frames(self, columns=None):
+        """
+        Yield the rows chunk by chunk, loading in memory a chunk at a time
+        :param list columns: optional list of columns to keep
+        :return: a generator of DataFrames
+        :rtype: iterable
+        """
+        self._seal()
+        for chunk in list(self._chunks):
+            yield ResultBuffer._load(chunk, columns)
+
+    def __iter__(self):
+        """
+        Yield the rows one at a time, in the order they have been added
+        :return: a generator of dictionaries
+        :rtype: iterable
+        """
+        for dataframe in self.iter_frames():
+            yield from dataframe.to_dict("records")
+
+    def to_pandas(self, columns=None):
+        """
+        Load all the rows in a DataFrame
+        :param list columns: optional list of columns to keep
+        :return: a DataFrame with the rows of the buffer
+        :rtype: pd.DataFrame
+        """
+        frames = list(self.iter_frames(columns))
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        dataframe = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        return dataframe.reindex(columns=columns) if columns is not None else dataframe
+
+    def close(self):
+        """Drop the rows and delete the spilled chunks"""
+        self._pending = list()
+        self._chunks = list()
+        self._rows = self.memory_used = self.spilled_rows = 0
+        if self._finalizer is not None:
+            self._finalizer()
+            self._directory = self._finalizer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,128 @@
+"""Chains Module expanding nested Chain RICs into their constituents"""
+
+import threading
+import time
+
+from datetime import timedelta
+
+from RefinitivAPIClient.notes import ExtractionResult
+from RefinitivAPIClient.tracing import Tracing
+from RefinitivAPIClient.utility import Utility
+
+
+class ChainExpander:
+    """
+    Expand Chain RICs breadth-first, requesting all the chains of the same level at the same time. The components of
+    each chain are memoized for ttl, so the sub-chains shared by different indices are requested once
+    """
+
+    def __init__(self, ttl=timedelta(hours=12)):
+        """
+        Initialize the expander with an empty memo
+        :param timedelta ttl: how long the components of a chain are reused
+        """
+        self.ttl = ttl
+        self._memo = dict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(chain):
+        """
+        Return the Chain RIC in the full format starting with "0#"
+        :param str chain: Chain RIC
+        :return: the Chain RIC starting with "0#"
+        :rtype: str
+        """
+        return chain if chain[:2] == "0#" else "0#" + chain
+
+    def components(self, chain):
+        """
+        Return the direct components of a chain, requesting them only if not memoized or expired
+        :param str chain: Chain RIC
+        :return: the list of the RICs in the chain (sub-chains included) or a message of error
+        :rtype: list or str
+        """
+        chain = ChainExpander.normalize(chain)
+        with self._lock:
+            memoized = self._memo.get(chain)
+        if memoized and time.monotonic() - memoized[1] < self.ttl.total_seconds():
+            return memoized[0]
+        from RefinitivAPIClient.dss import Requests
+        response = Requests.request_components_of_chain_ric(chain)
+        if type(response) is str:
+            return response
+        rows = ExtractionResult(response.get("Contents", response.get("value", list())),
+                                response.get("ExtractionNotes"))
+        components = list(dict.fromkeys(i["RIC"] for i in rows if i.get("RIC")))
+        with self._lock:
+            self._memo[chain] = (components, time.monotonic())
+        return components
+
+    def expand_many(self, chains, max_workers=16, max_depth=10):
+        """
+        Expand many chains at the same time, resolving the nested chains breadth-first
+        :param list chains: list of Chain RICs
+        :param int max_workers: maximum number of chains requested at the same time
+        :param int max_depth: maximum number of nested levels expanded
+        :return: a dictionary with the chains as keys and the flat, deduplicated list of their constituents as values
+        :rtype: dict
+        """
+        roots = [ChainExpander.normalize(i) for i in dict.fromkeys(chains)]
+        resolved = dict()
+        frontier = list(dict.fromkeys(roots))
+        for level in range(max_depth + 1):
+            if not frontier:
+                break
+            with Tracing.stage("expand_level", level=level, chains=len(frontier)):
+                outcomes = Utility.run_concurrently(self.components, frontier, max_workers)
+            next_frontier = list()
+            for chain, outcome in zip(frontier, outcomes):
+                if type(outcome) is str:
+                    print(f"Chain {chain} could not be expanded: {outcome}")
+                    outcome = list()
+                resolved[chain] = outcome
+                next_frontier.extend(i for i in outcome if i[:2] == "0#" and i not in resolved)
+            frontier = list(dict.fromkeys(next_frontier))
+        return {root: self._flatten(root, resolved) for root in roots}
+
+    def expand(self, chain, max_workers=16, max_depth=10):
+        """
+        Expand a chain and all its nested chains
+        :param str chain: Chain RIC
+        :param int max_workers: maximum number of chains requested at the same time
+        :param int max_depth: maximum number of nested levels expanded
+        :return: the flat, deduplicated list of the constituents
+        :rtype: list
+        """
+        return self.expand_many([chain], max_workers, max_depth)[ChainExpander.normalize(chain)]
+
+    @staticmethod
+    def _flatten(root, resolved):
+        """
+        Collect the constituents of a chain walking its resolved sub-chains
+        :param str root: Chain RIC
+        :param dict resolved: components of each chain resolved
+        :return: the list of constituents in order of appearance, without duplicates and sub-chains
+        :rtype: list
+        """
+        constituents = dict()
+        visited = {root}
+        stack = [iter(resolved.get(root, list()))]
+        while stack:
+            ric = next(stack[-1], None)
+            if ric is None:
+                stack.pop()
+            elif ric[:2] != "0#":
+                constituents[ric] = None
+            elif ric not in visited:
+                visited.add(ric)
+                stack.append(iter(resolved.get(ric, list())))
+        return list(constituents)
+
+    def clear(self):
+        """Empty the memo"""
+        with self._lock:
+            self._memo.clear()
+
+
+ChainExpanderClass = ChainExpander()
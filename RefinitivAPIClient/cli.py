@@ -0,0 +1,220 @@
+"""Command line runner extracting a file of identifiers in batches through the extraction pipeline
+
+Usage:
+    refinitiv-extract universe.txt --template EndOfDayPricingReportTemplate --fields "Trade Date,Universal Close Price"
+        --output eod.csv --batch-size 10000 --extract-workers 4 --rate 5
+    refinitiv-extract universe.txt ... --output eod.csv --resume
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+
+from RefinitivAPIClient.codec import Codec
+from RefinitivAPIClient.dss import Operations
+from RefinitivAPIClient.sinks import CSVSink, ParquetSink, PostgresSink
+from RefinitivAPIClient.transport import Transport
+from RefinitivAPIClient.utility import RateLimiter, Utility
+
+SINK_FORMATS = ["csv", "parquet", "postgres"]
+
+
+class Progress:
+    """Print the throughput and the ETA of a run on one line, and keep its checkpoint up to date"""
+
+    def __init__(self, total, done=0, checkpoint=None, stream=sys.stderr):
+        """
+        Initialize the progress of a run
+        :param int total: number of identifiers of the run
+        :param int done: number of identifiers already extracted by an interrupted run
+        :param str checkpoint: name of the checkpoint file where each batch written is recorded
+        :param stream: where to print the progress
+        """
+        self.total = total
+        self.done = done
+        self.rows = 0
+        self.batches = 0
+        self.checkpoint = checkpoint
+        self.stream = stream
+        self._resumed = done
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def on_batch(self, number, size, rows):
+        """
+        Record a batch written in the sink and print the progress
+        :param int number: number of the batch
+        :param int size: number of identifiers of the batch
+        :param int rows: number of rows written
+        """
+        with self._lock:
+            self.done += size
+            self.rows += rows
+            self.batches += 1
+            if self.checkpoint is not None:
+                with open(self.checkpoint, "ab") as w:
+                    w.write(Codec.dumps({"batch": number, "identifiers": size, "rows": rows}) + b"\n")
+            self.print()
+
+    def print(self, end=""):
+        """
+        Print the progress line
+        :param str end: string printed after the line
+        """
+        elapsed = time.monotonic() - self._started
+        throughput = (self.done - self._resumed) / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / throughput if throughput > 0 else None
+        self.stream.write(f"\r{self.done}/{self.total} identifiers ({100 * self.done / max(self.total, 1):.1f}%), "
+                          f"{self.batches} batches, {self.rows} rows, {throughput:.1f} identifiers/s, "
+                          f"ETA {Progress.format_seconds(eta)}   {end}")
+        self.stream.flush()
+
+    @staticmethod
+    def format_seconds(seconds):
+        """
+        Format a number of seconds as h:mm:ss
+        :param float seconds: number of seconds
+        :return: the formatted duration, or "--:--" if unknown
+        :rtype: str
+        """
+        if seconds is None:
+            return "--:--"
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def read_identifiers(filename):
+    """
+    Read the identifiers of a file, one per line, optionally followed by their type after a comma
+    (e.g. "US0378331005,Isin"). The type of the identifiers without one is guessed from their layout
+    :param str filename: name of the file
+    :return: a generator of tuples with pair (identifier, identifierType)
+    :rtype: iterable
+    """
+    with open(filename, "r") as r:
+        for line in r:
+            fields = [i.strip() for i in line.split(",")]
+            if not fields[0]:
+                continue
+            if len(fields) > 1 and fields[1]:
+                yield fields[0], fields[1]
+            else:
+                yield from Utility.format_identifiers([fields[0]])
+
+
+def read_checkpoint(checkpoint, header):
+    """
+    Read the batches already written by an interrupted run
+    :param str checkpoint: name of the checkpoint file
+    :param dict header: parameters of the run, which must match the ones of the interrupted run
+    :return: a dictionary with the number of each batch written as key and its number of identifiers as value
+    :rtype: dict
+    """
+    if not os.path.isfile(checkpoint):
+        return dict()
+    with open(checkpoint, "rb") as r:
+        lines = [Codec.loads(i) for i in r if i.strip()]
+    if not lines or lines[0] != header:
+        raise ValueError(f"The checkpoint {checkpoint} belongs to a run with different parameters: {lines[:1]}")
+    return {i["batch"]: i["identifiers"] for i in lines[1:]}
+
+
+def build_sink(args, append):
+    """
+    Build the sink of the run
+    :param argparse.Namespace args: arguments of the command line
+    :param bool append: if True, the sink appends to the data already written
+    :return: the sink
+    """
+    if args.format == "postgres":
+        return PostgresSink(args.output, args.db_conn, append=append)
+    if args.format == "parquet":
+        return ParquetSink(args.output, append=append)
+    return CSVSink(args.output, append=append)
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line
+    :param list argv: command line arguments
+    :return: the parsed arguments
+    :rtype: argparse.Namespace
+    """
+    arg_parser = argparse.ArgumentParser(prog="refinitiv-extract", description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("identifiers", help="file with one identifier per line, optionally followed by ,type")
+    arg_parser.add_argument("--template", required=True, help="template type, e.g. EndOfDayPricingReportTemplate")
+    arg_parser.add_argument("--fields", required=True, help="comma separated list of the fields of the template")
+    arg_parser.add_argument("--start-date", help="start date of the PriceHistoryReportTemplate")
+    arg_parser.add_argument("--output", required=True,
+                            help="CSV file, Parquet directory or Postgres table where to write the data")
+    arg_parser.add_argument("--format", choices=SINK_FORMATS,
+                            help="format of the output. Default: parquet for a .parquet output, csv otherwise")
+    arg_parser.add_argument("--db-conn", help="Postgres endpoint of a postgres output. Default: the one of Datashelf")
+    arg_parser.add_argument("--batch-size", type=int, default=10000, help="identifiers extracted at once")
+    arg_parser.add_argument("--extract-workers", type=int, default=2, help="batches extracted at the same time")
+    arg_parser.add_argument("--download-workers", type=int, default=2, help="files downloaded at the same time")
+    arg_parser.add_argument("--parse-workers", type=int, default=1, help="files parsed at the same time")
+    arg_parser.add_argument("--queue-size", type=int, default=2, help="batches waiting between two stages")
+    arg_parser.add_argument("--rate", type=float, help="maximum number of calls per second to DSS")
+    arg_parser.add_argument("--interval", type=int, default=30, help="seconds between two checks of a schedule")
+    arg_parser.add_argument("--reuse", action="store_true", help="reuse the lists and the template already created")
+    arg_parser.add_argument("--checkpoint", help="checkpoint file of the run. Default: the output followed by "
+                                                 ".checkpoint")
+    arg_parser.add_argument("--resume", action="store_true", help="skip the batches written by an interrupted run")
+    arg_parser.add_argument("--verbose", action="store_true", help="print the messages of each DSS operation")
+    args = arg_parser.parse_args(argv)
+    if args.format is None:
+        args.format = "parquet" if args.output.endswith(".parquet") else "csv"
+    if args.checkpoint is None:
+        args.checkpoint = args.output.rstrip("/\\") + ".checkpoint"
+    return args
+
+
+def main(argv=None):
+    """
+    Command line entry point of the extraction runner
+    :param list argv: command line arguments
+    :return: the exit code: 0 if all the batches have been written, 1 if some failed, 2 if the run can't be resumed
+    :rtype: int
+    """
+    args = parse_args(argv)
+    header = {"identifiers": os.path.abspath(args.identifiers), "template": args.template, "fields": args.fields,
+              "start_date": args.start_date, "batch_size": args.batch_size}
+    try:
+        written = read_checkpoint(args.checkpoint, header) if args.resume else dict()
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if not written:
+        with open(args.checkpoint, "wb") as w:
+            w.write(Codec.dumps(header) + b"\n")
+    if args.rate:
+        Transport.rate_limiter = RateLimiter(args.rate)
+    total = sum(1 for _ in read_identifiers(args.identifiers))
+    progress = Progress(total, sum(written.values()), args.checkpoint)
+    if written:
+        print(f"Resuming {args.identifiers}: {len(written)} batches already written", file=sys.stderr)
+    progress.print()
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        result = Operations.extract_in_pipeline(
+            read_identifiers(args.identifiers), args.template, args.fields.split(","), build_sink(args, bool(written)),
+            start_date=args.start_date, batch_size=args.batch_size, extract_workers=args.extract_workers,
+            download_workers=args.download_workers, parse_workers=args.parse_workers, queue_size=args.queue_size,
+            interval=args.interval, reuse=args.reuse, skip_batches=set(written), on_batch=progress.on_batch)
+    progress.print(end="\n")
+    failed = sum(len(i) for i in result["failed_batches"])
+    print(f"{result['output']} written in {result['statistics']['wall_seconds']:.1f} seconds"
+          + (f", {failed} identifiers failed: run again with --resume to retry them" if failed else ""),
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
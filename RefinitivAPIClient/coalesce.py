@@ -0,0 +1,180 @@
+"""Coalesce Module sharing the calls made at the same time by different threads"""
+
+import functools
+import threading
+import time
+
+from RefinitivAPIClient.codec import Codec
+from RefinitivAPIClient.datashelf import Datashelf
+from RefinitivAPIClient.metrics import MetricsClass
+from RefinitivAPIClient.notes import ExtractionResult
+
+
+class _Flight:
+    """Result of a call shared by the callers waiting for it"""
+
+    def __init__(self):
+        """Initialize the call in progress"""
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Run only once the identical calls in progress at the same time: the first caller runs the function and the others
+    wait for its result. Nothing is cached once the call is over
+    """
+
+    def __init__(self):
+        """Initialize the registry of the calls in progress"""
+        self._flights = dict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(func, args, kwargs):
+        """
+        Identity of a call: the function, the content of its arguments and the account making it
+        :param callable func: function called
+        :param tuple args: positional arguments
+        :param dict kwargs: keyword arguments
+        :return: the key of the call
+        :rtype: tuple
+        """
+        arguments = Codec.dumps([args, sorted(kwargs.items())],
+                                default=lambda value: list(value) if hasattr(value, "__iter__") else repr(value))
+        return func.__module__, func.__qualname__, arguments, id(Datashelf.current())
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call a function, or wait for the identical call already in progress
+        :param callable func: function to call
+        :param args: positional arguments
+        :param kwargs: keyword arguments
+        :return: the result of the function
+        """
+        key = SingleFlight.key(func, args, kwargs)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if leader:
+            try:
+                flight.result = func(*args, **kwargs)
+            except Exception as e:
+                flight.error = e
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+        else:
+            MetricsClass.increment("refinitiv_coalesced_calls_total", labels={"function": func.__qualname__})
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+
+SingleFlightClass = SingleFlight()
+
+
+def single_flight(func):
+    """
+    Decorator sharing the identical calls of a function in progress at the same time
+    :param callable func: function to decorate
+    :return: the decorated function
+    :rtype: callable
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return SingleFlightClass.call(func, *args, **kwargs)
+    return wrapper
+
+
+class _Batch:
+    """Identifiers collected during a window and rows returned for them"""
+
+    def __init__(self):
+        """Initialize the open batch"""
+        self.identifiers = dict()
+        self.callers = 0
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BatchCoalescer:
+    """
+    Merge the identifiers submitted by different threads within a short window in a single extraction, then split the
+    rows returned back to each caller by identifier. The first caller of a window waits for it to close, runs the
+    extraction and wakes up the others. The identifiers submitted with different accounts are never merged
+    """
+
+    def __init__(self, func, window=0.05, max_identifiers=10000, name=None):
+        """
+        Initialize the coalescer
+        :param callable func: function accepting a list of tuples (identifier, identifierType) and returning the rows
+        of the extraction, each with its Identifier and IdentifierType, or a message of error
+        :param float window: seconds during which the identifiers submitted are merged
+        :param int max_identifiers: maximum number of distinct identifiers of an extraction. A submission which
+        doesn't fit opens a new window
+        :param str name: name of the coalescer in the metrics. Default: the name of the function
+        """
+        self.func = func
+        self.name = name if name else func.__qualname__
+        self.window = window
+        self.max_identifiers = max_identifiers
+        self._open = dict()
+        self._lock = threading.Lock()
+
+    def submit(self, sec_list):
+        """
+        Request the rows of some identifiers, sharing the extraction with the other callers of the same window
+        :param list or IdentifierBatch sec_list: List of tuples with pair (identifier, identifierType)
+        :return: the rows of the identifiers requested, in the order returned by the extraction, or a message of error
+        :rtype: list or str
+        """
+        wanted = list(dict.fromkeys((i[0], i[1]) for i in sec_list))
+        account = id(Datashelf.current())
+        with self._lock:
+            batch = self._open.get(account)
+            leader = batch is None or len(batch.identifiers.keys() | set(wanted)) > self.max_identifiers
+            if leader:
+                batch = self._open[account] = _Batch()
+            batch.identifiers.update(dict.fromkeys(wanted))
+            batch.callers += 1
+        if leader:
+            time.sleep(self.window)
+            with self._lock:
+                if self._open.get(account) is batch:
+                    del self._open[account]
+            self._run(batch)
+        else:
+            MetricsClass.increment("refinitiv_coalesced_calls_total", labels={"function": self.name})
+            batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+        if type(batch.result) is str:
+            return batch.result
+        if batch.callers == 1:
+            return batch.result
+        wanted = set(wanted)
+        return ExtractionResult([i for i in batch.result if (i.get("Identifier"), i.get("IdentifierType")) in wanted],
+                                getattr(batch.result, "notes", None))
+
+    def _run(self, batch):
+        """
+        Run the extraction of a batch
+        :param _Batch batch: batch closed
+        """
+        try:
+            batch.result = self.func(list(batch.identifiers))
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+
+
+MetricsClass.describe("refinitiv_coalesced_calls_total", "counter",
+                      "Calls answered by the request of another caller in progress at the same time")
@@ -0,0 +1,76 @@
+"""Codec Module encoding and decoding the JSON bodies with the fastest backend available"""
+
+import json
+import os
+import threading
+
+from RefinitivAPIClient.dss_requests import JSON_REQUESTS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class Codec:
+    """
+    Static class encoding and decoding JSON with orjson when it is installed, and with the standard library otherwise.
+    The backend can be changed with Codec.use
+    """
+
+    backend = "orjson" if orjson is not None else "json"
+    _templates = dict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def use(backend):
+        """
+        Select the JSON backend
+        :param str backend: "orjson" or "json"
+        """
+        if backend not in ["orjson", "json"]:
+            raise ValueError("The backend MUST be one of the following: orjson, json")
+        if backend == "orjson" and orjson is None:
+            raise ImportError("orjson is not installed")
+        Codec.backend = backend
+
+    @staticmethod
+    def dumps(obj, default=None):
+        """
+        Serialize an object as compact JSON
+        :param obj: object to serialize
+        :param callable default: function called for the objects which can't be serialized natively
+        :return: the serialized object
+        :rtype: bytes
+        """
+        if Codec.backend == "orjson":
+            return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(obj, default=default, separators=(",", ":"), ensure_ascii=False).encode()
+
+    @staticmethod
+    def loads(data):
+        """
+        Parse a JSON document
+        :param bytes or str data: document to parse
+        :return: the parsed object
+        :rtype: dict or list
+        """
+        if Codec.backend == "orjson":
+            return orjson.loads(data)
+        return json.loads(data)
+
+    @staticmethod
+    def load_template(name):
+        """
+        Return a new copy of a request template of the json_requests folder. The file is read only once
+        :param str name: name of the template file
+        :return: the parsed template
+        :rtype: dict
+        """
+        template = Codec._templates.get(name)
+        if template is None:
+            with open(os.path.join(JSON_REQUESTS, name), "rb") as r:
+                template = r.read()
+            with Codec._lock:
+                Codec._templates[name] = template
+        return Codec.loads(template)
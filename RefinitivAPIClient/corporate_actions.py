@@ -0,0 +1,208 @@
+"""Corporate Actions Module synchronizing the events of a universe incrementally"""
+
+import os
+import sqlite3
+import threading
+
+from datetime import datetime, timedelta
+
+from RefinitivAPIClient.codec import Codec
+from RefinitivAPIClient.reuse import ReusableObjects
+from RefinitivAPIClient.tracing import Tracing
+from RefinitivAPIClient.utility import Utility
+
+CA_SYNC_PATH = os.environ.get("REFINITIV_CA_SYNC_PATH", "ca_sync.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watermarks (
+    universe TEXT PRIMARY KEY, synced_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    universe TEXT NOT NULL, event_key TEXT NOT NULL, identifier TEXT NOT NULL, hash TEXT NOT NULL,
+    payload BLOB NOT NULL, updated_at TEXT NOT NULL,
+    PRIMARY KEY (universe, event_key)
+);
+CREATE INDEX IF NOT EXISTS events_by_identifier ON events (universe, identifier);
+"""
+
+
+class CorporateActionsSync:
+    """
+    Keep, for each universe of instruments, the watermark of the last sync and an index of the events already seen
+    with the hash of their content. Each sync requests only the events from the watermark onwards and returns the
+    events which are new, changed or deleted since the previous sync
+    """
+
+    def __init__(self, path=CA_SYNC_PATH):
+        """
+        Initialize the store. The database is opened at the first use
+        :param str path: name of the SQLite file, or ":memory:" for a store living within the process
+        """
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """
+        Return the connection to the database, creating the schema at the first call. Call it holding the lock
+        :return: the connection
+        :rtype: sqlite3.Connection
+        """
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    @staticmethod
+    def universe_name(sec_list):
+        """
+        Name of the universe of a list of identifiers, independently of their order and duplicates
+        :param list sec_list: list of tuples with pair (identifier, identifierType)
+        :return: a string with the name of the universe
+        :rtype: str
+        """
+        return "universe_" + ReusableObjects.content_hash(sorted({(i[0], i[1]) for i in sec_list}))
+
+    @staticmethod
+    def event_key(event):
+        """
+        Identity of an event: its instrument and its Corporate Actions ID
+        :param dict event: row of the Corporate Actions extraction
+        :return: a string with the identity of the event
+        :rtype: str
+        """
+        return f"{event.get('IdentifierType')}|{event.get('Identifier')}|{event.get('Corporate Actions ID')}"
+
+    @staticmethod
+    def is_deleted(event):
+        """
+        Check the Delete Marker of an event
+        :param dict event: row of the Corporate Actions extraction
+        :return: True if the event has been deleted
+        :rtype: bool
+        """
+        return str(event.get("Delete Marker") or "").strip().lower() in ["y", "yes", "true", "1", "d"]
+
+    def watermark(self, universe):
+        """
+        Return the time of the last sync of a universe
+        :param str universe: name of the universe
+        :return: the time of the last sync or None
+        :rtype: datetime or None
+        """
+        with self._lock:
+            row = self._connect().execute("SELECT synced_at FROM watermarks WHERE universe = ?",
+                                          [universe]).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def sync(self, sec_list, universe=None, initial_days=30, next_days=90, overlap=timedelta(days=1),
+             batch_size=5000):
+        """
+        Request the Corporate Actions events since the last sync of the universe and diff them with the events
+        already seen. The first sync goes back initial_days
+        :param list or IdentifierBatch sec_list: List of tuples with pair (identifier, identifierType)
+        :param str universe: name of the universe. Default: a hash of the identifiers
+        :param int initial_days: number of days to go back in time at the first sync
+        :param int next_days: number of days to go ahead in time, to catch the announced events
+        :param timedelta overlap: time requested again before the watermark, to catch late updates
+        :param int batch_size: number of events diffed at once
+        :return: a dictionary with the new, changed and deleted events, the number of unchanged events and the
+        window requested, or a message of error
+        :rtype: dict or str
+        """
+        from RefinitivAPIClient.dss import Requests
+        universe = universe if universe else CorporateActionsSync.universe_name(sec_list)
+        started_at = datetime.now()
+        watermark = self.watermark(universe)
+        start = watermark - overlap if watermark else started_at - timedelta(days=initial_days)
+        end = started_at + timedelta(days=next_days)
+        with Tracing.stage("request_ca_events", universe=universe):
+            stream = Requests.request_ca_events(sec_list, streaming=True, start_date=start.isoformat(),
+                                                end_date=end.isoformat(), include_deleted=True)
+        if type(stream) is str:
+            return stream
+        changes = {"new": list(), "changed": list(), "deleted": list(), "unchanged": 0,
+                   "window": (start.isoformat(), end.isoformat())}
+        pending = dict()
+        with Tracing.stage("diff", universe=universe):
+            for batch in stream.iter_batches(batch_size):
+                self._diff(universe, batch, started_at, changes, pending)
+                Tracing.add_rows(len(batch))
+        # The index and the watermark move together, once all the events have been diffed: if the stream fails the
+        # next sync finds the same differences again
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?)",
+                                       [i for i in pending.values() if i is not None])
+                connection.executemany("DELETE FROM events WHERE universe = ? AND event_key = ?",
+                                       [(universe, key) for key, row in pending.items() if row is None])
+                connection.execute("INSERT OR REPLACE INTO watermarks VALUES (?, ?)",
+                                   [universe, started_at.isoformat()])
+        print(f"Corporate Actions of {universe}: {len(changes['new'])} new, {len(changes['changed'])} changed, "
+              f"{len(changes['deleted'])} deleted, {changes['unchanged']} unchanged")
+        return changes
+
+    def _diff(self, universe, events, synced_at, changes, pending):
+        """
+        Compare a batch of events with the index and with the batches already diffed, adding the differences to
+        changes and the updates of the index to pending
+        :param str universe: name of the universe
+        :param list events: rows of the Corporate Actions extraction
+        :param datetime synced_at: time of the sync
+        :param dict changes: new, changed and deleted events found so far
+        :param dict pending: rows to write in the index by event key, None for the events to delete
+        """
+        keyed = {CorporateActionsSync.event_key(i): i for i in events}
+        lookup = [i for i in keyed if i not in pending]
+        known = dict()
+        with self._lock:
+            connection = self._connect()
+            for chunk in Utility.split_list(lookup, 500):
+                known.update(connection.execute(
+                    f"SELECT event_key, hash FROM events WHERE universe = ? "
+                    f"AND event_key IN ({','.join('?' * len(chunk))})", [universe] + chunk).fetchall())
+        known.update({key: row[3] for key, row in pending.items() if key in keyed and row is not None})
+        for key, event in keyed.items():
+            if CorporateActionsSync.is_deleted(event):
+                if key in known:
+                    pending[key] = None
+                    changes["deleted"].append(event)
+                continue
+            content_hash = ReusableObjects.content_hash(event)
+            if key not in known:
+                changes["new"].append(event)
+            elif known[key] != content_hash:
+                changes["changed"].append(event)
+            else:
+                changes["unchanged"] += 1
+                continue
+            pending[key] = (universe, key, str(event.get("Identifier")), content_hash, Codec.dumps(event),
+                            synced_at.isoformat())
+
+    def events(self, universe, identifier=None):
+        """
+        Return the events currently known for a universe
+        :param str universe: name of the universe
+        :param str identifier: if given, only the events of this instrument
+        :return: the list of events
+        :rtype: list
+        """
+        query = "SELECT payload FROM events WHERE universe = ?" + (" AND identifier = ?" if identifier else "")
+        with self._lock:
+            rows = self._connect().execute(query, [universe] + ([identifier] if identifier else list())).fetchall()
+        return [Codec.loads(i[0]) for i in rows]
+
+    def reset(self, universe):
+        """
+        Forget the watermark and the events of a universe, so that the next sync starts from scratch
+        :param str universe: name of the universe
+        """
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM watermarks WHERE universe = ?", [universe])
+                connection.execute("DELETE FROM events WHERE universe = ?", [universe])
+
+
+CorporateActionsSyncClass = CorporateActionsSync()
@@ -1,13 +1,16 @@
 """Static Data Module"""
 
+import contextlib
+import contextvars
 import os
 import requests
+import threading
 import urllib3
 
 import sqlalchemy as sa
 
-from RefinitivAPIClient.dss_requests import DSS
-from RefinitivAPIClient.utility import Utility
+from RefinitivAPIClient.dss_requests import DSS, ENDPOINT
+from RefinitivAPIClient.utility import RateLimiter, Utility
 from datetime import datetime, timedelta
 
 urllib3.disable_warnings()
@@ -17,7 +20,7 @@ DSS_DATA = {
         'username': "",
         'password': ""
     },
-    'token_url': 'https://hosted.datascopeapi.reuters.com/RestApi/v1/Authentication/RequestToken'
+    'token_url': f'{ENDPOINT}Authentication/RequestToken'
 }
 
 PROXY = {
@@ -26,26 +29,87 @@ PROXY = {
 }
 
 
+_current_datashelf = contextvars.ContextVar("refinitiv_datashelf", default=None)
+_default_datashelf = None
+_default_lock = threading.Lock()
+
+
 class Datashelf:
-    """Metadata Class only"""
-    def __init__(self):
-        """Populate the class with metadata"""
-        self.dss = DSS_DATA
-        self.proxy = Utility.select_proxy(PROXY)
+    """
+    Metadata Class only: the credentials, the proxy, the headers and the token of a DSS account. The calls made by
+    Transport use the Datashelf activated in the current context, or the default one of DSS_DATA, which logs in on
+    its first use
+    """
+    def __init__(self, username=None, password=None, proxy=None, rate=None, token_file=None):
+        """
+        Populate the class with metadata
+        :param str username: DSS user id. Default: the one of DSS_DATA
+        :param str password: password of the user. Default: the one of DSS_DATA
+        :param dict proxy: proxies of the account. Default: PROXY
+        :param float rate: if given, maximum number of calls per second made to DSS with this account
+        :param str token_file: file where the token is cached. Default: token.p for the account of DSS_DATA,
+        token_<username>.p for the others
+        """
+        self.dss = DSS_DATA if username is None else {
+            'login': {'username': username, 'password': password}, 'token_url': DSS_DATA.get('token_url')}
+        self.username = self.dss.get('login').get('username')
+        self.token_file = token_file if token_file else "token.p" if username is None else f"token_{username}.p"
+        self.proxy = Utility.select_proxy(dict(proxy if proxy is not None else PROXY))
+        self.rate_limiter = RateLimiter(rate) if rate else None
         self.session_token = self._get_token()
-        self.dss_headers = DSS.get('headers')
+        self.dss_headers = dict(DSS.get('headers'))
+        self.dss_headers['Prefer'] = self.dss_headers['Prefer'].format(1000000)
         self.dss_headers['Authorization'] = f'Token {self.session_token}'
 
+    def __repr__(self):
+        return f"Datashelf({self.username!r})"
+
+    @staticmethod
+    def current():
+        """
+        Return the Datashelf activated in the current context
+        :return: the active Datashelf, or the default one if none has been activated
+        :rtype: Datashelf
+        """
+        datashelf = _current_datashelf.get()
+        return datashelf if datashelf is not None else Datashelf.default()
+
+    @staticmethod
+    def default():
+        """
+        Return the Datashelf of the account of DSS_DATA, logging in the first time it is used
+        :return: the default Datashelf
+        :rtype: Datashelf
+        """
+        global _default_datashelf
+        with _default_lock:
+            if _default_datashelf is None:
+                _default_datashelf = Datashelf()
+            return _default_datashelf
+
+    @contextlib.contextmanager
+    def activate(self):
+        """
+        Make the calls of the current context, and of the threads started from it with a copy of the context, use
+        this Datashelf
+        :return: a context manager yielding the Datashelf
+        """
+        token = _current_datashelf.set(self)
+        try:
+            yield self
+        finally:
+            _current_datashelf.reset(token)
+
     def _get_token(self):
         """
         Get the authorization token from DSS
         :return: a string with the token
         :rtype: str
         """
-        if os.path.isfile("token.p"):
-            time_threshold = datetime.fromtimestamp(os.path.getmtime("token.p")) + timedelta(hours=23)
+        if os.path.isfile(self.token_file):
+            time_threshold = datetime.fromtimestamp(os.path.getmtime(self.token_file)) + timedelta(hours=23)
             if datetime.now() < time_threshold:
-                return Utility.read_from_pickle("token.p")
+                return Utility.read_from_pickle(self.token_file)
         dss_extraction_request_headers = dict()
         dss_extraction_body = dict()
         dss_extraction_body["Credentials"] = dict()
@@ -58,7 +122,7 @@ class Datashelf:
         if response.status_code != 200:
             print(f"There was an error getting the token. Error Code: {str(response.status_code)}")
         token = response.json()["value"]
-        Utility.write_to_pickle(token, "token.p")
+        Utility.write_to_pickle(token, self.token_file)
         return token
 
 
@@ -128,5 +192,11 @@ class PostgresDB:
             return "No action taken at this time."
 
 
-DatashelfClass = Datashelf()
-PostgresClass = PostgresDB()
+def __getattr__(name):
+    """Create the default Datashelf on the first access to DatashelfClass rather than when the module is imported"""
+    if name == "DatashelfClass":
+        return Datashelf.default()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+PostgresClass = PostgresDB
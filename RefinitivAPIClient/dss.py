@@ -1,54 +1,118 @@
 """Main DSS Module"""
 
-import json
+import functools
+import itertools
 import os
 import re
-import requests
 import time
 import zipfile
 
-from simplejson import JSONDecodeError
-
 from datetime import datetime, timedelta
 from dateutil import parser
 from pprint import pprint
 
-from RefinitivAPIClient.datashelf import DatashelfClass, PostgresClass
-from RefinitivAPIClient.dss_requests import DSS, JSON_REQUESTS
-from RefinitivAPIClient.utility import Utility
+from RefinitivAPIClient.buffers import ResultBuffer
+from RefinitivAPIClient.chains import ChainExpanderClass
+from RefinitivAPIClient.codec import Codec
+from RefinitivAPIClient.coalesce import BatchCoalescer, single_flight
+from RefinitivAPIClient.corporate_actions import CorporateActionsSyncClass
+from RefinitivAPIClient.datashelf import Datashelf, PostgresClass
+from RefinitivAPIClient.dss_requests import DSS
+from RefinitivAPIClient.history import PriceHistoryStoreClass
+from RefinitivAPIClient.identifiers import IdentifierBatch
+from RefinitivAPIClient.metrics import MetricsClass
+from RefinitivAPIClient.notes import ExtractionNotes, ExtractionResult
+from RefinitivAPIClient.pipeline import Pipeline
+from RefinitivAPIClient.reuse import ReusableObjects
+from RefinitivAPIClient.routing import ON_DEMAND, SCHEDULED, UNCONDITIONED_TEMPLATES, ExtractionRouter, \
+    ExtractionRouterClass
+from RefinitivAPIClient.schedules import ScheduleManager, ScheduleManagerClass
+from RefinitivAPIClient.sinks import DataFrameSink
+from RefinitivAPIClient.streaming import ExtractionStream
+from RefinitivAPIClient.tracing import Trace, Tracing
+from RefinitivAPIClient.transport import Transport
+from RefinitivAPIClient.utility import RateLimiter, Utility
+from RefinitivAPIClient.windows import TimeWindowSharderClass
+from RefinitivAPIClient.xref import CrossReferenceClass
 
 # Reference on the API Schema at: https://hosted.datascopeapi.reuters.com/RestApi.Help/Home/RestApiProgrammingSdk
 # Internal Doc:
 
 
+class _BoundToDatashelf:
+    """Proxy of a group of functions running each call with a given Datashelf active"""
+
+    def __init__(self, target, datashelf):
+        """
+        Initialize the proxy
+        :param target: object whose functions are proxied, e.g. Requests()
+        :param Datashelf datashelf: Datashelf used by the calls
+        """
+        self._target = target
+        self._datashelf = datashelf
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        def bound(*args, **kwargs):
+            with self._datashelf.activate():
+                return attribute(*args, **kwargs)
+        return bound
+
+
 class Refinitiv:
     """Handles all the requests doable with the REST API"""
 
-    def __init__(self):
-        """Initialize the class with the sub-classes"""
-        self.list_fields = ListFields()
-        self.request_data = Requests()
-        self.securities_search = Searches()
-        self.gui_operations = GUIOperations()
-        self.operations = Operations()
-        Refinitiv.set_max_results(1000000)
+    def __init__(self, datashelf=None):
+        """
+        Initialize the class with the sub-classes
+        :param Datashelf datashelf: account used by the calls made through this instance, including the ones of its
+        own schedule manager and of the price history store. Default: the Datashelf active in the calling context,
+        the one of DSS_DATA unless another one has been activated
+        """
+        self.datashelf = datashelf
+        groups = {"list_fields": ListFields(), "request_data": Requests(), "securities_search": Searches(),
+                  "gui_operations": GUIOperations(), "operations": Operations(), "reusable_objects": ReusableObjects()}
+        for name, group in groups.items():
+            setattr(self, name, group if datashelf is None else _BoundToDatashelf(group, datashelf))
+        self.schedule_manager = ScheduleManagerClass if datashelf is None else \
+            _BoundToDatashelf(ScheduleManager(), datashelf)
+        self.price_history = PriceHistoryStoreClass if datashelf is None else \
+            _BoundToDatashelf(PriceHistoryStoreClass, datashelf)
+        self.metrics = MetricsClass
+        if datashelf is not None:
+            Refinitiv.set_max_results(1000000, datashelf)
+
+    def activate(self):
+        """
+        Make the calls of the current context use the Datashelf of this instance, e.g. to call the functions of the
+        modules directly or to run the schedule manager with this account
+        :return: a context manager yielding the Datashelf
+        """
+        return (self.datashelf if self.datashelf is not None else Datashelf.current()).activate()
 
     @staticmethod
-    def set_max_results(num):
+    def set_max_results(num, datashelf=None):
         """
         Set the maximum numbers of results in the header
         :param int num: number of results to be returned
+        :param Datashelf datashelf: account whose headers are changed. Default: the active Datashelf
         :return: an header object
         :rtype: dict
         """
-        DatashelfClass.dss_headers["Prefer"] = "odata.maxpagesize={}; respond-async".format(num)
-        return DatashelfClass.dss_headers
+        datashelf = datashelf if datashelf is not None else Datashelf.current()
+        datashelf.dss_headers["Prefer"] = "odata.maxpagesize={}; respond-async".format(num)
+        return datashelf.dss_headers
 
 
 class ListFields:
     """Group all the functions to send requests to list events"""
 
     @staticmethod
+    @single_flight
     def list_available_fields_for_price_history():
         """
         List all the fields for the Price History template
@@ -56,13 +120,14 @@ class ListFields:
         :rtype: dict or str
         """
         url = DSS.get('endpoints').get('get_fields').get('price_history')
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.get(url)
         if response.status_code != 200:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        return response.json()["value"]
+        return Codec.loads(response.content)["value"]
 
     @staticmethod
+    @single_flight
     def list_available_fields_for_eod():
         """
         List all the fields for the EOD template
@@ -70,13 +135,14 @@ class ListFields:
         :rtype: dict or str
         """
         url = DSS.get('endpoints').get('get_fields').get('eod')
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.get(url)
         if response.status_code != 200:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        return response.json()["value"]
+        return Codec.loads(response.content)["value"]
 
     @staticmethod
+    @single_flight
     def list_available_fields_for_ca():
         """
         List all the fields for the Corporate Actions template
@@ -84,13 +150,14 @@ class ListFields:
         :rtype: dict or str
         """
         url = DSS.get('endpoints').get('get_fields').get('ca')
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.get(url)
         if response.status_code != 200:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        return response.json()["value"]
+        return Codec.loads(response.content)["value"]
 
     @staticmethod
+    @single_flight
     def list_available_fields_for_ownership():
         """
         List all the fields for the Ownership template
@@ -98,13 +165,14 @@ class ListFields:
         :rtype: dict or str
         """
         url = DSS.get('endpoints').get('get_fields').get('ownership_data')
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.get(url)
         if response.status_code != 200:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        return response.json()["value"]
+        return Codec.loads(response.content)["value"]
 
     @staticmethod
+    @single_flight
     def list_available_fields_for_tc():
         """
         List all the fields for the Terms and Conditions template
@@ -112,13 +180,14 @@ class ListFields:
         :rtype: dict or str
         """
         url = DSS.get('endpoints').get('get_fields').get('tc')
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.get(url)
         if response.status_code != 200:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        return response.json()["value"]
+        return Codec.loads(response.content)["value"]
 
     @staticmethod
+    @single_flight
     def list_available_fields_for_composite():
         """
         List all the fields for the Composite template
@@ -126,13 +195,14 @@ class ListFields:
         :rtype: dict or str
         """
         url = DSS.get('endpoints').get('get_fields').get('composite')
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.get(url)
         if response.status_code != 200:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        return response.json()["value"]
+        return Codec.loads(response.content)["value"]
 
     @staticmethod
+    @single_flight
     def list_available_templates_by_name(name):
         """
         List a template already created on DSS by name
@@ -141,13 +211,14 @@ class ListFields:
         :rtype: dict or str
         """
         url = DSS.get('endpoints').get('get_fields').get('templates_by_name') % name
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.get(url)
         if response.status_code != 200:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        return response.json()
+        return Codec.loads(response.content)
 
     @staticmethod
+    @single_flight
     def list_available_instrument_lists(entity=False):
         """
         List all the Instrument Lists available on DSS
@@ -157,13 +228,14 @@ class ListFields:
         """
         url = DSS.get('endpoints').get('get_fields').get('instrument_lists') if not entity else \
             DSS.get('endpoints').get('get_fields').get('entity_lists')
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.get(url)
         if response.status_code != 200:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        return response.json()
+        return Codec.loads(response.content)
 
     @staticmethod
+    @single_flight
     def list_available_instrument_lists_by_name(name, entity=False):
         """
         List all the Instrument Lists available on DSS
@@ -174,13 +246,14 @@ class ListFields:
         """
         url = DSS.get('endpoints').get('get_fields').get('instrument_lists_by_name') % name if not entity else \
             DSS.get('endpoints').get('get_fields').get('entity_lists_by_name') % name
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.get(url)
         if response.status_code != 200:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        return response.json()
+        return Codec.loads(response.content)
 
     @staticmethod
+    @single_flight
     def list_available_instrument_within_instrument_list(list_id, entity=False):
         """
         List all the Instruments within a specific Instrument List on DSS
@@ -191,13 +264,14 @@ class ListFields:
         """
         url = DSS.get('endpoints').get('get_fields').get('instrument_lists_content') % list_id if not entity else \
             DSS.get('endpoints').get('get_fields').get('entity_lists_content') % list_id
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.get(url)
         if response.status_code != 200:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        return response.json()
+        return Codec.loads(response.content)
 
     @staticmethod
+    @single_flight
     def list_available_templates():
         """
         List all the Templates available on DSS
@@ -205,13 +279,14 @@ class ListFields:
         :rtype: dict or str
         """
         url = DSS.get('endpoints').get('get_fields').get('templates')
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.get(url)
         if response.status_code != 200:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        return response.json()
+        return Codec.loads(response.content)
 
     @staticmethod
+    @single_flight
     def list_all_extractions():
         """
         List all extractions available on DSS
@@ -219,13 +294,14 @@ class ListFields:
         :rtype: dict or str
         """
         url = DSS.get('endpoints').get('get_fields').get('extractions')
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.get(url)
         if response.status_code != 200:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        return response.json()
+        return Codec.loads(response.content)
 
     @staticmethod
+    @single_flight
     def list_completed_extractions():
         """
         List all the completed extractions available on DSS
@@ -233,30 +309,55 @@ class ListFields:
         :rtype: dict or str
         """
         url = DSS.get('endpoints').get('get_fields').get('completed_extractions')
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.get(url)
+        if response.status_code != 200:
+            return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
+                   f"{str(response.content)}"
+        return Codec.loads(response.content)
+
+    @staticmethod
+    @single_flight
+    def list_schedules():
+        """
+        List all the schedules available on DSS
+        :return: a JSON response with the list of the schedules
+        :rtype: dict or str
+        """
+        url = DSS.get('endpoints').get('gui').get('schedules')
+        response = Transport.get(url)
         if response.status_code != 200:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        return response.json()
+        return Codec.loads(response.content)
 
 
 class Requests:
     """Group all the functions that request data"""
 
     @staticmethod
-    def request_eod_pricing(sec_list):
+    def request_eod_pricing(sec_list, streaming=False, coalesce=False, memory_limit=None, store=False):
         """
         Request EOD Pricing for the securities in the Tuple
-        :param list sec_list: List of tuples with pair (identifier, identifierType)
-        :return: a JSON object with the data queried from Refinitiv
-        :rtype: dict or str
-        """
-        instr_identifiers = [{"Identifier": i[0], "IdentifierType": i[1]} for i in sec_list]
-        eod_pricing = json.loads(open(os.path.join(JSON_REQUESTS, "eod_prices_request.json")).read())
+        :param list or IdentifierBatch sec_list: List of tuples with pair (identifier, identifierType)
+        :param bool streaming: if True, return an ExtractionStream iterating over the Contents row by row
+        :param bool coalesce: if True, share one extraction with the other threads requesting identifiers within the
+        same short window. Streaming is not available
+        :param int memory_limit: if given, return a ResultBuffer keeping up to memory_limit bytes of rows in memory
+        and spilling the rest to disk
+        :param bool store: if True, save the rows in PriceHistoryStoreClass. Streaming is not available
+        :return: the Contents queried from Refinitiv, with the parsed Notes in their notes attribute
+        :rtype: ExtractionResult or str or ExtractionStream or ResultBuffer
+        """
+        if coalesce:
+            values = EodPricingCoalescer.submit(sec_list)
+            if store and type(values) is not str:
+                PriceHistoryStoreClass.ingest(values)
+            return values
+        instr_identifiers = IdentifierBatch.request_identifiers(sec_list)
+        eod_pricing = Codec.load_template("eod_prices_request.json")
         url = DSS.get('endpoints').get('extraction')
         eod_pricing["ExtractionRequest"]["IdentifierList"]["InstrumentIdentifiers"] = instr_identifiers
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=eod_pricing, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=eod_pricing, stream=streaming or memory_limit is not None)
         if response.status_code not in [200, 202]:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
@@ -264,31 +365,52 @@ class Requests:
             print("The query has been switched to async. Please find the link where to download it:")
             pprint(response.headers)
             return "Please run the request_async_extraction function to download the data"
-        values = response.json()["Contents"]
+        if memory_limit is not None:
+            return ExtractionStream(response).to_buffer(memory_limit)
+        if streaming:
+            return ExtractionStream(response)
+        values = ExtractionResult.from_body(Codec.loads(response.content))
+        if store:
+            PriceHistoryStoreClass.ingest(values)
         return values
 
     @staticmethod
-    def request_price_history_data(sec_list, start_date=False, end_date=False):
+    def request_price_history_data(sec_list, start_date=False, end_date=False, streaming=False, memory_limit=None,
+                                   shard=False, store=False):
         """
         Request Price History for the securities in the Tuple
-        :param list or tuple sec_list: List of tuples with pair (identifier, identifierType)
+        :param list or tuple or IdentifierBatch sec_list: List of tuples with pair (identifier, identifierType)
         :param str start_date: Date from where to start the extraction, with format YYYYMMDD
         :param str end_date: If not specified, this will be equal to today's date
-        :return: a JSON object with the data queried from Refinitiv
-        :rtype: dict or str
+        :param bool streaming: if True, return an ExtractionStream iterating over the Contents row by row
+        :param int memory_limit: if given, return a ResultBuffer keeping up to memory_limit bytes of rows in memory
+        and spilling the rest to disk
+        :param bool shard: if True, split the request in batches of identifiers by windows of dates sized by
+        TimeWindowSharderClass and fetched concurrently, returning the rows in (Identifier, Trade Date) order.
+        Streaming is not available
+        :param bool store: if True, save the rows in PriceHistoryStoreClass, marking the range of dates as covered for
+        the securities requested. Streaming is not available
+        :return: the Contents queried from Refinitiv, with the parsed Notes in their notes attribute
+        :rtype: ExtractionResult or str or ExtractionStream or ResultBuffer
         """
         start_date = start_date if start_date else str(datetime.now() - timedelta(days=1440))
-        instr_identifiers = [{"Identifier": i[0], "IdentifierType": i[1]} for i in sec_list] if type(sec_list) is list \
+        if shard:
+            values = TimeWindowSharderClass.request([sec_list] if type(sec_list) is tuple else sec_list,
+                                                    start_date, end_date)
+            if store and type(values) is not str:
+                PriceHistoryStoreClass.ingest(values, [sec_list] if type(sec_list) is tuple else sec_list,
+                                              start_date, end_date if end_date else datetime.now())
+            return values
+        instr_identifiers = IdentifierBatch.request_identifiers(sec_list) if type(sec_list) is not tuple \
             else [{"Identifier": sec_list[0], "IdentifierType": sec_list[1]}]
-        price_history = json.loads(open(os.path.join(JSON_REQUESTS, "price_history_request.json")).read())
+        price_history = Codec.load_template("price_history_request.json")
         url = DSS.get('endpoints').get('extraction')
         price_history["ExtractionRequest"]["IdentifierList"]["InstrumentIdentifiers"] = instr_identifiers
         price_history["ExtractionRequest"]["Condition"]["QueryStartDate"] = str(parser.parse(start_date).isoformat()
                                                                                 ) + "Z"
         price_history["ExtractionRequest"]["Condition"]["QueryEndDate"] = datetime.now().isoformat() + "Z" if not \
             end_date else str(parser.parse(end_date).isoformat()) + "Z"
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=price_history, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=price_history, stream=streaming or memory_limit is not None)
         if response.status_code not in [200, 202]:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
@@ -296,33 +418,55 @@ class Requests:
             print("The query has been switched to async. Please find the link where to download it:")
             pprint(response.headers)
             return "Please run the request_async_extraction function to download the data"
-        values = response.json()["Contents"]
+        if memory_limit is not None:
+            return ExtractionStream(response).to_buffer(memory_limit)
+        if streaming:
+            return ExtractionStream(response)
+        values = ExtractionResult.from_body(Codec.loads(response.content))
+        if store:
+            PriceHistoryStoreClass.ingest(values, [sec_list] if type(sec_list) is tuple else sec_list, start_date,
+                                          end_date if end_date else datetime.now())
         return values
 
     @staticmethod
-    def request_ca_events(sec_list, prev_days=None, next_days=None):
+    def request_ca_events(sec_list, prev_days=None, next_days=None, streaming=False, start_date=None, end_date=None,
+                          include_deleted=False, memory_limit=None):
         """
         Request Corporate Actions Data Template
-        :param list sec_list: List of tuples with pair (identifier, identifierType)
+        :param list or IdentifierBatch sec_list: List of tuples with pair (identifier, identifierType)
         :param int prev_days: Number of days to go back in time when pulling-up Corporate Action events
         :param int next_days: Number of days to go ahead in time when pulling-up Corporate Action events
-        :return: a JSON object with the data queried from Refinitiv
-        :rtype: dict or str
-        """
-        if prev_days and next_days:
-            next_days = None
-            print("You cannot have prev_days and next_days both populated. Setting next_days = None")
-        if not prev_days and not next_days:
-            next_days = 7
-            print("You cannot have prev_days and next_days both None. Setting next_days = 7")
-        instr_identifiers = [{"Identifier": i[0], "IdentifierType": i[1]} for i in sec_list]
-        ca_events = json.loads(open(os.path.join(JSON_REQUESTS, "corporate_action_request.json")).read())
+        :param bool streaming: if True, return an ExtractionStream iterating over the Contents row by row
+        :param str start_date: if given, request the events between start_date and end_date instead of prev_days or
+        next_days
+        :param str end_date: end of the range of dates when start_date is given. If not specified, today's date
+        :param bool include_deleted: if True, return the deleted events as well, flagged by the Delete Marker field
+        :param int memory_limit: if given, return a ResultBuffer keeping up to memory_limit bytes of rows in memory
+        and spilling the rest to disk
+        :return: the Contents queried from Refinitiv, with the parsed Notes in their notes attribute
+        :rtype: ExtractionResult or str or ExtractionStream or ResultBuffer
+        """
+        instr_identifiers = IdentifierBatch.request_identifiers(sec_list)
+        ca_events = Codec.load_template("corporate_action_request.json")
         url = DSS.get('endpoints').get('extraction')
         ca_events["ExtractionRequest"]["IdentifierList"]["InstrumentIdentifiers"] = instr_identifiers
-        ca_events["ExtractionRequest"]["Condition"]["PreviousDays"] = prev_days if prev_days is not None else None
-        ca_events["ExtractionRequest"]["Condition"]["NextDays"] = next_days if next_days is not None else None
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=ca_events, proxies=DatashelfClass.proxy, verify=False)
+        ca_events["ExtractionRequest"]["Condition"]["ExcludeDeletedEvents"] = not include_deleted
+        if start_date:
+            ca_events["ExtractionRequest"]["Condition"]["ReportDateRangeType"] = "Range"
+            ca_events["ExtractionRequest"]["Condition"]["QueryStartDate"] = str(parser.parse(start_date).isoformat()
+                                                                                ) + "Z"
+            ca_events["ExtractionRequest"]["Condition"]["QueryEndDate"] = datetime.now().isoformat() + "Z" if not \
+                end_date else str(parser.parse(end_date).isoformat()) + "Z"
+        else:
+            if prev_days and next_days:
+                next_days = None
+                print("You cannot have prev_days and next_days both populated. Setting next_days = None")
+            if not prev_days and not next_days:
+                next_days = 7
+                print("You cannot have prev_days and next_days both None. Setting next_days = 7")
+            ca_events["ExtractionRequest"]["Condition"]["PreviousDays"] = prev_days if prev_days is not None else None
+            ca_events["ExtractionRequest"]["Condition"]["NextDays"] = next_days if next_days is not None else None
+        response = Transport.post(url, json=ca_events, stream=streaming or memory_limit is not None)
         if response.status_code not in [200, 202]:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
@@ -330,23 +474,43 @@ class Requests:
             print("The query has been switched to async. Please find the link where to download it:")
             pprint(response.headers)
             return "Please run the request_async_extraction function to download the data"
-        values = response.json()["Contents"]
+        if memory_limit is not None:
+            return ExtractionStream(response).to_buffer(memory_limit)
+        if streaming:
+            return ExtractionStream(response)
+        values = ExtractionResult.from_body(Codec.loads(response.content))
         return values
 
     @staticmethod
-    def request_ownership_data(sec_list):
-        """
-        Request Ownership Data Template
-        :param list sec_list: List of tuples with pair (identifier, identifierType)
-        :return: a JSON object with the data queried from Refinitiv
+    def sync_ca_events(sec_list, universe=None, initial_days=30, next_days=90):
+        """
+        Request the Corporate Actions events since the last sync of the universe, returning only the ones which are
+        new, changed or deleted. The watermark and the events seen are kept by CorporateActionsSyncClass
+        :param list or IdentifierBatch sec_list: List of tuples with pair (identifier, identifierType)
+        :param str universe: name of the universe. Default: a hash of the identifiers
+        :param int initial_days: number of days to go back in time at the first sync
+        :param int next_days: number of days to go ahead in time, to catch the announced events
+        :return: a dictionary with the new, changed and deleted events and the number of unchanged events
         :rtype: dict or str
         """
-        instr_identifiers = [{"Identifier": i[0], "IdentifierType": i[1]} for i in sec_list]
-        ownership_data = json.loads(open(os.path.join(JSON_REQUESTS, "ownership_data_request.json")).read())
+        return CorporateActionsSyncClass.sync(sec_list, universe, initial_days, next_days)
+
+    @staticmethod
+    def request_ownership_data(sec_list, streaming=False, memory_limit=None):
+        """
+        Request Ownership Data Template
+        :param list or IdentifierBatch sec_list: List of tuples with pair (identifier, identifierType)
+        :param bool streaming: if True, return an ExtractionStream iterating over the Contents row by row
+        :param int memory_limit: if given, return a ResultBuffer keeping up to memory_limit bytes of rows in memory
+        and spilling the rest to disk
+        :return: a JSON object with the data queried from Refinitiv, with the parsed Notes in its ExtractionNotes key
+        :rtype: dict or str or ExtractionStream or ResultBuffer
+        """
+        instr_identifiers = IdentifierBatch.request_identifiers(sec_list)
+        ownership_data = Codec.load_template("ownership_data_request.json")
         url = DSS.get('endpoints').get('extraction')
         ownership_data["ExtractionRequest"]["IdentifierList"]["InstrumentIdentifiers"] = instr_identifiers
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=ownership_data, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=ownership_data, stream=streaming or memory_limit is not None)
         if response.status_code not in [200, 202]:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
@@ -354,23 +518,34 @@ class Requests:
             print("The query has been switched to async. Please find the link where to download it:")
             pprint(response.headers)
             return "Please run the request_async_extraction function to download the data"
-        values = response.json()
+        if memory_limit is not None:
+            return ExtractionStream(response).to_buffer(memory_limit)
+        if streaming:
+            return ExtractionStream(response)
+        values = Codec.loads(response.content)
+        values["ExtractionNotes"] = ExtractionNotes.from_body(values)
         return values
 
     @staticmethod
-    def request_tc_data(sec_list):
+    def request_tc_data(sec_list, streaming=False, coalesce=False, memory_limit=None):
         """
         Request Terms and Conditions Data Template
-        :param list sec_list: List of tuples with pair (identifier, identifierType)
-        :return: a JSON object with the data queried from Refinitiv
-        :rtype: dict or str
-        """
-        instr_identifiers = [{"Identifier": i[0], "IdentifierType": i[1]} for i in sec_list]
-        tc_data = json.loads(open(os.path.join(JSON_REQUESTS, "terms_and_conditions_request.json")).read())
+        :param list or IdentifierBatch sec_list: List of tuples with pair (identifier, identifierType)
+        :param bool streaming: if True, return an ExtractionStream iterating over the Contents row by row
+        :param bool coalesce: if True, share one extraction with the other threads requesting identifiers within the
+        same short window. Streaming is not available
+        :param int memory_limit: if given, return a ResultBuffer keeping up to memory_limit bytes of rows in memory
+        and spilling the rest to disk
+        :return: the Contents queried from Refinitiv, with the parsed Notes in their notes attribute
+        :rtype: ExtractionResult or str or ExtractionStream or ResultBuffer
+        """
+        if coalesce:
+            return TermsAndConditionsCoalescer.submit(sec_list)
+        instr_identifiers = IdentifierBatch.request_identifiers(sec_list)
+        tc_data = Codec.load_template("terms_and_conditions_request.json")
         url = DSS.get('endpoints').get('extraction')
         tc_data["ExtractionRequest"]["IdentifierList"]["InstrumentIdentifiers"] = instr_identifiers
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=tc_data, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=tc_data, stream=streaming or memory_limit is not None)
         if response.status_code not in [200, 202]:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
@@ -378,23 +553,34 @@ class Requests:
             print("The query has been switched to async. Please find the link where to download it:")
             pprint(response.headers)
             return "Please run the request_async_extraction function to download the data"
-        values = response.json()["Contents"]
+        if memory_limit is not None:
+            return ExtractionStream(response).to_buffer(memory_limit)
+        if streaming:
+            return ExtractionStream(response)
+        values = ExtractionResult.from_body(Codec.loads(response.content))
         return values
 
     @staticmethod
-    def request_composite_data(sec_list):
+    def request_composite_data(sec_list, streaming=False, coalesce=False, memory_limit=None):
         """
         Request Composite Data Template
-        :param list sec_list: List of tuples with pair (identifier, identifierType)
-        :return: a JSON object with the data queried from Refinitiv
-        :rtype: dict or str
-        """
-        instr_identifiers = [{"Identifier": i[0], "IdentifierType": i[1]} for i in sec_list]
-        composite_data = json.loads(open(os.path.join(JSON_REQUESTS, "composite_request.json")).read())
+        :param list or IdentifierBatch sec_list: List of tuples with pair (identifier, identifierType)
+        :param bool streaming: if True, return an ExtractionStream iterating over the Contents row by row
+        :param bool coalesce: if True, share one extraction with the other threads requesting identifiers within the
+        same short window. Streaming is not available
+        :param int memory_limit: if given, return a ResultBuffer keeping up to memory_limit bytes of rows in memory
+        and spilling the rest to disk
+        :return: a JSON object with the data queried from Refinitiv, with the parsed Notes in its ExtractionNotes key.
+        With coalesce=True, the Contents with the parsed Notes in their notes attribute
+        :rtype: dict or ExtractionResult or str or ExtractionStream or ResultBuffer
+        """
+        if coalesce:
+            return CompositeCoalescer.submit(sec_list)
+        instr_identifiers = IdentifierBatch.request_identifiers(sec_list)
+        composite_data = Codec.load_template("composite_request.json")
         url = DSS.get('endpoints').get('extraction')
         composite_data["ExtractionRequest"]["IdentifierList"]["InstrumentIdentifiers"] = instr_identifiers
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=composite_data, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=composite_data, stream=streaming or memory_limit is not None)
         if response.status_code not in [200, 202]:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
@@ -402,45 +588,96 @@ class Requests:
             print("The query has been switched to async. Please find the link where to download it:")
             pprint(response.headers)
             return "Please run the request_async_extraction function to download the data"
-        values = response.json()
+        if memory_limit is not None:
+            return ExtractionStream(response).to_buffer(memory_limit)
+        if streaming:
+            return ExtractionStream(response)
+        values = Codec.loads(response.content)
+        values["ExtractionNotes"] = ExtractionNotes.from_body(values)
         return values
 
     @staticmethod
-    def request_async_extraction(extraction_id):
+    def request_extraction(sec_list, template_type, fields, condition=None, streaming=False, interval=5,
+                           memory_limit=None):
+        """
+        Request any extraction on-demand with the given fields. If DSS switches the request to async, the result is
+        polled until it is available
+        :param list or IdentifierBatch sec_list: List of tuples with pair (identifier, identifierType)
+        :param str template_type: template name, e.g. EndOfDayPricingReportTemplate
+        :param list or str fields: list or comma separated string of the fields to extract
+        :param dict condition: optional Condition of the request, e.g. the QueryStartDate of a Price History
+        :param bool streaming: if True, return an ExtractionStream iterating over the Contents row by row
+        :param int interval: number of seconds to wait between two checks of an async request
+        :param int memory_limit: if given, return a ResultBuffer keeping up to memory_limit bytes of rows in memory
+        and spilling the rest to disk
+        :return: the Contents queried from Refinitiv, with the parsed Notes in their notes attribute
+        :rtype: ExtractionResult or str or ExtractionStream or ResultBuffer
+        """
+        request = Codec.load_template("extraction_request.json")
+        request["ExtractionRequest"]["@odata.type"] = request["ExtractionRequest"]["@odata.type"] % \
+            template_type.replace("ReportTemplate", "ExtractionRequest")
+        request["ExtractionRequest"]["ContentFieldNames"] = Utility.transform_in_list_of_elements(fields)
+        request["ExtractionRequest"]["IdentifierList"]["InstrumentIdentifiers"] = \
+            IdentifierBatch.request_identifiers(sec_list)
+        request["ExtractionRequest"]["Condition"] = condition
+        url = DSS.get('endpoints').get('extraction')
+        response = Transport.post(url, json=request, stream=streaming or memory_limit is not None)
+        while response.status_code == 202:
+            location = response.headers["Location"]
+            response.close()
+            print(f"The query has been switched to async. Retrying again in {interval} seconds.")
+            time.sleep(interval)
+            response = Transport.get(location, stream=streaming or memory_limit is not None)
+        if response.status_code != 200:
+            return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
+                   f"{str(response.content)}"
+        if memory_limit is not None:
+            return ExtractionStream(response).to_buffer(memory_limit)
+        if streaming:
+            return ExtractionStream(response)
+        return ExtractionResult.from_body(Codec.loads(response.content))
+
+    @staticmethod
+    def request_async_extraction(extraction_id, streaming=False, memory_limit=None):
         """
         Post the async url along with the headers to get the data running asynchronously
         :param str extraction_id: extraction_id gotten from the header of the async request
+        :param bool streaming: if True, return an ExtractionStream iterating over the Contents row by row
+        :param int memory_limit: if given, return a ResultBuffer keeping up to memory_limit bytes of rows in memory
+        and spilling the rest to disk
         :return: a JSON object with the async'ed response
-        :rtype: dict or str
+        :rtype: ExtractionResult or str or ExtractionStream or ResultBuffer
         """
         url = DSS.get('endpoints').get('extraction_results') % extraction_id
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.get(url, stream=streaming or memory_limit is not None)
         if response.status_code not in [200, 202]:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
+        if memory_limit is not None and response.status_code == 200:
+            return ExtractionStream(response).to_buffer(memory_limit)
+        if streaming and response.status_code == 200:
+            return ExtractionStream(response)
         try:
-            values = response.json()["Contents"]
-        except KeyError:
-            values = response.json()
-        except JSONDecodeError:
-            values = response.text
-        return values
+            values = Codec.loads(response.content)
+        except ValueError:
+            return response.text
+        return ExtractionResult.from_body(values) if "Contents" in values else values
 
     @staticmethod
-    def request_components_of_chain_ric(ric):
+    def request_components_of_chain_ric(ric, streaming=False):
         """
         Request the securities within a Chain RIC
         :param str ric: Chain RIC to be searched. The RIC could be in the full format starting with "0#" or not
-        :return: a JSON object with the async'ed response
-        :rtype: dict or str
+        :param bool streaming: if True, return an ExtractionStream iterating over the Contents row by row
+        :return: a JSON object with the async'ed response, with the parsed Notes in its ExtractionNotes key
+        :rtype: dict or str or ExtractionStream
         """
-        chain_ric_request = json.loads(open(os.path.join(JSON_REQUESTS, "chain_ric_request.json")).read())
+        chain_ric_request = Codec.load_template("chain_ric_request.json")
         url = DSS.get('endpoints').get('extraction')
         chain_ric_value = ric if ric[:2] == "0#" else "0#" + ric
         chain_ric_request["ExtractionRequest"]["IdentifierList"]["InstrumentIdentifiers"][0]["Identifier"] = \
             chain_ric_value
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=chain_ric_request, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=chain_ric_request, stream=streaming)
         if response.status_code not in [200, 202]:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
@@ -448,9 +685,46 @@ class Requests:
             print("The query has been switched to async. Please find the link where to download it:")
             pprint(response.headers)
             return "Please run the request_async_extraction function to download the data"
-        values = response.json()
+        if streaming:
+            return ExtractionStream(response)
+        values = Codec.loads(response.content)
+        values["ExtractionNotes"] = ExtractionNotes.from_body(values)
         return values
 
+    @staticmethod
+    def expand_chain_rics(chains, max_workers=16, max_depth=10):
+        """
+        Expand Chain RICs and all their nested chains, requesting the chains of the same level at the same time.
+        The components of each chain are memoized by ChainExpanderClass
+        :param list or str chains: Chain RIC or list of Chain RICs, in the full format starting with "0#" or not
+        :param int max_workers: maximum number of chains requested at the same time
+        :param int max_depth: maximum number of nested levels expanded
+        :return: the flat, deduplicated list of constituents, or a dictionary with one list per chain if a list of
+        chains is passed
+        :rtype: list or dict
+        """
+        if type(chains) is str:
+            return ChainExpanderClass.expand(chains, max_workers, max_depth)
+        return ChainExpanderClass.expand_many(chains, max_workers, max_depth)
+
+
+def _composite_rows(sec_list):
+    """
+    Request Composite Data as the rows the CompositeCoalescer merges
+    :param list sec_list: List of tuples with pair (identifier, identifierType)
+    :return: the Contents queried from Refinitiv, with the parsed Notes in their notes attribute, or a message of error
+    :rtype: ExtractionResult or str
+    """
+    values = Requests.request_composite_data(sec_list)
+    if type(values) is str:
+        return values
+    return ExtractionResult(values["Contents"], values["ExtractionNotes"])
+
+
+EodPricingCoalescer = BatchCoalescer(Requests.request_eod_pricing, name="request_eod_pricing")
+TermsAndConditionsCoalescer = BatchCoalescer(Requests.request_tc_data, name="request_tc_data")
+CompositeCoalescer = BatchCoalescer(_composite_rows, name="request_composite_data")
+
 
 class Searches:
     """Group all the functions that perform Searches"""
@@ -466,23 +740,85 @@ class Searches:
         :return: a JSON response with the results (if any)
         :rtype: dict or str
         """
-        search_request = json.loads(open(os.path.join(JSON_REQUESTS, "search_request.json")).read())
+        search_request = Codec.load_template("search_request.json")
         url = DSS.get('endpoints').get('searches').get('generic_search')
         search_request["SearchRequest"]["IdentifierType"] = identifier_type
         search_request["SearchRequest"]["Identifier"] = identifier
         search_request["SearchRequest"]["PreferredIdentifierType"] = preferred_return_type
-        instrument_type_groups = instrument_type_groups if not None else \
+        instrument_type_groups = instrument_type_groups if instrument_type_groups is not None else \
             ["CollatetizedMortgageObligations", "Commodities", "Equities", "FuturesAndOptions",
              "GovCorp", "MortgageBackedSecurities", "Money", "Municipals", "Funds"]
         search_request["SearchRequest"]["InstrumentTypeGroups"] = instrument_type_groups
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=search_request, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=search_request)
         if response.status_code != 200:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        values = response.json()
+        values = Codec.loads(response.content)
         return values
 
+    @staticmethod
+    def batch_instrument_search(identifier_type, identifiers, preferred_return_type, instrument_type_groups=None,
+                                max_workers=8, rate=10, use_cache=True):
+        """
+        Search many identifiers at the same time. Duplicates are searched once, the identifiers already resolved are
+        read from the cross-reference cache and the calls are kept within a rate budget
+        :param str identifier_type: Type of the identifiers
+        :param list identifiers: List of identifiers with the same type as identifier_type
+        :param str preferred_return_type: specify what identifiers the response should return
+        :param list instrument_type_groups: list of asset classes where to perform the research
+        :param int max_workers: maximum number of searches sent at the same time
+        :param float rate: maximum number of searches sent per second. If None, only max_workers limits them
+        :param bool use_cache: if False, search all the identifiers again (the cache is updated anyway)
+        :return: a dictionary with the input identifiers as keys and the list of results (or a message of error)
+        as values
+        :rtype: dict
+        """
+        unique_identifiers = list(dict.fromkeys(identifiers))
+        results = CrossReferenceClass.get_many(identifier_type, unique_identifiers, preferred_return_type) \
+            if use_cache else dict()
+        misses = [i for i in unique_identifiers if i not in results]
+        limiter = RateLimiter(rate) if rate else None
+
+        def search(identifier):
+            if limiter is not None:
+                limiter.acquire()
+            response = Searches.instrument_search(identifier_type, identifier, preferred_return_type,
+                                                  instrument_type_groups)
+            return response if type(response) is str else response.get("value", list())
+
+        resolved = dict(zip(misses, Utility.run_concurrently(search, misses, max_workers)))
+        CrossReferenceClass.put_many(identifier_type, {key: value for key, value in resolved.items()
+                                                       if type(value) is not str and value}, preferred_return_type)
+        results.update(resolved)
+        print(f"Searched {len(misses)} identifiers, {len(unique_identifiers) - len(misses)} found in the cache")
+        return {i: results[i] for i in unique_identifiers}
+
+    @staticmethod
+    def translate_identifiers(identifier_type, identifiers, target_type, max_workers=8, rate=10):
+        """
+        Translate identifiers (e.g. Isin to Ric) with the cross-reference store first, searching remotely only the
+        identifiers not found or stale
+        :param str identifier_type: Type of the identifiers to translate
+        :param list identifiers: List of identifiers with the same type as identifier_type
+        :param str target_type: Type of the identifiers wanted
+        :param int max_workers: maximum number of searches sent at the same time
+        :param float rate: maximum number of searches sent per second
+        :return: a dictionary with the input identifiers as keys and the list of translations (empty if none, or a
+        message of error) as values
+        :rtype: dict
+        """
+        unique_identifiers = list(dict.fromkeys(identifiers))
+        translations = CrossReferenceClass.translate(identifier_type, unique_identifiers, target_type)
+        misses = [i for i in unique_identifiers if i not in translations]
+        if misses:
+            searched = Searches.batch_instrument_search(identifier_type, misses, target_type, max_workers=max_workers,
+                                                        rate=rate, use_cache=False)
+            for identifier, values in searched.items():
+                translations[identifier] = values if type(values) is str else \
+                    [i["Identifier"] for i in values if i.get("IdentifierType") == target_type]
+        print(f"Translated {len(unique_identifiers) - len(misses)} identifiers locally, {len(misses)} remotely")
+        return {i: translations[i] for i in unique_identifiers}
+
     @staticmethod
     def search_futures_and_options(id_type=None, pref_identifier=None, identifier=None, strike_from=None,
                                    strike_to=None, expiry=None, underlying=None, currency_codes=None,
@@ -509,7 +845,7 @@ class Searches:
         """
         if futures_or_options not in ["Futures", "FuturesOnOptions", "Options"]:
             return "futures_or_option parameter accepts only values within: Futures, FuturesOnOptions, Options"
-        search_fo_request = json.loads(open(os.path.join(JSON_REQUESTS, "search_futures_and_options.json")).read())
+        search_fo_request = Codec.load_template("search_futures_and_options.json")
         url = DSS.get('endpoints').get('searches').get('search_future_options')
         search_fo_request["SearchRequest"]["FuturesAndOptionsType"] = futures_or_options
         search_fo_request["SearchRequest"]["AssetStatus"] = asset_status
@@ -540,12 +876,11 @@ class Searches:
         search_fo_request["SearchRequest"]["Identifier"] = identifier
         search_fo_request["SearchRequest"]["PreferredIdentifierType"] = pref_identifier
         search_fo_request["SearchRequest"]["UnderlyingRic"] = underlying
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=search_fo_request, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=search_fo_request)
         if response.status_code != 200:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        values = response.json()
+        values = Codec.loads(response.content)
         return values
 
     @staticmethod
@@ -569,7 +904,7 @@ class Searches:
         :return: A JSON valid response with all the results
         :rtype: dict or str or None
         """
-        search_equity = json.loads(open(os.path.join(JSON_REQUESTS, "search_equity.json")).read())
+        search_equity = Codec.load_template("search_equity.json")
         url = DSS.get('endpoints').get('searches').get('equity_search')
         search_equity["SearchRequest"]["CurrencyCodes"] = currency_codes.split(",") if currency_codes is not None \
             else None
@@ -587,12 +922,11 @@ class Searches:
         search_equity["SearchRequest"]["Identifier"] = identifier if identifier is not None else None
         search_equity["SearchRequest"]["IdentifierType"] = id_type if id_type is not None else None
         search_equity["SearchRequest"]["PreferredIdentifierType"] = pref_id_type if pref_id_type is not None else None
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=search_equity, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=search_equity)
         if response.status_code != 200:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        values = response.json()
+        values = Codec.loads(response.content)
         return values
 
     @staticmethod
@@ -619,7 +953,7 @@ class Searches:
         :return: a JSON with the list of the results (if any)
         :rtype: dict or str
         """
-        govcorp_search = json.loads(open(os.path.join(JSON_REQUESTS, "search_govcorp.json")).read())
+        govcorp_search = Codec.load_template("search_govcorp.json")
         url = DSS.get('endpoints').get('searches').get('govcorp_search')
         govcorp_search["SearchRequest"]["CurrencyCodes"] = currency_codes.split(",") if currency_codes else None
         govcorp_search["SearchRequest"]["CountryCode"] = country_code if country_code else None
@@ -639,12 +973,11 @@ class Searches:
         govcorp_search["SearchRequest"]["Callable"] = call
         govcorp_search["SearchRequest"]["Convertable"] = convertible
         govcorp_search["SearchRequest"]["Putable"] = put
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=govcorp_search, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=govcorp_search)
         if response.status_code != 200:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        values = response.json()
+        values = Codec.loads(response.content)
         return values
 
     @staticmethod
@@ -656,16 +989,15 @@ class Searches:
         :return: a JSON response with the results (if any)
         :rtype: dict or str
         """
-        search_otc = json.loads(open(os.path.join(JSON_REQUESTS, "search_otc_request.json")).read())
+        search_otc = Codec.load_template("search_otc_request.json")
         url = DSS.get('endpoints').get('searches').get('otc_search')
         search_otc["SearchRequest"]["IdentifierType"] = identifier_type
         search_otc["SearchRequest"]["Identifier"] = identifier
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=search_otc, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=search_otc)
         if response.status_code != 200:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        values = response.json()
+        values = Codec.loads(response.content)
         return values
 
     @staticmethod
@@ -689,7 +1021,7 @@ class Searches:
         :return: a JSON response with the results (if any)
         :rtype: dict or str
         """
-        search_mortgage = json.loads(open(os.path.join(JSON_REQUESTS, "search_mortgage.json")).read())
+        search_mortgage = Codec.load_template("search_mortgage.json")
         url = DSS.get('endpoints').get('searches').get('mortgage')
         search_mortgage["SearchRequest"]["IdentifierType"] = id_type
         search_mortgage["SearchRequest"]["PreferredIdentifierType"] = pref_id
@@ -708,12 +1040,11 @@ class Searches:
         search_mortgage["SearchRequest"]["PoolTypeCode"] = pool_type_code if pool_type_code else None
         search_mortgage["SearchRequest"]["SecurityGroup"] = sec_group if sec_group else None
         search_mortgage["SearchRequest"]["SettleMonth"] = settle_month if settle_month else None
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=search_mortgage, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=search_mortgage)
         if response.status_code != 200:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        values = response.json()
+        values = Codec.loads(response.content)
         return values
 
     @staticmethod
@@ -736,7 +1067,7 @@ class Searches:
         :return: a JSON with the results found or an error or informative string
         :rtype: dict or str
         """
-        search_muni = json.loads(open(os.path.join(JSON_REQUESTS, "search_us_municipal.json")).read())
+        search_muni = Codec.load_template("search_us_municipal.json")
         url = DSS.get('endpoints').get('searches').get('us_municipals')
         search_muni["SearchRequest"]["IdentifierType"] = id_type
         search_muni["SearchRequest"]["PreferredIdentifierType"] = pref_id
@@ -751,12 +1082,11 @@ class Searches:
         search_muni["SearchRequest"]["Putable"] = put
         search_muni["SearchRequest"]["Sinkable"] = sinkable
         search_muni["SearchRequest"]["StateCode"] = state_code
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=search_muni, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=search_muni)
         if response.status_code != 200:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        values = response.json()
+        values = Codec.loads(response.content)
         return values
 
     @staticmethod
@@ -782,7 +1112,7 @@ class Searches:
         :return: a JSON with the results found or an error or informative string
         :rtype: dict or str
         """
-        search_loan = json.loads(open(os.path.join(JSON_REQUESTS, "search_loan.json")).read())
+        search_loan = Codec.load_template("search_loan.json")
         url = DSS.get('endpoints').get('searches').get('loans')
         search_loan["SearchRequest"]["IdentifierType"] = id_type
         search_loan["SearchRequest"]["PreferredIdentifierType"] = pref_id
@@ -801,12 +1131,11 @@ class Searches:
         search_loan["SearchRequest"]["DomicileCodes"] = Utility.transform_in_list_of_elements(domicile_codes)
         search_loan["SearchRequest"]["CompanyName"] = company_name
         search_loan["SearchRequest"]["Ticker"] = ticker
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=search_loan, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=search_loan)
         if response.status_code != 200:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        values = response.json()
+        values = Codec.loads(response.content)
         return values
 
     @staticmethod
@@ -827,7 +1156,7 @@ class Searches:
         :return: a JSON with the results found or an error or informative string
         :rtype: dict or str
         """
-        search_abs_cmo = json.loads(open(os.path.join(JSON_REQUESTS, "search_abs_cmo.json")).read())
+        search_abs_cmo = Codec.load_template("search_abs_cmo.json")
         url = DSS.get('endpoints').get('searches').get('cmo_abs')
         security_group = security_group if security_group is not None else {
             "Agency": "true",
@@ -848,12 +1177,11 @@ class Searches:
         search_abs_cmo["SearchRequest"]["Series"] = series
         search_abs_cmo["SearchRequest"]["Tranche"] = tranche
         search_abs_cmo["SearchRequest"]["SecurityGroup"] = security_group
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=search_abs_cmo, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=search_abs_cmo)
         if response.status_code != 200:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        values = response.json()
+        values = Codec.loads(response.content)
         return values
 
 
@@ -869,48 +1197,97 @@ class GUIOperations:
         :return: A JSON response with the ListId and other parameters
         :rtype: dict or str
         """
-        username = DatashelfClass.dss.get('login').get('username')
+        username = Datashelf.current().username
         json_to_read = "gui_new_instrument_list.json" if not entity else "gui_new_entity_list.json"
-        create_instr_list = json.loads(open(os.path.join(JSON_REQUESTS, json_to_read)).read())
+        create_instr_list = Codec.load_template(json_to_read)
         create_instr_list["Name"] = name
         url = DSS.get('endpoints').get('gui').get('create_instrument_list') if not entity else \
             DSS.get('endpoints').get('gui').get('create_entity_list')
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=create_instr_list, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=create_instr_list)
         if response.status_code not in [200, 201]:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
         print(f"{name} list successfully created in GUI for account {username}")
-        return response.json()
+        return Codec.loads(response.content)
 
     @staticmethod
     def add_securities_to_instrument_list(list_of_securities, list_id, source=None, entity=False):
         """
         Add instruments to a existing list in GUI
-        :param list list_of_securities: List of tuples with pair (identifier, identifierType)
+        :param list or IdentifierBatch list_of_securities: List of tuples with pair (identifier, identifierType)
         :param str list_id: Hexadecimal Id representing the List to update
         :param str source: Parameter to pass sources to get prices and volumes. For all sources, pass "*"
         :param bool entity: if True, it will try to access the Entity endpoint
         :return: a JSON response with the securities added and other representative information
         :rtype: dict or str
         """
-        username = DatashelfClass.dss.get('login').get('username')
-        add_instr_list = json.loads(open(os.path.join(JSON_REQUESTS, "gui_add_securities_to_list.json")).read())
-        instr_identifiers = [{"Identifier": i[0], "IdentifierType": i[1], "Source": source} if not entity else
-                             {"Identifier": i[0], "IdentifierType": i[1]} for i in list_of_securities]
+        username = Datashelf.current().username
+        add_instr_list = Codec.load_template("gui_add_securities_to_list.json")
+        instr_identifiers = IdentifierBatch.request_identifiers(list_of_securities, Source=source) \
+            if not entity else IdentifierBatch.request_identifiers(list_of_securities)
         if entity:
             add_instr_list["IncludeParentAndUltimateParent"] = False
             add_instr_list["KeepDuplicates"] = False
         add_instr_list["Identifiers"] = instr_identifiers
         url = DSS.get('endpoints').get('gui').get('add_instruments_to_list') % list_id if not entity else \
             DSS.get('endpoints').get('gui').get('add_entity_to_list') % list_id
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=add_instr_list, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=add_instr_list)
         if response.status_code not in [200, 201]:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
         print(f"Securities added to ListId {list_id} for account {username}")
-        return response.json()
+        return Codec.loads(response.content)
+
+    @staticmethod
+    def add_securities_to_instrument_list_in_chunks(list_of_securities, list_id, chunk_size=10000, max_workers=4,
+                                                    retries=2, source=None, entity=False):
+        """
+        Add instruments to a existing list in GUI splitting them in chunks sent at the same time. Failed chunks are
+        retried and the validation results of all the chunks are merged in a single report
+        :param list or IdentifierBatch list_of_securities: List of tuples with pair (identifier, identifierType)
+        :param str list_id: Hexadecimal Id representing the List to update
+        :param int chunk_size: maximum number of identifiers sent in each call
+        :param int max_workers: maximum number of calls sent at the same time
+        :param int retries: number of times a failed chunk is sent again
+        :param str source: Parameter to pass sources to get prices and volumes. For all sources, pass "*"
+        :param bool entity: if True, it will try to access the Entity endpoint
+        :return: a dictionary with the number of submitted, valid, invalid and duplicate identifiers, the duplicates,
+        the validation messages and the chunks which failed after all the retries
+        :rtype: dict
+        """
+        chunks = list(Utility.split_list(list_of_securities, chunk_size))
+
+        def append(chunk):
+            outcome = None
+            for attempt in range(retries + 1):
+                try:
+                    outcome = GUIOperations.add_securities_to_instrument_list(chunk, list_id, source, entity)
+                except Exception as e:
+                    outcome = f"There was an error while getting the data: {repr(e)}"
+                if type(outcome) is not str:
+                    break
+                print(f"Chunk of {len(chunk)} securities failed (attempt {attempt + 1} of {retries + 1})")
+            return outcome
+
+        count_key = "ValidInstrumentCount" if not entity else "ValidEntityCount"
+        report = {"Submitted": len(list_of_securities), "ValidCount": 0, "InvalidCount": 0, "DuplicateCount": 0,
+                  "Duplicates": list(), "Messages": list(), "FailedChunks": list()}
+        for index, (chunk, outcome) in enumerate(zip(chunks, Utility.run_concurrently(append, chunks, max_workers))):
+            if type(outcome) is str:
+                report["FailedChunks"].append({"Chunk": index, "Size": len(chunk), "Error": outcome})
+                continue
+            validation = outcome.get("ValidationResult", dict())
+            duplicates = validation.get("ValidationDuplicates") or list()
+            valid = validation.get(count_key, 0)
+            report["ValidCount"] += valid
+            report["DuplicateCount"] += len(duplicates)
+            report["InvalidCount"] += max(len(chunk) - valid - len(duplicates), 0)
+            report["Duplicates"].extend(duplicates)
+            report["Messages"].extend(validation.get("Messages") or list())
+        print(f"{report['ValidCount']} valid, {report['InvalidCount']} invalid and {report['DuplicateCount']} "
+              f"duplicate securities added to ListId {list_id} in {len(chunks)} chunks, "
+              f"{len(report['FailedChunks'])} failed")
+        return report
 
     @staticmethod
     def create_template(template, fields, name, exchanges=None, events=None,
@@ -935,8 +1312,8 @@ class GUIOperations:
             return "Template MUST be one of the following templates: EndOfDayPricingReportTemplate\n" \
                    "TermsAndConditionsReportTemplate\nCorporateActionsStandardReportTemplate\n" \
                    "CorporateActionsIpoReportTemplate\nCorporateActionsIsoReportTemplate\nPriceHistoryReportTemplate\n"
-        username = DatashelfClass.dss.get('login').get('username')
-        create_template = json.loads(open(os.path.join(JSON_REQUESTS, "gui_create_template.json")).read())
+        username = Datashelf.current().username
+        create_template = Codec.load_template("gui_create_template.json")
         formatted_fields = [{"FieldName": i, "Format": None} for i in fields]
         create_template["ContentFields"] = formatted_fields
         create_template["@odata.type"] = create_template["@odata.type"] % template
@@ -981,13 +1358,12 @@ class GUIOperations:
             create_template["Condition"]["QueryEndDate"] = str(parser.parse(end_date).isoformat()) + "Z" if end_date \
                 else str(datetime.now().isoformat()) + "Z"
         url = DSS.get('endpoints').get('gui').get('create_template') % template + "s"
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=create_template, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=create_template)
         if response.status_code not in [200, 201]:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
         print(f"{template} successfully created for account {username} under name {name}")
-        return response.json()
+        return Codec.loads(response.content)
 
     @staticmethod
     def schedule_immediate_extraction(name, list_id, report_id):
@@ -999,48 +1375,77 @@ class GUIOperations:
         :return: A JSON response with the information on the extraction
         :rtype: dict or str
         """
-        username = DatashelfClass.dss.get('login').get('username')
-        imm_extr = json.loads(open(os.path.join(JSON_REQUESTS, "gui_immediate_schedule.json")).read())
+        username = Datashelf.current().username
+        imm_extr = Codec.load_template("gui_immediate_schedule.json")
         url = DSS.get('endpoints').get('gui').get('schedules')
         imm_extr["Name"] = name
         imm_extr["ListId"] = list_id
         imm_extr["ReportTemplateId"] = report_id
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers,
-                                 json=imm_extr, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=imm_extr)
         if response.status_code not in [200, 201]:
             return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
         print(f"Extraction {name} scheduled for list_id {list_id} and report_id {report_id} for account {username}")
-        return response.json()
+        return Codec.loads(response.content)
+
+    @staticmethod
+    def schedule_recurring_extraction(name, list_id, report_id, recurrence="daily", at="00:00", days=None,
+                                      trigger="time", limit_to_todays_data=False, time_zone=None):
+        """
+        Schedule a recurring extraction given a list_id and a report_id
+        :param str name: Name of the schedule
+        :param str list_id: Hexadecimal value with the id of the instrument list
+        :param str report_id: Hexadecimal value with the id of the report
+        :param str recurrence: "daily" or "weekly"
+        :param str or list at: time or list of times of the day ("HH:MM") of a time trigger
+        :param list days: days of the week of a weekly recurrence, e.g. ["Monday", "Thursday"]
+        :param str trigger: "time", to run at the given times, or "data_available", to run as soon as the data of the
+        instruments is available
+        :param bool limit_to_todays_data: if True, the extraction includes only the data of the day
+        :param str time_zone: time zone of the times, e.g. "Eastern Standard Time". Default: the one of the account
+        :return: A JSON response with the information on the schedule
+        :rtype: dict or str
+        """
+        username = Datashelf.current().username
+        schedule = ScheduleManager.definition(name, list_id, report_id, recurrence, at, days, trigger,
+                                              limit_to_todays_data, time_zone)
+        url = DSS.get('endpoints').get('gui').get('schedules')
+        response = Transport.post(url, json=schedule)
+        if response.status_code not in [200, 201]:
+            return f"There was an error while getting the data. Error Code: {str(response.status_code)}: " \
+                   f"{str(response.content)}"
+        print(f"Recurring extraction {name} scheduled {recurrence} for list_id {list_id} and report_id {report_id} "
+              f"for account {username}")
+        return Codec.loads(response.content)
 
     @staticmethod
-    def check_scheduled_extraction(schedule_id):
+    def check_scheduled_extraction(schedule_id, interval=30):
         """
         Check the scheduled extraction given a schedule_id
         :param str schedule_id: Hexadecimal identifier of the schedule
+        :param int interval: number of seconds to wait between two attempts
         :return: a JSON response with the result of the schedule
         :rtype: dict or str
         """
         url = DSS.get('endpoints').get('gui').get('check_extraction') % schedule_id
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
-        if not response.json()["value"]:
+        response = Transport.get(url)
+        if not Codec.loads(response.content)["value"]:
             attempt = 1
             flag = True
             print("\nExtraction is not completed yet. The script will try until it will be reported as complete.")
             while flag:
-                response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy,
-                                        verify=False)
-                if not response.json()["value"]:
+                response = Transport.get(url)
+                if not Codec.loads(response.content)["value"]:
                     print(f"\tAttempt {attempt} - Extraction {schedule_id} not completed yet. "
-                          f"Retrying again in 30 seconds.")
+                          f"Retrying again in {interval} seconds.")
                     attempt += 1
-                    time.sleep(30)
+                    time.sleep(interval)
                 else:
                     break
         if response.status_code != 200:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        return response.json()
+        return Codec.loads(response.content)
 
     @staticmethod
     def get_extraction_report(report_extr_id):
@@ -1051,26 +1456,44 @@ class GUIOperations:
         :rtype: dict or str
         """
         url = DSS.get('endpoints').get('gui').get('extraction_report') % report_extr_id
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.get(url)
         if response.status_code != 200:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        return response.json()["value"]
+        return Codec.loads(response.content)["value"]
 
     @staticmethod
-    def get_extracted_data_or_notes(file_id):
+    def get_extracted_data_or_notes(file_id, filename=None, direct_download=True, chunk_size=1024 * 1024):
         """
-        Get the data from a completed extraction. Data can be either notes or data
+        Get the data from a completed extraction. Data can be either notes or data.
+        The file is requested gzip-compressed and, when direct_download is True, DSS redirects the download to its
+        storage host: the redirect is followed without forwarding the DSS headers (and the Authorization token)
         :param str file_id: filename of the extracted data
-        :return: a string content with the extraction results
+        :param str filename: if passed, the file is decompressed and written on disk chunk by chunk
+        :param bool direct_download: if True, ask DSS to redirect the download to the storage host
+        :param int chunk_size: number of bytes written on disk at each iteration
+        :return: a string content with the extraction results or the name of the file written on disk
         :rtype: str or bytes
         """
         url = DSS.get('endpoints').get('gui').get('data_and_notes_extraction') % file_id
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        headers = dict(Datashelf.current().dss_headers)
+        headers["Accept-Encoding"] = "gzip"
+        if direct_download:
+            headers["X-Direct-Download"] = "true"
+        response = Transport.get(url, headers=headers, stream=True, allow_redirects=False)
+        if response.status_code in [301, 302, 303, 307, 308]:
+            location = response.headers["Location"]
+            response.close()
+            response = Transport.get(location, headers={"Accept-Encoding": "gzip"}, stream=True)
         if response.status_code != 200:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
-        return response.content
+        if filename is None:
+            return response.content
+        with open(filename, 'wb') as w:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                w.write(chunk)
+        return filename
 
     @staticmethod
     def delete_extraction_schedule(schedule_id):
@@ -1081,8 +1504,7 @@ class GUIOperations:
         :rtype: str or bytes
         """
         url = DSS.get('endpoints').get('gui').get('delete_schedule') % schedule_id
-        response = requests.delete(url=url, headers=DatashelfClass.dss_headers,
-                                   proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.delete(url)
         if response.status_code not in [200, 204]:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
@@ -1097,8 +1519,7 @@ class GUIOperations:
         :rtype: str or bytes
         """
         url = DSS.get('endpoints').get('gui').get('delete_template') % template_id
-        response = requests.delete(url=url, headers=DatashelfClass.dss_headers,
-                                   proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.delete(url)
         if response.status_code not in [200, 204]:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
@@ -1115,8 +1536,29 @@ class GUIOperations:
         """
         url = DSS.get('endpoints').get('gui').get('delete_instrument_list') % instr_id if not entity else \
             DSS.get('endpoints').get('gui').get('delete_entity_list') % instr_id
-        response = requests.delete(url=url, headers=DatashelfClass.dss_headers,
-                                   proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.delete(url)
+        if response.status_code not in [200, 204]:
+            return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
+                   f"{str(response.content)}"
+        return response.content
+
+    @staticmethod
+    def rename_instrument_list(instr_id, name, entity=False):
+        """
+        Rename an instrument list
+        :param str instr_id: Hexadecimal identifier of the instrument list
+        :param str name: new name of the list
+        :param bool entity: if True, it will try to access the Entity endpoint
+        :return: the content of the response or a message of error, e.g. if another list has the same name
+        :rtype: str or bytes
+        """
+        json_to_read = "gui_new_instrument_list.json" if not entity else "gui_new_entity_list.json"
+        rename_list = Codec.load_template(json_to_read)
+        rename_list["ListId"] = instr_id
+        rename_list["Name"] = name
+        url = DSS.get('endpoints').get('gui').get('rename_instrument_list') % instr_id if not entity else \
+            DSS.get('endpoints').get('gui').get('rename_entity_list') % instr_id
+        response = Transport.put(url, json=rename_list)
         if response.status_code not in [200, 204]:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
@@ -1132,10 +1574,9 @@ class GUIOperations:
         :rtype: str or dict
         """
         url = DSS.get('endpoints').get('gui').get('add_content') % report_id
-        modify_template = json.loads(open(os.path.join(JSON_REQUESTS, "modify_template.json")).read())
+        modify_template = Codec.load_template("modify_template.json")
         modify_template["ContentField"]["FieldName"] = name_of_the_field
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers, json=modify_template,
-                                 proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=modify_template)
         if response.status_code not in [200, 204]:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
@@ -1151,10 +1592,9 @@ class GUIOperations:
         :rtype: str or dict
         """
         url = DSS.get('endpoints').get('gui').get('remove_content') % report_id
-        modify_template = json.loads(open(os.path.join(JSON_REQUESTS, "modify_template.json")).read())
+        modify_template = Codec.load_template("modify_template.json")
         modify_template["ContentField"]["FieldName"] = name_of_the_field
-        response = requests.post(url=url, headers=DatashelfClass.dss_headers, json=modify_template,
-                                 proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.post(url, json=modify_template)
         if response.status_code not in [200, 204]:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
@@ -1170,7 +1610,7 @@ class GUIOperations:
         """
         url = DSS.get('endpoints').get('gui').get('get_all_instruments') % list_id if not entity else \
             DSS.get('endpoints').get('gui').get('get_all_entities') % list_id
-        response = requests.get(url=url, headers=DatashelfClass.dss_headers, proxies=DatashelfClass.proxy, verify=False)
+        response = Transport.get(url)
         if response.status_code not in [200, 204]:
             return f"There was an error while processing this request. Error Code: {str(response.status_code)}: " \
                    f"{str(response.content)}"
@@ -1181,7 +1621,7 @@ class Operations:
     """This class includes all the most common operations performed with DSS"""
 
     @staticmethod
-    def create_list_template_extract_data(securities, template_type, fields, start_date=None):
+    def create_list_template_extract_data(securities, template_type, fields, start_date=None, reuse=False):
         """
         Compound operation to create an instrument list, add securities to it,
         create a template with the specified fields and run an extraction
@@ -1189,27 +1629,44 @@ class Operations:
         :param str template_type: template name
         :param list fields: list of fields to be included in the template
         :param str start_date: optional field that may be passed in input when creating PriceHistory templates
+        :param bool reuse: if True, reuse the list and the template already created for the same content
         :return: a JSON with the details of the extraction
         :rtype: dict
         """
         now = re.sub(r":", "", str(datetime.now().isoformat()))
         formatted_securities = Utility.format_identifiers(securities)
-        list_id = GUIOperations.create_instrument_list(now + "_api_client_automatically_created_list")["ListId"]
-        print(f"Instrument list successfully created with Id {list_id}")
-        add_securities_to_instrument_list = GUIOperations.add_securities_to_instrument_list(formatted_securities,
-                                                                                            list_id)
-        print(f"Successfully added securities to the instrument list. "
-              f"Showing the first 10 securities added: {formatted_securities[:10]}")
-        pprint(add_securities_to_instrument_list)
-        template_name = now + "_api_client_" + template_type + "_automatically_created"
-        if template_type == "PriceHistoryReportTemplate" and start_date:
-            template_id = GUIOperations.create_template(template_type, fields,
-                                                        template_name, start_date=start_date)["ReportTemplateId"]
+        if reuse:
+            with Tracing.stage("create_list"):
+                list_id = ReusableObjects.get_or_create_instrument_list(formatted_securities)
+                Tracing.add_rows(len(formatted_securities))
+            print(f"Instrument list with {len(formatted_securities)} securities ready with Id {list_id}")
         else:
-            template_id = GUIOperations.create_template(template_type, fields, template_name)["ReportTemplateId"]
-        print(f"Template successfully created with Id {template_id}")
+            with Tracing.stage("create_list"):
+                list_id = GUIOperations.create_instrument_list(now + "_api_client_automatically_created_list")[
+                    "ListId"]
+            print(f"Instrument list successfully created with Id {list_id}")
+            with Tracing.stage("append_securities"):
+                add_securities_to_instrument_list = GUIOperations.add_securities_to_instrument_list_in_chunks(
+                    formatted_securities, list_id)
+                Tracing.add_rows(len(formatted_securities))
+            print(f"Successfully added securities to the instrument list. "
+                  f"Showing the first 10 securities added: {formatted_securities[:10]}")
+            pprint(add_securities_to_instrument_list)
+        template_name = now + "_api_client_" + template_type + "_automatically_created"
+        with Tracing.stage("create_template"):
+            if reuse:
+                template_id = ReusableObjects.get_or_create_template(
+                    template_type, fields,
+                    start_date=start_date if template_type == "PriceHistoryReportTemplate" else None)
+            elif template_type == "PriceHistoryReportTemplate" and start_date:
+                template_id = GUIOperations.create_template(template_type, fields,
+                                                            template_name, start_date=start_date)["ReportTemplateId"]
+            else:
+                template_id = GUIOperations.create_template(template_type, fields, template_name)["ReportTemplateId"]
+        print(f"Template ready with Id {template_id}")
         extraction_name = now + "_api_client_immediate_extraction"
-        run_extraction = GUIOperations.schedule_immediate_extraction(extraction_name, list_id, template_id)
+        with Tracing.stage("schedule"):
+            run_extraction = GUIOperations.schedule_immediate_extraction(extraction_name, list_id, template_id)
         print(f"Immediate extraction successfully ran:")
         pprint(run_extraction)
         return run_extraction
@@ -1228,8 +1685,8 @@ class Operations:
         formatted_securities = Utility.format_identifiers(securities)
         list_id = GUIOperations.create_instrument_list(now + "_api_client_automatically_created_list")["ListId"]
         print(f"Instrument list successfully created with Id {list_id}")
-        add_securities_to_instrument_list = GUIOperations.add_securities_to_instrument_list(formatted_securities,
-                                                                                            list_id)
+        add_securities_to_instrument_list = GUIOperations.add_securities_to_instrument_list_in_chunks(
+            formatted_securities, list_id)
         print(f"Successfully added securities to the instrument list. "
               f"Showing the first 10 securities added: {formatted_securities[:10]}")
         pprint(add_securities_to_instrument_list)
@@ -1270,44 +1727,353 @@ class Operations:
         return run_extraction
 
     @staticmethod
-    def download_extraction_in_dataframe(report_extraction_id):
+    def download_extraction_file(report_extraction_id):
         """
-        Download and eventually unzips locally the file from an extraction
+        Download and eventually unzips locally the data file of an extraction
         :param str report_extraction_id: extraction ID to be used to download the file
-        :return: a DataFrame with the parsed CSV file
-        :rtype: pandas.DataFrame
+        :return: the name of the CSV file written on disk or a message of error
+        :rtype: str
         """
-        extraction_response = GUIOperations.get_extraction_report(report_extraction_id)
+        with Tracing.stage("file_lookup"):
+            extraction_response = GUIOperations.get_extraction_report(report_extraction_id)
         filename = extraction_response[0]["ExtractedFileName"]
         file_id = extraction_response[0]["ExtractedFileId"]
-        file_in_bytes = GUIOperations.get_extracted_data_or_notes(file_id)
-        with open(filename, 'wb') as w:
-            w.write(file_in_bytes)
-        if filename.split(".")[-1] == "csv":
-            return Utility.read_csv(filename)
-        with zipfile.ZipFile(filename, 'r') as zip_ref:
-            zip_filename = zip_ref.filename
-            zipped_file = zip_ref.namelist()[0]
-            zip_ref.extract(zipped_file)
-        os.remove(zip_filename)
-        return Utility.read_csv(zipped_file)
+        with Tracing.stage("download"):
+            downloaded_file = GUIOperations.get_extracted_data_or_notes(file_id, filename=filename)
+            if downloaded_file != filename:
+                return downloaded_file
+            Tracing.annotate(file_size=os.path.getsize(filename))
+        if filename.split(".")[-1] == "gz" and not Utility.is_gzip_file(filename):
+            # The gzip transfer encoding has already been decoded while streaming the file on disk
+            os.replace(filename, filename[:-3])
+            filename = filename[:-3]
+        if filename.split(".")[-1] not in ["csv", "gz"]:
+            with zipfile.ZipFile(filename, 'r') as zip_ref:
+                zip_filename = zip_ref.filename
+                filename = zip_ref.namelist()[0]
+                zip_ref.extract(filename)
+            os.remove(zip_filename)
+        return filename
 
     @staticmethod
-    def download_data_end_to_end(securities, template_type, fields, start_date=None):
+    def download_extraction_in_dataframe(report_extraction_id, parallel=False, processes=None, sink=None,
+                                         memory_limit=None, chunk_rows=100000):
+        """
+        Download and eventually unzips locally the file from an extraction
+        :param str report_extraction_id: extraction ID to be used to download the file
+        :param bool parallel: if True, parse the CSV file splitting it in ranges parsed by a pool of processes
+        :param int processes: number of processes used when parallel is True. Default: number of CPUs
+        :param sink: optional sink from RefinitivAPIClient.sinks where to write the data instead of returning it. When
+        parallel is True, a ParquetSink gets one part file per range written directly by the processes
+        :param int memory_limit: if given, parse the file in chunks of chunk_rows rows collected in a ResultBuffer which
+        keeps up to memory_limit bytes in memory and spills the rest to disk. Ignored when parallel is True
+        :param int chunk_rows: number of rows of each chunk when memory_limit is given
+        :return: a DataFrame with the parsed CSV file, a ResultBuffer, the output of the sink or a message of error
+        :rtype: pandas.DataFrame or ResultBuffer or str
+        """
+        filename = Operations.download_extraction_file(report_extraction_id)
+        if not os.path.isfile(filename):
+            return filename
+        with Tracing.stage("parse", parallel=parallel):
+            if parallel:
+                dataframe = Utility.read_csv_in_parallel(filename, processes, sink)
+                if sink is not None:
+                    return dataframe
+            elif memory_limit is not None:
+                dataframe = ResultBuffer(memory_limit, chunk_rows)
+                for chunk in Utility.read_csv(filename, chunksize=chunk_rows):
+                    CrossReferenceClass.learn_from_extraction(chunk)
+                    dataframe.append_frame(chunk)
+            else:
+                dataframe = Utility.read_csv(filename)
+            Tracing.add_rows(len(dataframe))
+            if memory_limit is None or parallel:
+                CrossReferenceClass.learn_from_extraction(dataframe)
+        if sink is not None:
+            with Tracing.stage("sink"):
+                for chunk in dataframe.iter_frames() if isinstance(dataframe, ResultBuffer) else [dataframe]:
+                    sink.write(chunk)
+                return sink.close()
+        return dataframe
+
+    @staticmethod
+    def download_data_end_to_end(securities, template_type, fields, start_date=None, with_trace=False,
+                                 trace_exporter=None, reuse=False):
         """
         Replicates the whole process from the creation of a temporary list, to the template till the extraction in a DF
         :param list or str securities: list or comma separated string of all the securities to pull up
         :param str template_type: template name
         :param list fields: list of fields to be included in the template
         :param str start_date: optional field that may be passed in input when creating PriceHistory templates
-        :return: a DataFrame or a message of error
+        :param bool with_trace: if True, return the Trace with the wall time, bytes and rows of each stage as well
+        :param callable or str trace_exporter: callback or JSON lines file where to export the trace of the run
+        :param bool reuse: if True, reuse the list and the template already created for the same content
+        :return: a DataFrame or a message of error, along with the Trace of the run if with_trace is True
+        :rtype: pandas.DataFrame or str or tuple
+        """
+        trace = Trace("download_data_end_to_end")
+        with trace.activate():
+            response_obj = Operations.create_list_template_extract_data(securities, template_type, fields, start_date,
+                                                                        reuse)
+            schedule_id = response_obj["ScheduleId"]
+            with Tracing.stage("poll"):
+                report_id = GUIOperations.check_scheduled_extraction(schedule_id)["value"][0]["ReportExtractionId"]
+            downloaded_file = Operations.download_extraction_in_dataframe(report_id)
+        if trace_exporter is not None:
+            trace.export(trace_exporter)
+        if with_trace:
+            return downloaded_file, trace
+        return downloaded_file
+
+    @staticmethod
+    def download_multiple_templates_end_to_end(securities, templates, sinks=None, max_workers=None, interval=30,
+                                               with_trace=False, trace_exporter=None, reuse=False):
+        """
+        Create and populate one instrument list, then create, schedule, wait and download all the templates at the
+        same time over that list. The wall time is roughly the one of the slowest extraction
+        :param list or str securities: list or comma separated string of all the securities to pull up
+        :param list templates: list of dictionaries with keys template_type, fields and optionally start_date and
+        name (the key of the template in the results, template_type by default)
+        :param dict sinks: optional dictionary with the name of the template as key and a sink as value. The data of
+        those templates is written in the sink and the output of the sink is returned instead of the DataFrame
+        :param int max_workers: maximum number of templates processed at the same time
+        :param int interval: number of seconds to wait between two checks of each schedule
+        :param bool with_trace: if True, return the Trace with the wall time, bytes and rows of each stage as well
+        :param callable or str trace_exporter: callback or JSON lines file where to export the trace of the run
+        :param bool reuse: if True, reuse the list and the templates already created for the same content
+        :return: a dictionary with the name of the template as key and a DataFrame or the sink output as value,
+        along with the Trace of the run if with_trace is True
+        :rtype: dict or tuple
+        """
+        sinks = sinks if sinks is not None else dict()
+        trace = Trace("download_multiple_templates_end_to_end")
+        with trace.activate():
+            now = re.sub(r":", "", str(datetime.now().isoformat()))
+            formatted_securities = Utility.format_identifiers(securities)
+            if reuse:
+                with Tracing.stage("create_list"):
+                    list_id = ReusableObjects.get_or_create_instrument_list(formatted_securities)
+                    Tracing.add_rows(len(formatted_securities))
+            else:
+                with Tracing.stage("create_list"):
+                    list_id = GUIOperations.create_instrument_list(now + "_api_client_automatically_created_list")[
+                        "ListId"]
+                with Tracing.stage("append_securities"):
+                    GUIOperations.add_securities_to_instrument_list_in_chunks(formatted_securities, list_id)
+                    Tracing.add_rows(len(formatted_securities))
+            print(f"Instrument list with {len(formatted_securities)} securities ready with Id {list_id}")
+
+            def extract(template):
+                template_type = template["template_type"]
+                name = template.get("name", template_type)
+                with Tracing.stage(name, template_type=template_type):
+                    template_name = now + "_api_client_" + name + "_automatically_created"
+                    with Tracing.stage("create_template"):
+                        if reuse:
+                            template_id = ReusableObjects.get_or_create_template(
+                                template_type, template["fields"], start_date=template.get("start_date"))
+                        else:
+                            template_id = GUIOperations.create_template(
+                                template_type, template["fields"], template_name,
+                                start_date=template.get("start_date") or "20190101")["ReportTemplateId"]
+                    with Tracing.stage("schedule"):
+                        schedule_id = GUIOperations.schedule_immediate_extraction(
+                            now + "_api_client_" + name + "_immediate_extraction", list_id, template_id)["ScheduleId"]
+                    with Tracing.stage("poll"):
+                        report_id = GUIOperations.check_scheduled_extraction(schedule_id, interval)["value"][0][
+                            "ReportExtractionId"]
+                    dataframe = Operations.download_extraction_in_dataframe(report_id)
+                    if name not in sinks or type(dataframe) is str:
+                        return name, dataframe
+                    with Tracing.stage("sink"):
+                        sinks[name].write(dataframe)
+                        return name, sinks[name].close()
+
+            results = dict(Utility.run_concurrently(extract, templates, max_workers))
+        if trace_exporter is not None:
+            trace.export(trace_exporter)
+        if with_trace:
+            return results, trace
+        return results
+
+    @staticmethod
+    def extract_in_pipeline(securities, template_type, fields, sink, start_date=None, batch_size=10000,
+                            extract_workers=2, download_workers=2, parse_workers=1, sink_workers=1, queue_size=2,
+                            interval=30, reuse=False, skip_batches=None, on_batch=None, end_date=None):
+        """
+        Extract the securities in batches through a pipeline whose stages overlap: while a batch is downloaded, the
+        next one is extracted and the previous one is written in the sink. The batches waiting between two stages
+        are at most queue_size, so the memory used doesn't depend on the number of securities
+        :param list or str or iterable securities: list or comma separated string of all the securities to pull up, or
+        an iterable (e.g. a generator reading a file) of tuples with pair (identifier, identifierType)
+        :param str template_type: template name
+        :param list fields: list of fields to be included in the template
+        :param sink: sink from RefinitivAPIClient.sinks where to write the data of each batch
+        :param str start_date: optional field that may be passed in input when creating PriceHistory templates
+        :param int batch_size: number of securities extracted at once
+        :param int extract_workers: number of batches extracted at the same time
+        :param int download_workers: number of files downloaded at the same time
+        :param int parse_workers: number of files parsed at the same time
+        :param int sink_workers: number of DataFrames written at the same time. Sinks writing files need 1
+        :param int queue_size: maximum number of batches waiting between two stages
+        :param int interval: number of seconds to wait between two checks of each schedule
+        :param bool reuse: if True, reuse the lists and the template already created for the same content
+        :param set skip_batches: numbers of the batches not to extract, e.g. the ones written by an interrupted run
+        :param callable on_batch: function called with the number of the batch, its number of securities and its
+        number of rows after each batch is written in the sink
+        :param str end_date: optional field that may be passed in input when creating PriceHistory templates
+        :return: a dictionary with the output of the sink, the statistics of each stage and the batches whose list,
+        extraction or download failed
+        :rtype: dict
+        """
+        if type(securities) is str or (type(securities) is list and securities and type(securities[0]) is str):
+            securities = Utility.format_identifiers(securities)
+        now = re.sub(r":", "", str(datetime.now().isoformat()))
+        start_date = start_date if template_type == "PriceHistoryReportTemplate" else None
+        end_date = end_date if template_type == "PriceHistoryReportTemplate" else None
+        with Tracing.stage("create_template"):
+            if reuse:
+                template_id = ReusableObjects.get_or_create_template(template_type, fields, start_date=start_date,
+                                                                     end_date=end_date)
+            else:
+                template_id = GUIOperations.create_template(
+                    template_type, fields, now + "_api_client_" + template_type + "_automatically_created",
+                    start_date=start_date or "20190101", end_date=end_date)["ReportTemplateId"]
+        print(f"Template ready with Id {template_id}")
+        skip_batches = skip_batches if skip_batches is not None else set()
+        batch_numbers = itertools.count()
+        failed = list()
+
+        def clean(schedule_id, list_id):
+            # The schedule and the list of a batch aren't needed anymore once its file has been downloaded
+            if schedule_id is not None:
+                GUIOperations.delete_extraction_schedule(schedule_id)
+            if list_id is not None and not reuse:
+                GUIOperations.delete_instrument_list(list_id)
+
+        def extract(numbered_batch):
+            number, batch = numbered_batch
+            if number in skip_batches:
+                return None
+            name = f"{now}_api_client_pipeline_{number}"
+            list_id = schedule_id = None
+            try:
+                if reuse:
+                    list_id = ReusableObjects.get_or_create_instrument_list(batch)
+                else:
+                    # Named like the other automatic lists, so that collect_garbage finds it if the run dies
+                    created = GUIOperations.create_instrument_list(
+                        f"{now}_pipeline_{number}_api_client_automatically_created_list")
+                    if type(created) is str:
+                        raise RuntimeError(created)
+                    list_id = created["ListId"]
+                    appended = GUIOperations.add_securities_to_instrument_list_in_chunks(batch, list_id)
+                    if appended["FailedChunks"]:
+                        raise RuntimeError(appended["FailedChunks"][0]["Error"])
+                Tracing.add_rows(len(batch))
+                schedule = GUIOperations.schedule_immediate_extraction(name + "_immediate_extraction", list_id,
+                                                                       template_id)
+                if type(schedule) is str:
+                    raise RuntimeError(schedule)
+                schedule_id = schedule["ScheduleId"]
+                report = GUIOperations.check_scheduled_extraction(schedule_id, interval)
+                if type(report) is str:
+                    raise RuntimeError(report)
+                return number, batch, report["value"][0]["ReportExtractionId"], schedule_id, list_id
+            except Exception as e:
+                print(f"Batch {name} failed: {e}")
+                failed.append(batch)
+                clean(schedule_id, list_id)
+                return None
+
+        def download(extraction):
+            number, batch, report_id, schedule_id, list_id = extraction
+            try:
+                filename = Operations.download_extraction_file(report_id)
+            except Exception as e:
+                filename = f"There was an error while downloading the file: {repr(e)}"
+            finally:
+                clean(schedule_id, list_id)
+            if not os.path.isfile(filename):
+                print(f"Extraction {report_id} could not be downloaded: {filename}")
+                failed.append(batch)
+                return None
+            return number, len(batch), filename
+
+        def parse(downloaded):
+            number, size, filename = downloaded
+            dataframe = Utility.read_csv(filename)
+            os.remove(filename)
+            Tracing.add_rows(len(dataframe))
+            CrossReferenceClass.learn_from_extraction(dataframe)
+            return number, size, dataframe
+
+        def write(parsed):
+            number, size, dataframe = parsed
+            sink.write(dataframe)
+            if on_batch is not None:
+                on_batch(number, size, len(dataframe))
+
+        pipeline = Pipeline(securities, queue_size)
+        pipeline.batch(batch_size)
+        pipeline.stage("number", lambda batch: (next(batch_numbers), batch))
+        pipeline.stage("extract", extract, extract_workers)
+        pipeline.stage("download", download, download_workers)
+        pipeline.stage("parse", parse, parse_workers)
+        pipeline.stage("sink", write, sink_workers)
+        statistics = pipeline.run()
+        print(f"Pipeline completed in {statistics['wall_seconds']:.1f} seconds: "
+              f"{statistics['sink']['items_in']} batches written, {len(failed)} failed")
+        return {"output": sink.close(), "statistics": statistics, "failed_batches": failed}
+
+    @staticmethod
+    def extract(securities, template_type, fields, start_date=None, end_date=None, sink=None, route=None,
+                router=ExtractionRouterClass, condition=None):
+        """
+        Extract the securities through the fastest path for the size of the request: ExtractWithNotes for the small
+        ones, which are answered with the lowest latency, and scheduled extractions downloaded as files for the large
+        ones, which have the highest throughput. The decision is recorded in the metrics
+        :param list or str or IdentifierBatch securities: list or comma separated string of all the securities to pull
+        up, or list of tuples with pair (identifier, identifierType)
+        :param str template_type: template name
+        :param list or str fields: list or comma separated string of the fields to extract
+        :param str start_date: start of the PriceHistoryReportTemplate. Default: 1440 days ago
+        :param str end_date: end of the PriceHistoryReportTemplate. Default: today
+        :param sink: optional sink from RefinitivAPIClient.sinks where to write the data instead of returning it
+        :param str route: "on_demand" or "scheduled" to skip the estimate
+        :param ExtractionRouter router: router with the thresholds to use
+        :param dict condition: Condition of the on-demand extraction. Default: the one the scheduled route gives to
+        the template (ExtractionRouter.default_condition). The templates needing a Condition which have no default
+        one are extracted through the scheduled route unless a condition is given
+        :return: a DataFrame, the output of the sink or a message of error
         :rtype: pandas.DataFrame or str
         """
-        response_obj = Operations.create_list_template_extract_data(securities, template_type, fields, start_date)
-        schedule_id = response_obj["ScheduleId"]
-        report_id = GUIOperations.check_scheduled_extraction(schedule_id)["value"][0]["ReportExtractionId"]
-        downloaded_file = Operations.download_extraction_in_dataframe(report_id)
-        return downloaded_file
+        if type(securities) is str or (type(securities) is list and securities and type(securities[0]) is str):
+            securities = Utility.format_identifiers(securities)
+        fields = Utility.transform_in_list_of_elements(fields)
+        start_date = ExtractionRouter.default_start_date(template_type, start_date)
+        end_date = end_date if template_type == "PriceHistoryReportTemplate" else None
+        if condition is None:
+            condition = ExtractionRouter.default_condition(template_type, start_date, end_date)
+        if condition is None and template_type not in UNCONDITIONED_TEMPLATES and route is None:
+            route = SCHEDULED
+        route = router.route(len(securities), template_type, fields, start_date, end_date, force=route)
+        with Tracing.stage("extract", route=route):
+            if route != ON_DEMAND:
+                return Operations.extract_in_pipeline(securities, template_type, fields,
+                                                      sink if sink is not None else DataFrameSink(),
+                                                      start_date=start_date, end_date=end_date,
+                                                      batch_size=router.scheduled_batch_size)["output"]
+            contents = Requests.request_extraction(securities, template_type, fields, condition)
+            if type(contents) is str:
+                return contents
+            dataframe = Utility.to_pandas(contents)
+            Tracing.add_rows(len(dataframe))
+            CrossReferenceClass.learn_from_extraction(dataframe)
+        if sink is not None:
+            sink.write(dataframe)
+            return sink.close()
+        return dataframe
 
     @staticmethod
     def upload_results_to_db(dataframe, table_name="RefinitivResults", db_conn=None):
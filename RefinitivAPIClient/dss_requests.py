@@ -2,7 +2,7 @@
 
 import os
 
-ENDPOINT = "https://hosted.datascopeapi.reuters.com/RestApi/v1/"
+ENDPOINT = os.environ.get("REFINITIV_DSS_ENDPOINT", "https://hosted.datascopeapi.reuters.com/RestApi/v1/")
 
 JSON_REQUESTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "json_requests")
 
@@ -68,6 +68,8 @@ DSS = {
             'delete_template': f"{ENDPOINT}Extractions/ReportTemplates('%s')",
             'delete_instrument_list': f"{ENDPOINT}Extractions/InstrumentLists('%s')",
             'delete_entity_list': f"{ENDPOINT}Extractions/EntityLists('%s')",
+            'rename_instrument_list': f"{ENDPOINT}Extractions/InstrumentLists('%s')",
+            'rename_entity_list': f"{ENDPOINT}Extractions/EntityLists('%s')",
             'add_content': f"{ENDPOINT}Extractions/ReportTemplates('%s')/ThomsonReuters.Dss.Api.Extractions."
                            f"ReportTemplateAddContentField",
             'remove_content': f"{ENDPOINT}Extractions/ReportTemplates('%s')/ThomsonReuters.Dss.Api.Extractions."
@@ -0,0 +1,305 @@
+"""History Module storing the Price History and EOD rows locally, indexed by instrument and trade date"""
+
+import os
+import sqlite3
+import threading
+
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+from dateutil import parser
+
+from RefinitivAPIClient.codec import Codec
+from RefinitivAPIClient.metrics import MetricsClass
+from RefinitivAPIClient.tracing import Tracing
+from RefinitivAPIClient.utility import Utility
+
+HISTORY_PATH = os.environ.get("REFINITIV_HISTORY_PATH", "price_history.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    identifier_type TEXT NOT NULL, identifier TEXT NOT NULL, trade_date TEXT NOT NULL, payload BLOB NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (identifier_type, identifier, trade_date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    identifier_type TEXT NOT NULL, identifier TEXT NOT NULL, start_date TEXT NOT NULL, end_date TEXT NOT NULL,
+    PRIMARY KEY (identifier_type, identifier, start_date)
+) WITHOUT ROWID;
+"""
+
+
+class PriceHistoryStore:
+    """
+    Persistent SQLite store of the Price History and EOD rows, one per instrument and trade date, with the ranges of
+    dates already requested for each instrument (a day without rows within a range is a day without trading, not a
+    gap). A query reads the rows of a universe and a range of dates locally and requests from DSS only the ranges
+    missing, through the TimeWindowSharderClass. The current day is never marked as covered, so it is requested again
+    until it is over
+    """
+
+    def __init__(self, path=HISTORY_PATH, fields=None):
+        """
+        Initialize the store. The database is opened at the first use
+        :param str path: name of the SQLite file, or ":memory:" for a store living within the process
+        :param list fields: fields requested to fill the gaps. Default: the ones of price_history_request.json
+        """
+        self.path = path
+        self.fields = fields
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """
+        Return the connection to the database, creating the schema at the first call. Call it holding the lock
+        :return: the connection
+        :rtype: sqlite3.Connection
+        """
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    @staticmethod
+    def to_date(value):
+        """
+        Convert a date, a datetime or a string to a date
+        :param date or datetime or str value: date to convert
+        :return: the date
+        :rtype: date
+        """
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return parser.parse(str(value)).date()
+
+    @staticmethod
+    def merge_ranges(ranges):
+        """
+        Merge overlapping or adjacent ranges of dates
+        :param list ranges: list of tuples with pair (start, end) of dates
+        :return: the sorted list of merged ranges
+        :rtype: list
+        """
+        merged = list()
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + timedelta(days=1):
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    @staticmethod
+    def missing_ranges(covered, start, end):
+        """
+        Return the ranges of dates between start and end not within the covered ranges
+        :param list covered: merged list of tuples with pair (start, end) of dates
+        :param date start: first day wanted
+        :param date end: last day wanted
+        :return: the list of missing ranges
+        :rtype: list
+        """
+        missing = list()
+        cursor = start
+        for covered_start, covered_end in covered:
+            if covered_end < cursor:
+                continue
+            if covered_start > end:
+                break
+            if covered_start > cursor:
+                missing.append((cursor, covered_start - timedelta(days=1)))
+            cursor = covered_end + timedelta(days=1)
+        if cursor <= end:
+            missing.append((cursor, end))
+        return missing
+
+    def coverage(self, identifier_type, identifier):
+        """
+        Return the ranges of dates already requested for an instrument
+        :param str identifier_type: type of the identifier
+        :param str identifier: identifier of the instrument
+        :return: the sorted list of tuples with pair (start, end) of dates
+        :rtype: list
+        """
+        with self._lock:
+            rows = self._connect().execute("SELECT start_date, end_date FROM coverage WHERE identifier_type = ? "
+                                           "AND identifier = ? ORDER BY start_date",
+                                           [identifier_type, identifier]).fetchall()
+        return [(date.fromisoformat(i[0]), date.fromisoformat(i[1])) for i in rows]
+
+    def ingest(self, rows, sec_list=None, start_date=None, end_date=None):
+        """
+        Store the rows of a Price History or EOD extraction. The payload of a row already stored is updated with the
+        new fields. If sec_list and a range of dates are given, the range is marked as covered for those instruments,
+        otherwise only the trade dates of the rows are
+        :param list rows: rows of the extraction, with their Identifier, IdentifierType and Trade Date
+        :param list sec_list: List of tuples with pair (identifier, identifierType) requested
+        :param str or date start_date: first day requested
+        :param str or date end_date: last day requested
+        :return: the number of rows stored
+        :rtype: int
+        """
+        now = datetime.now()
+        keyed = dict()
+        for row in rows:
+            if not row.get("Trade Date"):
+                continue
+            key = (str(row.get("IdentifierType")), str(row.get("Identifier")), str(row["Trade Date"])[:10])
+            keyed[key] = row
+        ranges = dict()
+        if sec_list is not None and start_date is not None and end_date is not None:
+            end = min(PriceHistoryStore.to_date(end_date), now.date() - timedelta(days=1))
+            start = PriceHistoryStore.to_date(start_date)
+            if start <= end:
+                for identifier, identifier_type in ((i[0], i[1]) for i in sec_list):
+                    ranges[(identifier_type, identifier)] = [(start, end)]
+        else:
+            for identifier_type, identifier, trade_date in keyed:
+                if date.fromisoformat(trade_date) < now.date():
+                    ranges.setdefault((identifier_type, identifier), list()).append(
+                        (date.fromisoformat(trade_date), date.fromisoformat(trade_date)))
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                for chunk in Utility.split_list(list(keyed), 300):
+                    known = {tuple(i[:3]): Codec.loads(i[3]) for i in connection.execute(
+                        f"SELECT identifier_type, identifier, trade_date, payload FROM prices WHERE "
+                        f"(identifier_type, identifier, trade_date) IN (VALUES {','.join(['(?, ?, ?)'] * len(chunk))})",
+                        [i for key in chunk for i in key])}
+                    connection.executemany("INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?)",
+                                           [key + (Codec.dumps({**known.get(key, dict()), **keyed[key]}),
+                                                   now.isoformat()) for key in chunk])
+                for (identifier_type, identifier), new_ranges in ranges.items():
+                    old_ranges = connection.execute("SELECT start_date, end_date FROM coverage WHERE "
+                                                    "identifier_type = ? AND identifier = ?",
+                                                    [identifier_type, identifier]).fetchall()
+                    merged = PriceHistoryStore.merge_ranges(
+                        [(date.fromisoformat(i[0]), date.fromisoformat(i[1])) for i in old_ranges] + new_ranges)
+                    connection.execute("DELETE FROM coverage WHERE identifier_type = ? AND identifier = ?",
+                                       [identifier_type, identifier])
+                    connection.executemany("INSERT INTO coverage VALUES (?, ?, ?, ?)",
+                                           [(identifier_type, identifier, i.isoformat(), j.isoformat())
+                                            for i, j in merged])
+        return len(keyed)
+
+    def gaps(self, sec_list, start_date, end_date):
+        """
+        Return the ranges of dates not requested yet for each instrument
+        :param list sec_list: List of tuples with pair (identifier, identifierType)
+        :param str or date start_date: first day wanted
+        :param str or date end_date: last day wanted
+        :return: a dictionary with the tuple (identifier, identifierType) as key and the list of missing ranges as
+        value, only for the instruments with gaps
+        :rtype: dict
+        """
+        start = PriceHistoryStore.to_date(start_date)
+        end = PriceHistoryStore.to_date(end_date)
+        gaps = dict()
+        for identifier, identifier_type in dict.fromkeys((i[0], i[1]) for i in sec_list):
+            missing = PriceHistoryStore.missing_ranges(self.coverage(identifier_type, identifier), start, end)
+            if missing:
+                gaps[(identifier, identifier_type)] = missing
+        return gaps
+
+    def fill(self, sec_list, start_date, end_date):
+        """
+        Request from DSS the ranges of dates missing for each instrument and store them. The instruments with the
+        same gaps are requested together
+        :param list sec_list: List of tuples with pair (identifier, identifierType)
+        :param str or date start_date: first day wanted
+        :param str or date end_date: last day wanted
+        :return: the number of rows stored, or the message of error of the first request which failed
+        :rtype: int or str
+        """
+        from RefinitivAPIClient.windows import TimeWindowSharderClass
+
+        groups = dict()
+        for instrument, missing in self.gaps(sec_list, start_date, end_date).items():
+            for gap in missing:
+                groups.setdefault(gap, list()).append(instrument)
+        stored = 0
+        for (gap_start, gap_end), instruments in sorted(groups.items()):
+            with Tracing.stage("fill_history", identifiers=len(instruments), start=gap_start.isoformat(),
+                               end=gap_end.isoformat()):
+                rows = TimeWindowSharderClass.request(instruments, gap_start.isoformat(), gap_end.isoformat(),
+                                                      fields=self.fields)
+                if type(rows) is str:
+                    return rows
+                stored += self.ingest(rows, instruments, gap_start, gap_end)
+                Tracing.add_rows(len(rows))
+        MetricsClass.increment("refinitiv_history_store_rows_total", stored, labels={"origin": "dss"})
+        return stored
+
+    def read(self, sec_list, start_date, end_date, fields=None):
+        """
+        Read the rows stored for a universe and a range of dates, without requesting anything
+        :param list sec_list: List of tuples with pair (identifier, identifierType)
+        :param str or date start_date: first day wanted
+        :param str or date end_date: last day wanted
+        :param list fields: fields to return besides IdentifierType, Identifier and Trade Date. Default: all
+        :return: a DataFrame sorted by Identifier and Trade Date, with the date fields parsed
+        :rtype: pd.DataFrame
+        """
+        start = PriceHistoryStore.to_date(start_date).isoformat()
+        end = PriceHistoryStore.to_date(end_date).isoformat()
+        rows = list()
+        with self._lock:
+            connection = self._connect()
+            for identifier, identifier_type in dict.fromkeys((i[0], i[1]) for i in sec_list):
+                rows.extend(Codec.loads(i[0]) for i in connection.execute(
+                    "SELECT payload FROM prices WHERE identifier_type = ? AND identifier = ? AND trade_date BETWEEN ? "
+                    "AND ? ORDER BY trade_date", [identifier_type, identifier, start, end]))
+        columns = None
+        if fields is not None:
+            columns = ["IdentifierType", "Identifier", "Trade Date"] + \
+                [i for i in Utility.transform_in_list_of_elements(fields) if i != "Trade Date"]
+        dataframe = pd.DataFrame(rows, columns=columns)
+        for column in dataframe.columns:
+            if "Date" in column:
+                dataframe[column] = pd.to_datetime(dataframe[column], errors="coerce")
+        dataframe = dataframe.sort_values(["Identifier", "Trade Date"], kind="stable", ignore_index=True) \
+            if "Trade Date" in dataframe.columns else dataframe
+        MetricsClass.increment("refinitiv_history_store_rows_total", len(dataframe), labels={"origin": "local"})
+        return dataframe
+
+    def query(self, sec_list, start_date, end_date=None, fields=None, fill=True):
+        """
+        Return the Price History of a universe, requesting from DSS only the ranges of dates not stored yet
+        :param list or IdentifierBatch sec_list: List of tuples with pair (identifier, identifierType)
+        :param str or date start_date: first day wanted
+        :param str or date end_date: last day wanted. Default: today
+        :param list fields: fields to return besides IdentifierType, Identifier and Trade Date. Default: all
+        :param bool fill: if False, return only what is stored without requesting anything
+        :return: a DataFrame sorted by Identifier and Trade Date, with the date fields parsed, or a message of error
+        :rtype: pd.DataFrame or str
+        """
+        sec_list = [sec_list] if type(sec_list) is tuple else list(sec_list)
+        end_date = end_date if end_date else date.today()
+        if fill:
+            filled = self.fill(sec_list, start_date, end_date)
+            if type(filled) is str:
+                return filled
+        return self.read(sec_list, start_date, end_date, fields)
+
+    def clear(self, sec_list=None):
+        """
+        Forget the rows and the coverage of some instruments, or of all of them
+        :param list sec_list: List of tuples with pair (identifier, identifierType). Default: all the instruments
+        """
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                if sec_list is None:
+                    connection.execute("DELETE FROM prices")
+                    connection.execute("DELETE FROM coverage")
+                    return
+                for identifier, identifier_type in ((i[0], i[1]) for i in sec_list):
+                    for table in ["prices", "coverage"]:
+                        connection.execute(f"DELETE FROM {table} WHERE identifier_type = ? AND identifier = ?",
+                                           [identifier_type, identifier])
+
+
+PriceHistoryStoreClass = PriceHistoryStore()
+MetricsClass.describe("refinitiv_history_store_rows_total", "counter",
+                      "Price History rows served from the local store or fetched from DSS to fill its gaps")
@@ -0,0 +1,218 @@
+"""Identifiers Module with a compact columnar batch of identifiers for the requests"""
+
+import re
+
+from array import array
+
+from RefinitivAPIClient.codec import Codec
+
+SEPARATOR = b"\x00"
+
+
+class IdentifierBatch:
+    """
+    Batch of (identifier, identifierType) pairs stored in two columns: the identifiers, already escaped for JSON,
+    joined in a single bytes buffer with their offsets in an array, and the types as one byte codes. Slices share the
+    buffers of the batch they come from. It can be used wherever a list of tuples is accepted, and it is serialized
+    in the request body without building a dictionary per identifier
+    """
+
+    def __init__(self, buffer, offsets, type_codes, types, start=0, stop=None, fields=None):
+        """
+        Initialize the batch over its buffers. Use the from_* constructors to build a new batch
+        :param bytes buffer: identifiers escaped for JSON and joined by SEPARATOR
+        :param array offsets: start of each identifier in the buffer, plus the end of the buffer
+        :param array type_codes: position of the type of each identifier in types
+        :param list types: names of the identifier types
+        :param int start: first identifier of the batch within the buffers
+        :param int stop: identifier after the last one of the batch within the buffers
+        :param dict fields: constant fields added to each identifier when serialized (e.g. Source)
+        """
+        self._buffer = buffer
+        self._offsets = offsets
+        self._type_codes = type_codes
+        self._types = types
+        self._start = start
+        self._stop = len(type_codes) if stop is None else stop
+        self.fields = fields if fields else dict()
+
+    @classmethod
+    def from_tuples(cls, pairs):
+        """
+        Build a batch from a list of tuples
+        :param list pairs: list of tuples with pair (identifier, identifierType)
+        :return: the batch
+        :rtype: IdentifierBatch
+        """
+        if isinstance(pairs, IdentifierBatch):
+            return pairs
+        types = list()
+        codes = dict()
+        type_codes = array("B")
+        escaped = list()
+        for identifier, identifier_type in pairs:
+            if identifier_type not in codes:
+                codes[identifier_type] = len(types)
+                types.append(identifier_type)
+            type_codes.append(codes[identifier_type])
+            escaped.append(Codec.dumps(identifier)[1:-1])
+        return cls._build(escaped, type_codes, types)
+
+    @classmethod
+    def from_identifiers(cls, identifiers, identifier_type):
+        """
+        Build a batch of identifiers of the same type
+        :param list identifiers: list of identifiers
+        :param str identifier_type: type of all the identifiers
+        :return: the batch
+        :rtype: IdentifierBatch
+        """
+        escaped = [Codec.dumps(i)[1:-1] for i in identifiers]
+        return cls._build(escaped, array("B", bytes(len(escaped))), [identifier_type])
+
+    @classmethod
+    def _build(cls, escaped, type_codes, types):
+        """
+        Join the escaped identifiers in the buffer and compute their offsets
+        :param list escaped: identifiers escaped for JSON, as bytes
+        :param array type_codes: position of the type of each identifier in types
+        :param list types: names of the identifier types
+        :return: the batch
+        :rtype: IdentifierBatch
+        """
+        offsets = array("Q", [0])
+        position = 0
+        for identifier in escaped:
+            position += len(identifier) + 1
+            offsets.append(position)
+        return cls(SEPARATOR.join(escaped) + SEPARATOR, offsets, type_codes, types)
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def _identifier(self, index):
+        """
+        Return an identifier of the buffers
+        :param int index: position of the identifier within the buffers
+        :return: the identifier
+        :rtype: str
+        """
+        escaped = self._buffer[self._offsets[index]:self._offsets[index + 1] - 1]
+        return Codec.loads(b'"' + escaped + b'"') if b"\\" in escaped else escaped.decode()
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step != 1:
+                raise ValueError("IdentifierBatch slices must be contiguous")
+            return IdentifierBatch(self._buffer, self._offsets, self._type_codes, self._types,
+                                   self._start + start, self._start + max(stop, start), self.fields)
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("IdentifierBatch index out of range")
+        index = self._start + item
+        return self._identifier(index), self._types[self._type_codes[index]]
+
+    def __iter__(self):
+        for index in range(self._start, self._stop):
+            yield self._identifier(index), self._types[self._type_codes[index]]
+
+    def __repr__(self):
+        return f"IdentifierBatch({len(self)} identifiers, types={self._types})"
+
+    def with_fields(self, **fields):
+        """
+        Return a view of the batch adding constant fields to each identifier when serialized
+        :param fields: fields to add, e.g. Source="*"
+        :return: the view of the batch
+        :rtype: IdentifierBatch
+        """
+        return IdentifierBatch(self._buffer, self._offsets, self._type_codes, self._types, self._start, self._stop,
+                               dict(self.fields, **fields))
+
+    def deduplicate(self):
+        """
+        Return a new batch without the duplicated pairs, keeping the first occurrence
+        :return: the deduplicated batch
+        :rtype: IdentifierBatch
+        """
+        seen = dict()
+        for index in range(self._start, self._stop):
+            key = (self._buffer[self._offsets[index]:self._offsets[index + 1] - 1], self._type_codes[index])
+            seen.setdefault(key, None)
+        batch = IdentifierBatch._build([i[0] for i in seen], array("B", [i[1] for i in seen]), list(self._types))
+        batch.fields = dict(self.fields)
+        return batch
+
+    def to_json(self):
+        """
+        Serialize the batch as a JSON array of {"Identifier", "IdentifierType"} objects
+        :return: the JSON array
+        :rtype: bytes
+        """
+        return b"".join(self._json_parts())
+
+    def _json_parts(self):
+        """
+        Serialize the batch as a list of pieces to be joined, to avoid copying the large ones more than once
+        :return: the pieces of the JSON array
+        :rtype: list
+        """
+        if not len(self):
+            return [b"[]"]
+        suffix = b"".join(b"," + Codec.dumps(key) + b":" + Codec.dumps(value)
+                          for key, value in self.fields.items())
+        parts = [b"["]
+        # Identifiers of the same type are serialized at once replacing the separators of their buffer range
+        runs = re.compile(b"|".join(re.escape(bytes([code])) + b"+" for code in range(len(self._types))))
+        for run in runs.finditer(self._type_codes[self._start:self._stop].tobytes()):
+            run_start, run_stop = self._start + run.start(), self._start + run.end()
+            closing = b'","IdentifierType":' + Codec.dumps(self._types[self._type_codes[run_start]]) + \
+                suffix + b'}'
+            identifiers = self._buffer[self._offsets[run_start]:self._offsets[run_stop] - 1]
+            parts.extend([b'{"Identifier":"' if len(parts) == 1 else b',{"Identifier":"',
+                          identifiers.replace(SEPARATOR, closing + b',{"Identifier":"'), closing])
+        parts.append(b"]")
+        return parts
+
+    @staticmethod
+    def request_identifiers(sec_list, **fields):
+        """
+        Return the InstrumentIdentifiers of a request body: the batch itself, or a list of dictionaries for a list of
+        tuples
+        :param list or IdentifierBatch sec_list: list of tuples with pair (identifier, identifierType) or a batch
+        :param fields: constant fields added to each identifier
+        :return: the identifiers to put in the body
+        :rtype: IdentifierBatch or list
+        """
+        if isinstance(sec_list, IdentifierBatch):
+            return sec_list.with_fields(**fields) if fields else sec_list
+        return [dict({"Identifier": i[0], "IdentifierType": i[1]}, **fields) for i in sec_list]
+
+    @staticmethod
+    def dumps(body):
+        """
+        Serialize a request body, splicing the JSON of the batches it contains
+        :param dict body: request body
+        :return: the serialized body
+        :rtype: bytes
+        """
+        batches = list()
+
+        def placeholder(value):
+            if not isinstance(value, IdentifierBatch):
+                raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+            batches.append(value)
+            return f"\x00IdentifierBatch{len(batches) - 1}\x00"
+
+        serialized = Codec.dumps(body, default=placeholder)
+        if not batches:
+            return serialized
+        parts = list()
+        for position, batch in enumerate(batches):
+            before, serialized = serialized.split(f'"\\u0000IdentifierBatch{position}\\u0000"'.encode(), 1)
+            parts.append(before)
+            parts.extend(batch._json_parts())
+        parts.append(serialized)
+        return b"".join(parts)
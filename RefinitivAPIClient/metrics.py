@@ -0,0 +1,264 @@
+"""Metrics Module aggregating counters, gauges and histograms of the client in-process"""
+
+import bisect
+import threading
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class RequestRecord:
+    """Measures of a single HTTP call made by the client"""
+
+    __slots__ = ["method", "url", "endpoint", "status", "bytes_out", "bytes_in", "dns", "connect", "ttfb", "total",
+                 "retries", "error"]
+
+    def __init__(self, method, url, endpoint):
+        """
+        Initialize an empty record for the given call
+        :param str method: HTTP method of the call
+        :param str url: url of the call
+        :param str endpoint: url of the call with the ids replaced by a placeholder
+        """
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint
+        self.status = None
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.dns = 0.0
+        self.connect = 0.0
+        self.ttfb = 0.0
+        self.total = 0.0
+        self.retries = 0
+        self.error = None
+
+    def to_dict(self):
+        """
+        Return the record as a dictionary
+        :return: a dictionary with all the measures of the call
+        :rtype: dict
+        """
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets, following the Prometheus layout"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Initialize an empty histogram
+        :param tuple buckets: upper bounds of the buckets
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """
+        Add a value to the histogram
+        :param float value: value observed
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """
+        Estimate a quantile from the buckets (upper bound of the bucket where the quantile falls)
+        :param float q: quantile between 0 and 1
+        :return: the estimated value
+        :rtype: float
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulated = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulated += count
+            if cumulated >= target:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """In-process registry of the metrics of the client and of the hooks called after each HTTP call"""
+
+    def __init__(self):
+        """Initialize the empty registry"""
+        self._lock = threading.Lock()
+        self._hooks = list()
+        self._descriptions = dict()
+        self._counters = dict()
+        self._gauges = dict()
+        self._histograms = dict()
+
+    def add_hook(self, callback):
+        """
+        Register a callback called with a RequestRecord after every HTTP call
+        :param callable callback: function accepting a RequestRecord
+        :return: the callback itself, so that it can be used as a decorator
+        :rtype: callable
+        """
+        with self._lock:
+            self._hooks.append(callback)
+        return callback
+
+    def remove_hook(self, callback):
+        """
+        Unregister a callback previously added
+        :param callable callback: function to remove
+        """
+        with self._lock:
+            if callback in self._hooks:
+                self._hooks.remove(callback)
+
+    def describe(self, name, metric_type, description):
+        """
+        Set the type and the help text of a metric, used by the Prometheus export
+        :param str name: name of the metric
+        :param str metric_type: one of counter, gauge, histogram
+        :param str description: help text of the metric
+        """
+        self._descriptions[name] = (metric_type, description)
+
+    def increment(self, name, value=1, labels=None):
+        """
+        Increment a counter
+        :param str name: name of the counter
+        :param float value: amount to add
+        :param dict labels: labels of the series
+        """
+        key = tuple(sorted((labels or dict()).items()))
+        with self._lock:
+            series = self._counters.setdefault(name, dict())
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name, value, labels=None):
+        """
+        Set the value of a gauge
+        :param str name: name of the gauge
+        :param float value: current value
+        :param dict labels: labels of the series
+        """
+        key = tuple(sorted((labels or dict()).items()))
+        with self._lock:
+            self._gauges.setdefault(name, dict())[key] = value
+
+    def observe(self, name, value, labels=None, buckets=DEFAULT_BUCKETS):
+        """
+        Add a value to a histogram
+        :param str name: name of the histogram
+        :param float value: value observed
+        :param dict labels: labels of the series
+        :param tuple buckets: upper bounds of the buckets, used when the series is created
+        """
+        key = tuple(sorted((labels or dict()).items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, dict())
+            if key not in series:
+                series[key] = Histogram(buckets)
+            series[key].observe(value)
+
+    def record_request(self, record):
+        """
+        Aggregate the measures of an HTTP call and forward the record to the hooks
+        :param RequestRecord record: measures of the call
+        """
+        labels = {"endpoint": record.endpoint, "method": record.method}
+        self.increment("refinitiv_http_requests_total", 1, dict(labels, status=str(record.status)))
+        if record.retries:
+            self.increment("refinitiv_http_retries_total", record.retries, labels)
+        self.increment("refinitiv_http_bytes_sent_total", record.bytes_out, labels)
+        self.increment("refinitiv_http_bytes_received_total", record.bytes_in, labels)
+        for phase in ["dns", "connect", "ttfb", "total"]:
+            self.observe("refinitiv_http_request_duration_seconds", getattr(record, phase),
+                         dict(labels, phase=phase))
+        with self._lock:
+            hooks = list(self._hooks)
+        for hook in hooks:
+            try:
+                hook(record)
+            except Exception as e:
+                print(f"Metrics hook {hook} failed with {e!r}")
+
+    def snapshot(self):
+        """
+        Return a copy of all the series
+        :return: a dictionary with counters, gauges and histograms
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "counters": {name: {labels: value for labels, value in series.items()}
+                             for name, series in self._counters.items()},
+                "gauges": {name: dict(series) for name, series in self._gauges.items()},
+                "histograms": {name: {labels: {"count": h.count, "sum": h.sum, "p50": h.quantile(0.5),
+                                               "p99": h.quantile(0.99)} for labels, h in series.items()}
+                               for name, series in self._histograms.items()}
+            }
+
+    def reset(self):
+        """Drop all the series, keeping the hooks"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def to_prometheus(self):
+        """
+        Export all the series in the Prometheus text exposition format
+        :return: a string with the metrics
+        :rtype: str
+        """
+        lines = list()
+        with self._lock:
+            for metric_type, store in [("counter", self._counters), ("gauge", self._gauges)]:
+                for name, series in sorted(store.items()):
+                    lines.extend(self._header(name, metric_type))
+                    for labels, value in sorted(series.items()):
+                        lines.append(f"{name}{self._format_labels(labels)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                lines.extend(self._header(name, "histogram"))
+                for labels, histogram in sorted(series.items()):
+                    cumulated = 0
+                    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        cumulated += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{name}_bucket{self._format_labels(labels + (('le', le),))} {cumulated}")
+                    lines.append(f"{name}_sum{self._format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{self._format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, name, metric_type):
+        """
+        Build the HELP and TYPE lines of a metric
+        :param str name: name of the metric
+        :param str metric_type: default type of the metric
+        :return: a list of strings
+        :rtype: list
+        """
+        metric_type, description = self._descriptions.get(name, (metric_type, name.replace("_", " ")))
+        return [f"# HELP {name} {description}", f"# TYPE {name} {metric_type}"]
+
+    @staticmethod
+    def _format_labels(labels):
+        """
+        Format the labels of a series
+        :param tuple labels: tuple of (name, value) pairs
+        :return: a string with the labels in curly brackets, or an empty string
+        :rtype: str
+        """
+        if not labels:
+            return ""
+        escaped = [(k, str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")) for k, v in labels]
+        return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+MetricsClass = Metrics()
+MetricsClass.describe("refinitiv_http_requests_total", "counter", "HTTP calls made to DSS by endpoint and status")
+MetricsClass.describe("refinitiv_http_retries_total", "counter", "HTTP calls retried after a throttling or an error")
+MetricsClass.describe("refinitiv_http_bytes_sent_total", "counter", "Bytes of the request bodies sent to DSS")
+MetricsClass.describe("refinitiv_http_bytes_received_total", "counter", "Bytes of the response bodies from DSS")
+MetricsClass.describe("refinitiv_http_request_duration_seconds", "histogram",
+                      "Duration of the HTTP calls by phase: dns, connect, ttfb and total")
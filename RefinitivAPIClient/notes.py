@@ -0,0 +1,165 @@
+"""Notes Module parsing the Notes of the ExtractWithNotes responses into processing, instrument and quota figures"""
+
+import re
+
+from datetime import datetime
+
+from RefinitivAPIClient.metrics import MetricsClass
+from RefinitivAPIClient.tracing import Tracing
+
+_PATTERNS = {
+    "user_id": (r"User ID:\s*(\d+)", str),
+    "extraction_id": (r"Extraction ID:\s*(\d+)", str),
+    "template_type": (r"Template Type\s+([^\r\n]+)", str),
+    "schedule_time": (r"Schedule Time:\s*(\d+/\d+/\d+ \d+:\d+:\d+)", str),
+    "processing_started": (r"Processing started at\s*(\d+/\d+/\d+ \d+:\d+:\d+)", str),
+    "processing_seconds": (r"taking\s+([\d.]+)\s*secs", float),
+    "quote_server_seconds": (r"QS\s*[:(]\s*([\d.]+)\s*secs", float),
+    "instruments_in_list": (r"(\d+)\s+Instruments in the input list", int),
+    "instruments_charged": (r"(\d+)\s+Total instruments charged", int),
+    "instruments_no_data": (r"(\d+)\s+Instruments with no reported data", int),
+    "instruments_rejected": (r"(\d+)\s+Instruments with errors or not found", int),
+    "quota_before": (r"Quota Count Before Extraction:\s*(\d+)", int),
+    "quota_approved": (r"Instruments Approved for Extraction:\s*(\d+)", int),
+    "quota_after": (r"Quota Count After Extraction:\s*(\d+)", int),
+    "quota_limit": (r"Quota Limit:\s*(\d+)", int),
+}
+_MESSAGES = re.compile(r"^(?!\s*\d+\s).*\b(error|warning|not found|invalid)\b.*$", re.IGNORECASE | re.MULTILINE)
+_DATE_FORMAT = "%m/%d/%Y %H:%M:%S"
+
+
+class ExtractionNotes(dict):
+    """
+    Figures parsed from the Notes of an extraction: server processing and queue time, instruments accepted and
+    rejected, quota consumed, and the messages of error or warning. The fields not found in the Notes are None. The
+    original Notes are kept in the raw attribute
+    """
+
+    def __init__(self, raw=None, **fields):
+        """
+        Initialize the parsed notes
+        :param list raw: Notes array of the response
+        :param fields: parsed fields
+        """
+        super().__init__(**fields)
+        self.raw = raw if raw is not None else list()
+
+    @staticmethod
+    def parse(notes):
+        """
+        Parse the Notes array of an ExtractWithNotes response
+        :param list or str notes: Notes array, or its text
+        :return: the parsed notes
+        :rtype: ExtractionNotes
+        """
+        raw = [notes] if isinstance(notes, str) else list(notes or list())
+        text = "\n".join(raw)
+        fields = dict()
+        for field, (pattern, cast) in _PATTERNS.items():
+            match = re.search(pattern, text, re.IGNORECASE)
+            fields[field] = cast(match.group(1).strip()) if match else None
+        fields["queue_seconds"] = None
+        if fields["schedule_time"] and fields["processing_started"]:
+            waited = datetime.strptime(fields["processing_started"], _DATE_FORMAT) - \
+                datetime.strptime(fields["schedule_time"], _DATE_FORMAT)
+            fields["queue_seconds"] = max(waited.total_seconds(), 0.0)
+        if fields["instruments_in_list"] is not None:
+            fields["instruments_accepted"] = fields["instruments_in_list"] - (fields["instruments_rejected"] or 0)
+        else:
+            fields["instruments_accepted"] = fields["instruments_charged"]
+        fields["quota_consumed"] = fields["quota_approved"]
+        if fields["quota_consumed"] is None and None not in [fields["quota_before"], fields["quota_after"]]:
+            fields["quota_consumed"] = fields["quota_after"] - fields["quota_before"]
+        fields["messages"] = [i.group(0).strip() for i in _MESSAGES.finditer(text)]
+        return ExtractionNotes(raw, **fields)
+
+    @staticmethod
+    def combine(notes):
+        """
+        Merge the notes of the requests an extraction has been split in: the timings, the instrument counts and the
+        quota consumed are summed, the quota counters span from the first to the last request
+        :param list notes: list of ExtractionNotes
+        :return: the combined notes
+        :rtype: ExtractionNotes
+        """
+        notes = [i for i in notes if i]
+        if not notes:
+            return ExtractionNotes()
+        combined = ExtractionNotes([i for note in notes for i in note.raw], **notes[0])
+        for field in ["processing_seconds", "quote_server_seconds", "queue_seconds", "instruments_in_list",
+                      "instruments_charged", "instruments_no_data", "instruments_rejected", "instruments_accepted",
+                      "quota_approved", "quota_consumed"]:
+            values = [i[field] for i in notes if i.get(field) is not None]
+            combined[field] = sum(values) if values else None
+        quota_before = [i["quota_before"] for i in notes if i.get("quota_before") is not None]
+        quota_after = [i["quota_after"] for i in notes if i.get("quota_after") is not None]
+        combined["quota_before"] = min(quota_before) if quota_before else None
+        combined["quota_after"] = max(quota_after) if quota_after else None
+        combined["messages"] = [i for note in notes for i in note.get("messages", list())]
+        return combined
+
+    @staticmethod
+    def from_body(body):
+        """
+        Parse the Notes of an ExtractWithNotes body and record them in the metrics and in the current trace stage
+        :param dict body: response of ExtractWithNotes, or the metadata of an ExtractionStream
+        :return: the parsed notes
+        :rtype: ExtractionNotes
+        """
+        notes = ExtractionNotes.parse(body.get("Notes") if isinstance(body, dict) else None)
+        if notes.raw:
+            notes.record()
+        return notes
+
+    def record(self):
+        """Feed the figures of the extraction to the metrics and to the current trace stage"""
+        labels = {"template": self["template_type"] or "unknown"}
+        if self["processing_seconds"] is not None:
+            MetricsClass.observe("refinitiv_server_processing_seconds", self["processing_seconds"], labels=labels)
+        if self["queue_seconds"] is not None:
+            MetricsClass.observe("refinitiv_server_queue_seconds", self["queue_seconds"], labels=labels)
+        if self["instruments_accepted"] is not None:
+            MetricsClass.increment("refinitiv_instruments_accepted_total", self["instruments_accepted"], labels=labels)
+        if self["instruments_rejected"] is not None:
+            MetricsClass.increment("refinitiv_instruments_rejected_total", self["instruments_rejected"], labels=labels)
+        if self["quota_consumed"] is not None:
+            MetricsClass.increment("refinitiv_quota_consumed_total", self["quota_consumed"], labels=labels)
+        if self["quota_after"] is not None and self["quota_limit"]:
+            MetricsClass.set("refinitiv_quota_used_ratio", self["quota_after"] / self["quota_limit"],
+                             labels={"user": self["user_id"] or "unknown"})
+        Tracing.annotate(server_seconds=self["processing_seconds"], queue_seconds=self["queue_seconds"],
+                         instruments_rejected=self["instruments_rejected"])
+
+
+class ExtractionResult(list):
+    """Contents of an ExtractWithNotes response, with the parsed Notes in the notes attribute"""
+
+    def __init__(self, contents=(), notes=None):
+        """
+        Initialize the result
+        :param iterable contents: rows of the extraction
+        :param ExtractionNotes notes: parsed notes of the extraction
+        """
+        super().__init__(contents)
+        self.notes = notes if notes is not None else ExtractionNotes()
+
+    @staticmethod
+    def from_body(body):
+        """
+        Build the result of an ExtractWithNotes body, recording its Notes in the metrics
+        :param dict body: response of ExtractWithNotes
+        :return: the Contents of the response with the parsed notes
+        :rtype: ExtractionResult
+        """
+        return ExtractionResult(body["Contents"], ExtractionNotes.from_body(body))
+
+
+MetricsClass.describe("refinitiv_server_processing_seconds", "histogram",
+                      "Seconds taken by DSS to process the extractions, as reported in their Notes")
+MetricsClass.describe("refinitiv_server_queue_seconds", "histogram",
+                      "Seconds the extractions waited on DSS before being processed, as reported in their Notes")
+MetricsClass.describe("refinitiv_instruments_accepted_total", "counter", "Instruments accepted by the extractions")
+MetricsClass.describe("refinitiv_instruments_rejected_total", "counter",
+                      "Instruments of the extractions with errors or not found")
+MetricsClass.describe("refinitiv_quota_consumed_total", "counter", "Instruments counted against the quota")
+MetricsClass.describe("refinitiv_quota_used_ratio", "gauge", "Share of the quota limit used after the last extraction")
@@ -0,0 +1,281 @@
+"""Pipeline Module running the steps of an extraction as overlapping stages connected by bounded queues"""
+
+import contextvars
+import queue
+import threading
+import time
+import types
+
+from RefinitivAPIClient.tracing import Tracing
+
+_DONE = object()
+
+
+class Stage:
+    """A step of the pipeline run by a pool of threads"""
+
+    def __init__(self, name, func, workers=1, queue_size=2, batch_size=None):
+        """
+        Initialize the stage
+        :param str name: name of the stage, used in the trace and in the statistics
+        :param callable func: function accepting an item and returning the item for the next stage, None to drop it,
+        or a generator to pass on many items. Ignored by a batcher
+        :param int workers: number of threads running the function
+        :param int queue_size: maximum number of items waiting for this stage
+        :param int batch_size: if given, the stage is a batcher grouping the items in lists of batch_size items
+        """
+        self.name = name
+        self.func = func
+        self.workers = 1 if batch_size else workers
+        self.batch_size = batch_size
+        self.inbox = queue.Queue(maxsize=queue_size)
+        self.items_in = 0
+        self.items_out = 0
+        self.busy = 0.0
+        self._running = self.workers
+        self._lock = threading.Lock()
+
+    def statistics(self):
+        """
+        Return the counters of the stage
+        :return: a dictionary with the items received and passed on and the seconds spent working
+        :rtype: dict
+        """
+        return {"workers": self.workers, "items_in": self.items_in, "items_out": self.items_out,
+                "busy_seconds": round(self.busy, 6)}
+
+
+class Pipeline:
+    """
+    Chain of stages fed by an iterable. Each stage works on its own threads and hands its outputs to the next one
+    through a bounded queue, so the stages overlap and a slow stage slows down the ones before it instead of letting
+    the items pile up in memory. Within a stage with more than one worker the order of the items is not preserved
+    """
+
+    def __init__(self, source, queue_size=2):
+        """
+        Initialize the pipeline
+        :param iterable source: items to process, e.g. the identifiers or a generator reading them from a file
+        :param int queue_size: default maximum number of items waiting for each stage
+        """
+        self.source = source
+        self.queue_size = queue_size
+        self.stages = list()
+        self._error = None
+        self._abort = threading.Event()
+
+    def stage(self, name, func, workers=1, queue_size=None):
+        """
+        Add a stage at the end of the pipeline
+        :param str name: name of the stage
+        :param callable func: function accepting an item and returning the item for the next stage, None to drop it,
+        or a generator to pass on many items
+        :param int workers: number of threads running the function
+        :param int queue_size: maximum number of items waiting for this stage. Default: the one of the pipeline
+        :return: the pipeline itself
+        :rtype: Pipeline
+        """
+        self.stages.append(Stage(name, func, workers, queue_size or self.queue_size))
+        return self
+
+    def batch(self, size, name="batch", queue_size=None):
+        """
+        Add a stage grouping the items in lists of size items. The last list may be shorter
+        :param int size: number of items in each list
+        :param str name: name of the stage
+        :param int queue_size: maximum number of items waiting for this stage. Default: size
+        :return: the pipeline itself
+        :rtype: Pipeline
+        """
+        self.stages.append(Stage(name, None, queue_size=queue_size or size, batch_size=size))
+        return self
+
+    def sink(self, sink, workers=1, name="sink"):
+        """
+        Add a stage writing each item (a DataFrame) in a sink from RefinitivAPIClient.sinks. Sinks writing files
+        need a single worker
+        :param sink: sink where to write the items
+        :param int workers: number of threads writing in the sink
+        :param str name: name of the stage
+        :return: the pipeline itself
+        :rtype: Pipeline
+        """
+        return self.stage(name, sink.write, workers)
+
+    def _put(self, target, item):
+        """
+        Put an item in a queue, giving up if the pipeline is aborted
+        :param queue.Queue target: queue where to put the item
+        :param item: item to put
+        :return: False if the pipeline is aborted
+        :rtype: bool
+        """
+        while not self._abort.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fail(self, error):
+        """
+        Record the first error and abort the pipeline
+        :param Exception error: error raised by a stage
+        """
+        if self._error is None:
+            self._error = error
+        self._abort.set()
+
+    def _feed(self, target):
+        """
+        Put the items of the source in the queue of the first stage
+        :param queue.Queue target: queue of the first stage
+        """
+        try:
+            for item in self.source:
+                if not self._put(target, item):
+                    return
+        except Exception as e:
+            self._fail(e)
+        self._put(target, _DONE)
+
+    def _work(self, stage, target):
+        """
+        Body of a worker of a stage: process the items of the stage until the end of the source
+        :param Stage stage: stage of the worker
+        :param queue.Queue target: queue of the next stage
+        """
+        pending = list()
+        while not self._abort.is_set():
+            try:
+                item = stage.inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                # The other workers of the stage need to see the end of the source as well
+                self._put(stage.inbox, item)
+                break
+            with stage._lock:
+                stage.items_in += 1
+            if stage.batch_size:
+                pending.append(item)
+                if len(pending) == stage.batch_size:
+                    if not self._pass_on(stage, target, pending):
+                        return
+                    pending = list()
+                continue
+            try:
+                if not self._process(stage, item, target):
+                    return
+            except Exception as e:
+                self._fail(e)
+                return
+        if pending and not self._pass_on(stage, target, pending):
+            return
+        with stage._lock:
+            stage._running -= 1
+            last = stage._running == 0
+        if last:
+            self._put(target, _DONE)
+
+    def _process(self, stage, item, target):
+        """
+        Run the function of a stage on an item and pass its outputs on to the next stage
+        :param Stage stage: stage of the worker
+        :param item: item to process
+        :param queue.Queue target: queue of the next stage
+        :return: False if the pipeline is aborted
+        :rtype: bool
+        """
+        started = time.perf_counter()
+        with Tracing.stage(stage.name):
+            output = stage.func(item)
+        outputs = output if isinstance(output, types.GeneratorType) else iter([output] if output is not None else [])
+        while True:
+            try:
+                output = next(outputs)
+            except StopIteration:
+                break
+            finally:
+                with stage._lock:
+                    stage.busy += time.perf_counter() - started
+            if not self._pass_on(stage, target, output):
+                return False
+            started = time.perf_counter()
+        return True
+
+    def _pass_on(self, stage, target, output):
+        """
+        Put an output of a stage in the queue of the next stage
+        :param Stage stage: stage of the worker
+        :param queue.Queue target: queue of the next stage
+        :param output: output to pass on
+        :return: False if the pipeline is aborted
+        :rtype: bool
+        """
+        with stage._lock:
+            stage.items_out += 1
+        return self._put(target, output)
+
+    def __iter__(self):
+        """
+        Run the pipeline, yielding the outputs of the last stage as soon as they are available
+        :return: a generator of the outputs of the last stage
+        :rtype: iterable
+        """
+        self._error = None
+        self._abort.clear()
+        for stage in self.stages:
+            stage.inbox = queue.Queue(maxsize=stage.inbox.maxsize)
+            stage.items_in = stage.items_out = 0
+            stage.busy = 0.0
+            stage._running = stage.workers
+        outbox = queue.Queue(maxsize=self.queue_size)
+        targets = [i.inbox for i in self.stages[1:]] + [outbox]
+        threads = [threading.Thread(target=contextvars.copy_context().run,
+                                    args=(self._feed, self.stages[0].inbox if self.stages else outbox), daemon=True)]
+        for stage, target in zip(self.stages, targets):
+            threads.extend(threading.Thread(target=contextvars.copy_context().run, args=(self._work, stage, target),
+                                            name=f"Pipeline-{stage.name}-{i}", daemon=True)
+                           for i in range(stage.workers))
+        for thread in threads:
+            thread.start()
+        try:
+            while not self._abort.is_set():
+                try:
+                    item = outbox.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            self._abort.set()
+            for thread in threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def run(self):
+        """
+        Run the pipeline until the end of the source, discarding the outputs of the last stage
+        :return: a dictionary with the statistics of each stage and the wall time
+        :rtype: dict
+        """
+        started = time.perf_counter()
+        for _ in self:
+            pass
+        return self.statistics(time.perf_counter() - started)
+
+    def statistics(self, wall_time=None):
+        """
+        Return the statistics of the last run
+        :param float wall_time: seconds taken by the run
+        :return: a dictionary with the statistics of each stage and the wall time
+        :rtype: dict
+        """
+        statistics = {i.name: i.statistics() for i in self.stages}
+        if wall_time is not None:
+            statistics["wall_seconds"] = round(wall_time, 6)
+        return statistics
@@ -0,0 +1,262 @@
+"""Reuse Module naming the automatically created lists and templates after their content"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from datetime import datetime, timedelta, timezone
+from dateutil import parser
+
+from RefinitivAPIClient.tracing import Tracing
+from RefinitivAPIClient.utility import Utility
+
+AUTO_CREATED_LIST = re.compile(r"(_api_client_automatically_created_list|^api_client_list_[0-9a-f]{16})$")
+AUTO_CREATED_TEMPLATE = re.compile(r"(^.+_api_client_.+_automatically_created|^api_client_tpl_[0-9a-f]{16})$")
+
+# Last time each automatically created object has been resolved, so that objects in use are never collected
+REUSE_PATH = os.environ.get("REFINITIV_REUSE_PATH", "reusable_objects.sqlite")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS last_used (
+    kind TEXT NOT NULL, name TEXT NOT NULL, used_at REAL NOT NULL, PRIMARY KEY (kind, name)
+);
+"""
+
+_name_locks = dict()
+_name_locks_lock = threading.Lock()
+_uses = {"connection": None, "lock": threading.Lock()}
+
+
+class ReusableObjects:
+    """
+    Get or create instrument lists and templates whose name is the hash of their content, so that the same set of
+    identifiers or the same template definition is created only once per account
+    """
+
+    @staticmethod
+    def content_hash(content):
+        """
+        Hash a JSON-serializable content
+        :param content: content to hash
+        :return: a string with the first 16 hexadecimal chars of the SHA-256 of the content
+        :rtype: str
+        """
+        serialized = json.dumps(content, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(serialized.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def list_name(formatted_securities, entity=False):
+        """
+        Name of the list holding the given identifiers, independently of their order and duplicates
+        :param list formatted_securities: list of tuples with pair (identifier, identifierType)
+        :param bool entity: True for entity lists
+        :return: a string with the name of the list
+        :rtype: str
+        """
+        identifiers = sorted({(i[0], i[1]) for i in formatted_securities})
+        return "api_client_list_" + ReusableObjects.content_hash([entity, identifiers])
+
+    @staticmethod
+    def template_name(template_type, fields, **conditions):
+        """
+        Name of the template with the given definition. Templates whose dates are relative to the creation day
+        (no end_date or a look_back) are named after the current day as well, so they are reused only for one day
+        :param str template_type: Type of the Template
+        :param list fields: List of fields of the template
+        :param conditions: any other argument passed to GUIOperations.create_template
+        :return: a string with the name of the template
+        :rtype: str
+        """
+        definition = {"template_type": template_type, "fields": list(fields),
+                      "conditions": {k: v for k, v in conditions.items() if v is not None}}
+        if template_type == "PriceHistoryReportTemplate" and (not conditions.get("end_date") or
+                                                               conditions.get("look_back")):
+            definition["day"] = datetime.now().strftime("%Y%m%d")
+        return "api_client_tpl_" + ReusableObjects.content_hash(definition)
+
+    @staticmethod
+    def _name_lock(name):
+        """
+        Return the lock serializing the creation of the object with the given name within the process
+        :param str name: name of the list or template
+        :return: the lock of the name
+        :rtype: threading.Lock
+        """
+        with _name_locks_lock:
+            return _name_locks.setdefault(name, threading.Lock())
+
+    @staticmethod
+    def _uses_connection():
+        """
+        Return the connection to the record of the last uses, creating the schema at the first call. Call it holding
+        the lock of the record
+        :return: the connection
+        :rtype: sqlite3.Connection
+        """
+        if _uses["connection"] is None:
+            _uses["connection"] = sqlite3.connect(REUSE_PATH, check_same_thread=False)
+            _uses["connection"].executescript(SCHEMA)
+        return _uses["connection"]
+
+    @staticmethod
+    def record_use(kind, name):
+        """
+        Record that an object has just been resolved
+        :param str kind: "list", "entity_list" or "template"
+        :param str name: name of the object
+        """
+        with _uses["lock"]:
+            connection = ReusableObjects._uses_connection()
+            with connection:
+                connection.execute("INSERT OR REPLACE INTO last_used VALUES (?, ?, ?)", [kind, name, time.time()])
+
+    @staticmethod
+    def last_uses():
+        """
+        Return the last time each object has been resolved
+        :return: a dictionary with the tuple (kind, name) as key and an aware datetime as value
+        :rtype: dict
+        """
+        with _uses["lock"]:
+            rows = ReusableObjects._uses_connection().execute("SELECT kind, name, used_at FROM last_used").fetchall()
+        return {(kind, name): datetime.fromtimestamp(used_at, timezone.utc) for kind, name, used_at in rows}
+
+    @staticmethod
+    def get_or_create_instrument_list(formatted_securities, entity=False):
+        """
+        Return the id of the list holding the given identifiers, creating and populating it if it doesn't exist.
+        The list is populated under a temporary name, collected by collect_garbage if the process dies, and renamed
+        after its content once all the identifiers have been added, so that it is never found half-empty
+        :param list formatted_securities: list of tuples with pair (identifier, identifierType)
+        :param bool entity: True for entity lists
+        :return: the ListId
+        :rtype: str
+        """
+        from RefinitivAPIClient.dss import GUIOperations, ListFields
+        name = ReusableObjects.list_name(formatted_securities, entity)
+        ReusableObjects.record_use("entity_list" if entity else "list", name)
+        with ReusableObjects._name_lock(name):
+            existing = ListFields.list_available_instrument_lists_by_name(name, entity)
+            if type(existing) is dict and existing.get("ListId"):
+                print(f"Reusing list {name} with Id {existing['ListId']}")
+                Tracing.annotate(reused=True)
+                return existing["ListId"]
+            now = re.sub(r":", "", str(datetime.now().isoformat()))
+            created = GUIOperations.create_instrument_list(f"{name}_{now}_api_client_automatically_created_list",
+                                                           entity)
+            if type(created) is str:
+                raise RuntimeError(created)
+            report = GUIOperations.add_securities_to_instrument_list_in_chunks(formatted_securities, created["ListId"],
+                                                                               entity=entity)
+            if report["FailedChunks"]:
+                GUIOperations.delete_instrument_list(created["ListId"], entity)
+                raise RuntimeError(f"{len(report['FailedChunks'])} chunks of securities couldn't be added to the "
+                                   f"list {name}: {report['FailedChunks'][0]['Error']}")
+            renamed = GUIOperations.rename_instrument_list(created["ListId"], name, entity)
+            if type(renamed) is str:
+                # Another process completed the same list in the meantime
+                GUIOperations.delete_instrument_list(created["ListId"], entity)
+                existing = ListFields.list_available_instrument_lists_by_name(name, entity)
+                if type(existing) is dict and existing.get("ListId"):
+                    return existing["ListId"]
+                raise RuntimeError(renamed)
+            return created["ListId"]
+
+    @staticmethod
+    def get_or_create_template(template_type, fields, **conditions):
+        """
+        Return the id of the template with the given definition, creating it if it doesn't exist
+        :param str template_type: Type of the Template
+        :param list fields: List of fields of the template
+        :param conditions: any other argument accepted by GUIOperations.create_template
+        :return: the ReportTemplateId
+        :rtype: str
+        """
+        from RefinitivAPIClient.dss import GUIOperations, ListFields
+        name = ReusableObjects.template_name(template_type, fields, **conditions)
+        ReusableObjects.record_use("template", name)
+        existing = ListFields.list_available_templates_by_name(name)
+        if type(existing) is dict and existing.get("ReportTemplateId"):
+            print(f"Reusing template {name} with Id {existing['ReportTemplateId']}")
+            Tracing.annotate(reused=True)
+            return existing["ReportTemplateId"]
+        created = GUIOperations.create_template(template_type, fields, name,
+                                                **{k: v for k, v in conditions.items() if v is not None})
+        if type(created) is str:
+            existing = ListFields.list_available_templates_by_name(name)
+            if type(existing) is dict and existing.get("ReportTemplateId"):
+                return existing["ReportTemplateId"]
+            raise RuntimeError(created)
+        return created["ReportTemplateId"]
+
+    @staticmethod
+    def collect_garbage(max_age=timedelta(days=7), max_workers=8, dry_run=False):
+        """
+        Delete the instrument lists, the entity lists and the templates created automatically by the client which
+        haven't been used within max_age: the last use is the latest of their last modification and of the last time
+        they have been resolved by get_or_create_instrument_list or get_or_create_template. Both the timestamped and
+        the content-addressed objects are collected
+        :param timedelta max_age: age after which an object is expired
+        :param int max_workers: number of deletions sent at the same time
+        :param bool dry_run: if True, only return what would be deleted
+        :return: a dictionary with the names of the lists, entity lists and templates deleted
+        :rtype: dict
+        """
+        from RefinitivAPIClient.dss import GUIOperations, ListFields
+        threshold = datetime.now(timezone.utc) - max_age
+        last_uses = ReusableObjects.last_uses()
+        expired = list()
+        for kind, entity in [("list", False), ("entity_list", True)]:
+            lists = ListFields.list_available_instrument_lists(entity)
+            for subject_list in lists.get("value", list()) if type(lists) is dict else list():
+                last_use = max(ReusableObjects._last_change(subject_list),
+                               last_uses.get((kind, subject_list["Name"]), threshold))
+                if AUTO_CREATED_LIST.search(subject_list["Name"]) and last_use < threshold:
+                    expired.append((kind, subject_list["Name"], subject_list["ListId"]))
+        templates = ListFields.list_available_templates()
+        for template in templates.get("value", list()) if type(templates) is dict else list():
+            last_use = max(ReusableObjects._last_change(template), last_uses.get(("template", template["Name"]),
+                                                                                 threshold))
+            if AUTO_CREATED_TEMPLATE.search(template["Name"]) and last_use < threshold:
+                expired.append(("template", template["Name"], template["ReportTemplateId"]))
+        if dry_run:
+            return {kind + "s": [i[1] for i in expired if i[0] == kind] for kind in ["list", "entity_list", "template"]}
+
+        def delete(item):
+            kind, name, object_id = item
+            if kind == "template":
+                return GUIOperations.delete_template(object_id)
+            return GUIOperations.delete_instrument_list(object_id, kind == "entity_list")
+
+        outcomes = Utility.run_concurrently(delete, expired, max_workers)
+        deleted = {"lists": list(), "entity_lists": list(), "templates": list(), "errors": list()}
+        for (kind, name, _), outcome in zip(expired, outcomes):
+            if type(outcome) is str:
+                deleted["errors"].append(f"{name}: {outcome}")
+            else:
+                deleted[kind + "s"].append(name)
+        # The uses older than max_age are of objects expired or deleted elsewhere
+        with _uses["lock"]:
+            connection = ReusableObjects._uses_connection()
+            with connection:
+                connection.execute("DELETE FROM last_used WHERE used_at < ?", [threshold.timestamp()])
+        print(f"Deleted {len(deleted['lists'])} lists, {len(deleted['entity_lists'])} entity lists and "
+              f"{len(deleted['templates'])} templates")
+        return deleted
+
+    @staticmethod
+    def _last_change(dss_object):
+        """
+        Return the last modification (or creation) date of a DSS object
+        :param dict dss_object: list or template returned by DSS
+        :return: an aware datetime, or the current time if no date is available
+        :rtype: datetime
+        """
+        for key in ["Modified", "LastChangedDate", "Created", "CreateDate"]:
+            if dss_object.get(key):
+                parsed = parser.parse(dss_object[key])
+                return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc)
@@ -0,0 +1,133 @@
+"""Routing Module choosing between the on-demand and the scheduled extraction of a request"""
+
+from datetime import datetime, timedelta
+
+from dateutil import parser
+
+from RefinitivAPIClient.metrics import MetricsClass
+from RefinitivAPIClient.tracing import Tracing
+
+ON_DEMAND = "on_demand"
+SCHEDULED = "scheduled"
+
+# Templates whose on-demand extraction needs no Condition
+UNCONDITIONED_TEMPLATES = ["EndOfDayPricingReportTemplate", "TermsAndConditionsReportTemplate",
+                           "CompositeReportTemplate"]
+
+
+class ExtractionRouter:
+    """
+    Estimate the size of an extraction from the number of identifiers, fields and days requested, and route it to
+    ExtractWithNotes when it is small enough to be answered synchronously, or to a scheduled extraction downloaded as a
+    file otherwise. The thresholds are attributes which can be tuned at any time
+    """
+
+    def __init__(self, max_on_demand_identifiers=2000, max_on_demand_cells=1000000, scheduled_batch_size=50000):
+        """
+        Initialize the router with its thresholds
+        :param int max_on_demand_identifiers: maximum number of identifiers of an on-demand extraction
+        :param int max_on_demand_cells: maximum number of values (rows by fields) of an on-demand extraction
+        :param int scheduled_batch_size: number of identifiers of each batch of a scheduled extraction
+        """
+        self.max_on_demand_identifiers = max_on_demand_identifiers
+        self.max_on_demand_cells = max_on_demand_cells
+        self.scheduled_batch_size = scheduled_batch_size
+
+    @staticmethod
+    def rows_per_identifier(template_type, start_date=None, end_date=None):
+        """
+        Estimate the rows returned for each identifier: one per business day for the Price History, one otherwise
+        :param str template_type: template name
+        :param str or datetime start_date: start of the Price History
+        :param str or datetime end_date: end of the Price History. Default: today
+        :return: the estimated number of rows
+        :rtype: int
+        """
+        if template_type != "PriceHistoryReportTemplate" or not start_date:
+            return 1
+        start = start_date if isinstance(start_date, datetime) else parser.parse(start_date)
+        end = end_date if isinstance(end_date, datetime) else parser.parse(end_date) if end_date else datetime.now()
+        return max((end - start).days * 5 // 7, 1)
+
+    def estimate(self, identifiers, template_type, fields, start_date=None, end_date=None):
+        """
+        Estimate the number of values (rows by fields) of an extraction
+        :param int identifiers: number of identifiers
+        :param str template_type: template name
+        :param list fields: list of fields of the template
+        :param str start_date: start of the Price History
+        :param str end_date: end of the Price History
+        :return: the estimated number of values
+        :rtype: int
+        """
+        return identifiers * len(fields) * ExtractionRouter.rows_per_identifier(template_type, start_date, end_date)
+
+    def route(self, identifiers, template_type, fields, start_date=None, end_date=None, force=None):
+        """
+        Choose the path of an extraction and record the decision in the metrics
+        :param int identifiers: number of identifiers
+        :param str template_type: template name
+        :param list fields: list of fields of the template
+        :param str start_date: start of the Price History
+        :param str end_date: end of the Price History
+        :param str force: "on_demand" or "scheduled" to record a route chosen by the caller
+        :return: "on_demand" or "scheduled"
+        :rtype: str
+        """
+        if force not in [None, ON_DEMAND, SCHEDULED]:
+            raise ValueError(f"The route MUST be one of the following: {ON_DEMAND}, {SCHEDULED}")
+        cells = self.estimate(identifiers, template_type, fields, start_date, end_date)
+        on_demand = identifiers <= self.max_on_demand_identifiers and cells <= self.max_on_demand_cells
+        route = force if force else ON_DEMAND if on_demand else SCHEDULED
+        MetricsClass.increment("refinitiv_extraction_routes_total", labels={"route": route,
+                                                                            "template": template_type})
+        MetricsClass.observe("refinitiv_extraction_estimated_cells", cells, labels={"route": route},
+                             buckets=(1e3, 1e4, 1e5, 1e6, 1e7, 1e8))
+        Tracing.annotate(route=route, estimated_cells=cells)
+        print(f"Extraction of {identifiers} identifiers and {len(fields)} fields (about {cells} values) routed "
+              f"{route.replace('_', '-')}")
+        return route
+
+    @staticmethod
+    def default_start_date(template_type, start_date=None):
+        """
+        Return the start date of a Price History, defaulting to the one of Requests.request_price_history_data
+        :param str template_type: template name
+        :param str start_date: start date requested
+        :return: the start date, or None for the other templates
+        :rtype: str or None
+        """
+        if template_type != "PriceHistoryReportTemplate":
+            return None
+        return start_date if start_date else (datetime.now() - timedelta(days=1440)).strftime("%Y%m%d")
+
+    @staticmethod
+    def default_condition(template_type, start_date=None, end_date=None):
+        """
+        Return the Condition of an on-demand extraction matching the one GUIOperations.create_template gives to the
+        template of a scheduled extraction
+        :param str template_type: template name
+        :param str start_date: start of the Price History
+        :param str end_date: end of the Price History. Default: today
+        :return: the Condition, or None for the templates without a default one
+        :rtype: dict or None
+        """
+        if template_type == "PriceHistoryReportTemplate":
+            return {"QueryStartDate": parser.parse(start_date).isoformat() + "Z",
+                    "QueryEndDate": (parser.parse(end_date) if end_date else datetime.now()).isoformat() + "Z"}
+        if template_type == "CorporateActionsStandardReportTemplate":
+            condition = {"ReportDateRangeType": "Range", "PreviousDays": 30}
+            for flag in ["ExcludeDeletedEvents", "IncludeCapitalChangeEvents", "IncludeDividendEvents",
+                         "IncludeEarningsEvents", "IncludeMergersAndAcquisitionsEvents", "IncludeNominalValueEvents",
+                         "IncludePublicEquityOfferingsEvents", "IncludeSharesOutstandingEvents",
+                         "IncludeVotingRightsEvents"]:
+                condition[flag] = True
+            return condition
+        return None
+
+
+ExtractionRouterClass = ExtractionRouter()
+MetricsClass.describe("refinitiv_extraction_routes_total", "counter",
+                      "Extractions routed on-demand or scheduled by template")
+MetricsClass.describe("refinitiv_extraction_estimated_cells", "histogram",
+                      "Estimated number of values of the extractions routed")
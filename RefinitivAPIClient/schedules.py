@@ -0,0 +1,321 @@
+"""Schedules Module maintaining recurring DSS schedules and streaming their extractions into sinks"""
+
+import contextvars
+import threading
+
+from datetime import datetime, timezone
+from dateutil import parser
+
+from RefinitivAPIClient.codec import Codec
+from RefinitivAPIClient.metrics import MetricsClass
+from RefinitivAPIClient.tracing import Tracing
+from RefinitivAPIClient.utility import Utility
+
+RECURRENCES = {"daily": "DailyRecurrence", "weekly": "WeeklyRecurrence"}
+TRIGGERS = {"time": "TimeTrigger", "data_available": "DataAvailableTrigger"}
+SCHEDULE_TYPES = "#ThomsonReuters.Dss.Api.Extractions.Schedules."
+
+
+class ScheduleManager:
+    """
+    Maintain recurring schedules on DSS and watch all of them from a single monitoring loop. Each tick lists the
+    completed extractions with one request and streams the new files of the watched schedules into their sink, so the
+    runs need no list, template or schedule to be created
+    """
+
+    def __init__(self):
+        """Initialize the manager without any schedule watched"""
+        self._watched = dict()
+        self._remote = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def definition(name, list_id, report_id, recurrence="daily", at="00:00", days=None, trigger="time",
+                   limit_to_todays_data=False, time_zone=None):
+        """
+        Build the body of a recurring schedule
+        :param str name: Name of the schedule
+        :param str list_id: Hexadecimal value with the id of the instrument list
+        :param str report_id: Hexadecimal value with the id of the report
+        :param str recurrence: "daily" or "weekly"
+        :param str or list at: time or list of times of the day ("HH:MM") of a time trigger
+        :param list days: days of the week of a weekly recurrence, e.g. ["Monday", "Thursday"]
+        :param str trigger: "time", to run at the given times, or "data_available", to run as soon as the data of the
+        instruments is available
+        :param bool limit_to_todays_data: if True, the extraction includes only the data of the day
+        :param str time_zone: time zone of the times, e.g. "Eastern Standard Time". Default: the one of the account
+        :return: the body of the schedule
+        :rtype: dict
+        """
+        if recurrence not in RECURRENCES:
+            raise ValueError(f"The recurrence MUST be one of the following: {', '.join(RECURRENCES)}")
+        if trigger not in TRIGGERS:
+            raise ValueError(f"The trigger MUST be one of the following: {', '.join(TRIGGERS)}")
+        body = Codec.load_template("gui_recurring_schedule.json")
+        body["Name"] = name
+        body["ListId"] = list_id
+        body["ReportTemplateId"] = report_id
+        body["TimeZone"] = time_zone
+        body["Recurrence"]["@odata.type"] = SCHEDULE_TYPES + RECURRENCES[recurrence]
+        if recurrence == "weekly":
+            if not days:
+                raise ValueError("The days of the week are mandatory for a weekly recurrence")
+            body["Recurrence"]["Days"] = Utility.transform_in_list_of_elements(days)
+        body["Trigger"]["@odata.type"] = SCHEDULE_TYPES + TRIGGERS[trigger]
+        body["Trigger"]["LimitReportToTodaysData"] = limit_to_todays_data
+        if trigger == "time":
+            times = Utility.transform_in_list_of_elements(at)
+            body["Trigger"]["At"] = [{"Hour": int(i.split(":")[0]), "Minute": int(i.split(":")[1])} for i in times]
+        else:
+            del body["Trigger"]["At"]
+        return body
+
+    @staticmethod
+    def matches(existing, expected):
+        """
+        Check if a schedule returned by DSS has the values set by the caller, ignoring the values left to DSS (None)
+        and any other field DSS fills in
+        :param existing: schedule, or part of it, returned by DSS
+        :param expected: values set by the caller
+        :return: True if all the values set are the same
+        :rtype: bool
+        """
+        if isinstance(expected, dict):
+            return isinstance(existing, dict) and all(ScheduleManager.matches(existing.get(key), value)
+                                                      for key, value in expected.items() if value is not None)
+        if isinstance(expected, list):
+            return isinstance(existing, list) and len(existing) == len(expected) and \
+                all(ScheduleManager.matches(i, j) for i, j in zip(existing, expected))
+        return existing == expected
+
+    def remote_schedules(self, refresh=False):
+        """
+        Return the schedules existing on DSS. They are requested once and then kept up to date by the manager
+        :param bool refresh: if True, request them again
+        :return: a dictionary with the name of the schedule as key and the schedule as value, or a message of error
+        :rtype: dict or str
+        """
+        from RefinitivAPIClient.dss import ListFields
+        with self._lock:
+            if self._remote is not None and not refresh:
+                return self._remote
+        response = ListFields.list_schedules()
+        if type(response) is str:
+            return response
+        with self._lock:
+            self._remote = {i["Name"]: i for i in response.get("value", list())}
+            return self._remote
+
+    def ensure(self, name, list_id, report_id, sink, recurrence="daily", at="00:00", days=None, trigger="time",
+               limit_to_todays_data=False, time_zone=None, backfill=False):
+        """
+        Create the recurring schedule if it doesn't exist, recreate it if the values passed differ from the ones on
+        DSS, and watch it. An unchanged schedule costs no request
+        :param str name: Name of the schedule
+        :param str list_id: Hexadecimal value with the id of the instrument list
+        :param str report_id: Hexadecimal value with the id of the report
+        :param sink: sink from RefinitivAPIClient.sinks where to write the data of each extraction
+        :param str recurrence: "daily" or "weekly"
+        :param str or list at: time or list of times of the day ("HH:MM") of a time trigger
+        :param list days: days of the week of a weekly recurrence, e.g. ["Monday", "Thursday"]
+        :param str trigger: "time" or "data_available"
+        :param bool limit_to_todays_data: if True, the extraction includes only the data of the day
+        :param str time_zone: time zone of the times. Default: the one of the account
+        :param bool backfill: if True, the extractions already completed are streamed into the sink as well
+        :return: the id of the schedule or a message of error
+        :rtype: str
+        """
+        from RefinitivAPIClient.dss import GUIOperations
+        body = ScheduleManager.definition(name, list_id, report_id, recurrence, at, days, trigger,
+                                          limit_to_todays_data, time_zone)
+        remote = self.remote_schedules()
+        if type(remote) is str:
+            return remote
+        expected = {"ListId": list_id, "ReportTemplateId": report_id, "TimeZone": time_zone,
+                    "Recurrence": {"@odata.type": body["Recurrence"]["@odata.type"],
+                                   "Days": body["Recurrence"].get("Days")},
+                    "Trigger": {"@odata.type": body["Trigger"]["@odata.type"],
+                                "LimitReportToTodaysData": limit_to_todays_data, "At": body["Trigger"].get("At")}}
+        existing = remote.get(name)
+        if existing is not None and ScheduleManager.matches(existing, expected):
+            print(f"Schedule {name} is up to date with Id {existing['ScheduleId']}")
+        else:
+            if existing is not None:
+                print(f"Schedule {name} has changed: it will be recreated")
+                GUIOperations.delete_extraction_schedule(existing["ScheduleId"])
+            existing = GUIOperations.schedule_recurring_extraction(name, list_id, report_id, recurrence, at, days,
+                                                                   trigger, limit_to_todays_data, time_zone)
+            if type(existing) is str:
+                return existing
+            with self._lock:
+                self._remote[name] = existing
+        self.watch(name, sink, backfill)
+        return existing["ScheduleId"]
+
+    def watch(self, name, sink, backfill=False):
+        """
+        Stream the extractions of an existing schedule into a sink
+        :param str name: Name of the schedule
+        :param sink: sink from RefinitivAPIClient.sinks where to write the data of each extraction
+        :param bool backfill: if True, the extractions already completed are streamed into the sink as well
+        """
+        remote = self.remote_schedules()
+        if type(remote) is str or name not in remote:
+            raise ValueError(f"Schedule {name} not found on DSS")
+        with self._lock:
+            self._watched[name] = {"ScheduleId": remote[name]["ScheduleId"], "sink": sink, "seen": set(),
+                                   "in_flight": set(), "since": None if backfill else datetime.now(timezone.utc)}
+
+    def unwatch(self, name):
+        """
+        Stop streaming the extractions of a schedule, leaving it on DSS
+        :param str name: Name of the schedule
+        """
+        with self._lock:
+            self._watched.pop(name, None)
+
+    def remove(self, name):
+        """
+        Stop watching a schedule and delete it from DSS
+        :param str name: Name of the schedule
+        :return: the response of DSS or a message of error
+        :rtype: str or bytes
+        """
+        from RefinitivAPIClient.dss import GUIOperations
+        self.unwatch(name)
+        remote = self.remote_schedules()
+        if type(remote) is str or name not in remote:
+            return f"Schedule {name} not found on DSS"
+        response = GUIOperations.delete_extraction_schedule(remote[name]["ScheduleId"])
+        if type(response) is not str:
+            with self._lock:
+                self._remote.pop(name, None)
+        return response
+
+    def poll(self, max_workers=4):
+        """
+        Check, with a single request, the extractions completed on DSS and stream the new ones of the watched
+        schedules into their sinks. The extractions of a schedule are written in order, different schedules at the
+        same time
+        :param int max_workers: maximum number of schedules streamed at the same time
+        :return: a list of tuples (name of the schedule, ReportExtractionId, rows written)
+        :rtype: list
+        """
+        from RefinitivAPIClient.dss import ListFields
+        with Tracing.stage("poll_schedules"):
+            response = ListFields.list_completed_extractions()
+        if type(response) is str:
+            print(f"Completed extractions could not be listed: {response}")
+            return list()
+        with self._lock:
+            by_schedule_id = {entry["ScheduleId"]: name for name, entry in self._watched.items()}
+            pending = dict()
+            for extraction in response.get("value", list()):
+                name = by_schedule_id.get(extraction.get("ScheduleId"))
+                if name is None or extraction.get("Status") != "Completed":
+                    continue
+                entry = self._watched[name]
+                report_id = extraction["ReportExtractionId"]
+                if report_id in entry["seen"] or report_id in entry["in_flight"]:
+                    continue
+                if entry["since"] is not None and parser.parse(extraction["ExtractionDateUtc"]) < entry["since"]:
+                    entry["seen"].add(report_id)
+                    continue
+                # In flight until written: a concurrent poll skips it, a failed delivery is retried at the next one
+                entry["in_flight"].add(report_id)
+                pending.setdefault(name, list()).append(extraction)
+        delivered = Utility.run_concurrently(self._deliver, list(pending.items()), max_workers)
+        return sum(delivered, list())
+
+    def _deliver(self, item):
+        """
+        Download the new extractions of a schedule and write them into its sink, the oldest first. An extraction is
+        marked as seen only once written: if its download or its write fails, it is retried at the next check
+        :param tuple item: name of the schedule and list of its new completed extractions
+        :return: a list of tuples (name of the schedule, ReportExtractionId, rows written)
+        :rtype: list
+        """
+        from RefinitivAPIClient.dss import Operations
+        name, extractions = item
+        with self._lock:
+            entry = self._watched.get(name)
+        if entry is None:
+            return list()
+        delivered = list()
+        try:
+            for extraction in sorted(extractions, key=lambda i: i.get("ExtractionDateUtc", "")):
+                report_id = extraction["ReportExtractionId"]
+                with Tracing.stage("deliver", schedule=name, report_extraction_id=report_id):
+                    try:
+                        dataframe = Operations.download_extraction_in_dataframe(report_id)
+                    except Exception as e:
+                        dataframe = repr(e)
+                    if type(dataframe) is str:
+                        print(f"Extraction {report_id} of schedule {name} could not be downloaded, it will be retried "
+                              f"at the next check: {dataframe}")
+                        continue
+                    try:
+                        entry["sink"].write(dataframe)
+                    except Exception as e:
+                        print(f"Extraction {report_id} of schedule {name} could not be written in the sink, it will be "
+                              f"retried at the next check: {repr(e)}")
+                        continue
+                    Tracing.add_rows(len(dataframe))
+                with self._lock:
+                    entry["seen"].add(report_id)
+                    entry["in_flight"].discard(report_id)
+                MetricsClass.increment("refinitiv_scheduled_extractions_delivered_total", labels={"schedule": name})
+                print(f"Extraction {report_id} of schedule {name} written in the sink: {len(dataframe)} rows")
+                delivered.append((name, report_id, len(dataframe)))
+        finally:
+            # None of the extractions handed to this call stays in flight, whatever happened to them
+            with self._lock:
+                entry["in_flight"].difference_update(i["ReportExtractionId"] for i in extractions)
+        return delivered
+
+    def start(self, interval=60, max_workers=4):
+        """
+        Start the monitoring loop in a background thread, checking the completed extractions every interval seconds
+        :param int interval: number of seconds to wait between two checks
+        :param int max_workers: maximum number of schedules streamed at the same time
+        :return: the manager itself
+        :rtype: ScheduleManager
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=contextvars.copy_context().run, args=(self._loop, interval, max_workers),
+                                        name="ScheduleManager", daemon=True)
+        self._thread.start()
+        print(f"Monitoring {len(self._watched)} schedules every {interval} seconds")
+        return self
+
+    def _loop(self, interval, max_workers):
+        """
+        Body of the monitoring loop
+        :param int interval: number of seconds to wait between two checks
+        :param int max_workers: maximum number of schedules streamed at the same time
+        """
+        while not self._stop.is_set():
+            try:
+                self.poll(max_workers)
+            except Exception as e:
+                print(f"The check of the schedules failed, it will be retried in {interval} seconds: {e}")
+            self._stop.wait(interval)
+
+    def stop(self, timeout=None):
+        """
+        Stop the monitoring loop, waiting for the extractions being written
+        :param float timeout: maximum number of seconds to wait
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+ScheduleManagerClass = ScheduleManager()
+MetricsClass.describe("refinitiv_scheduled_extractions_delivered_total", "counter",
+                      "Extractions of the recurring schedules written in their sink")
@@ -0,0 +1,135 @@
+"""Sinks Module with the destinations where the extracted data can be written"""
+
+import os
+import threading
+
+import pandas as pd
+
+from RefinitivAPIClient.datashelf import PostgresClass
+
+
+class DataFrameSink:
+    """Keep the data in memory and return a single DataFrame"""
+
+    def __init__(self):
+        """Initialize the empty sink"""
+        self._frames = list()
+
+    def write(self, dataframe):
+        """
+        Add a DataFrame to the sink
+        :param pd.DataFrame dataframe: data to write
+        """
+        self._frames.append(dataframe)
+
+    def close(self):
+        """
+        Return all the data written
+        :return: a DataFrame with the data written, in order
+        :rtype: pd.DataFrame
+        """
+        if not self._frames:
+            return pd.DataFrame()
+        return pd.concat(self._frames, ignore_index=True) if len(self._frames) > 1 else self._frames[0]
+
+
+class CSVSink:
+    """Append the data to a CSV file"""
+
+    def __init__(self, path, append=False):
+        """
+        Initialize the sink. An existing file is overwritten at the first write, unless append is True
+        :param str path: name of the CSV file
+        :param bool append: if True, the data is appended to the existing file
+        """
+        self.path = path
+        self._header = not (append and os.path.isfile(path) and os.path.getsize(path) > 0)
+
+    def write(self, dataframe):
+        """
+        Append a DataFrame to the file
+        :param pd.DataFrame dataframe: data to write
+        """
+        dataframe.to_csv(self.path, mode="w" if self._header else "a", header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        """
+        Return the name of the file written
+        :return: the path of the CSV file
+        :rtype: str
+        """
+        return self.path
+
+
+class ParquetSink:
+    """Write the data as Parquet part files in a directory. It requires pyarrow or fastparquet"""
+
+    def __init__(self, path, append=False):
+        """
+        Initialize the sink, creating the directory if needed. Existing part files are overwritten, unless append is
+        True
+        :param str path: directory where to write the part files
+        :param bool append: if True, the part files are numbered after the existing ones
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._parts = len([i for i in os.listdir(path) if i.startswith("part-")]) if append else 0
+        self._lock = threading.Lock()
+
+    def next_part(self):
+        """
+        Reserve the name of the next part file
+        :return: the path of the part file
+        :rtype: str
+        """
+        with self._lock:
+            part = os.path.join(self.path, f"part-{self._parts:05d}.parquet")
+            self._parts += 1
+        return part
+
+    def write(self, dataframe):
+        """
+        Write a DataFrame in a new part file
+        :param pd.DataFrame dataframe: data to write
+        """
+        dataframe.to_parquet(self.next_part(), index=False)
+
+    def close(self):
+        """
+        Return the directory written
+        :return: the path of the directory with the part files
+        :rtype: str
+        """
+        return self.path
+
+
+class PostgresSink:
+    """Load the data in a Postgres table, replacing it at the first write unless appending"""
+
+    def __init__(self, table_name="RefinitivResults", db_conn=None, append=False):
+        """
+        Initialize the sink opening the connection to the database
+        :param str table_name: name of the table where to store the results
+        :param str db_conn: Postgres endpoint where to upload the data
+        :param bool append: if True, the data is appended to the existing table
+        """
+        self.table_name = table_name
+        self._postgres = PostgresClass(db_conn)
+        self._if_exists = "append" if append else "replace"
+
+    def write(self, dataframe):
+        """
+        Load a DataFrame in the table
+        :param pd.DataFrame dataframe: data to write
+        """
+        dataframe.to_sql(self.table_name, self._postgres.get_engine(), if_exists=self._if_exists, index=False)
+        self._if_exists = "append"
+
+    def close(self):
+        """
+        Return the location of the table
+        :return: a string with the database and the table written
+        :rtype: str
+        """
+        return f"{self._postgres.get_db_conn()}/{self.table_name}"
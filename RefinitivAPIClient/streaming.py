@@ -0,0 +1,229 @@
+"""Streaming Module to parse large ExtractWithNotes responses incrementally"""
+
+import codecs
+import json
+
+import pandas as pd
+
+from RefinitivAPIClient.buffers import ResultBuffer
+from RefinitivAPIClient.notes import ExtractionNotes
+
+
+class ExtractionStream:
+    """
+    Iterate over the Contents of an ExtractWithNotes response one row at a time, without loading the whole body.
+    The Notes array (and any other top-level key) is collected on the way and is available once the Contents have
+    been consumed
+    """
+
+    _decoder = json.JSONDecoder()
+    _whitespace = " \t\n\r"
+
+    def __init__(self, response, chunk_size=1024 * 1024):
+        """
+        Initialize the stream with a response opened with stream=True
+        :param requests.Response response: response of the ExtractWithNotes request
+        :param int chunk_size: number of bytes read from the socket at each iteration
+        """
+        self._chunks = response.iter_content(chunk_size=chunk_size) if hasattr(response, "iter_content") \
+            else iter(response)
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = str()
+        self._pos = 0
+        self._eof = False
+        self._state = "start"
+        self.bytes_read = 0
+        self.rows_read = 0
+        self.metadata = dict()
+        self._extraction_notes = None
+
+    @property
+    def notes(self):
+        """
+        Return the Notes array of the response. If the Contents haven't been consumed yet they are skipped
+        :return: a list with the notes of the extraction
+        :rtype: list
+        """
+        if self._state != "done":
+            for _ in self:
+                pass
+        return self.metadata.get("Notes", list())
+
+    @property
+    def extraction_notes(self):
+        """
+        Return the Notes of the response parsed in processing, instrument and quota figures. If the Contents haven't
+        been consumed yet they are skipped
+        :return: the parsed notes
+        :rtype: ExtractionNotes
+        """
+        if self._state != "done":
+            for _ in self:
+                pass
+        return self._extraction_notes
+
+    def __iter__(self):
+        """
+        Yield each element of the Contents array as soon as it is available
+        :return: a generator of dictionaries, one per row
+        :rtype: iterable
+        """
+        while self._state != "done":
+            if self._state == "start":
+                self._expect("{")
+                self._state = "key"
+            elif self._state == "key":
+                if self._peek() == "}":
+                    self._pos += 1
+                    self._state = "done"
+                    continue
+                key = self._decode_value()
+                self._expect(":")
+                if key == "Contents" and self._peek() == "[":
+                    self._pos += 1
+                    self._state = "contents"
+                else:
+                    self.metadata[key] = self._decode_value()
+                    self._state = "separator"
+            elif self._state == "contents":
+                if self._peek() == "]":
+                    self._pos += 1
+                    self._state = "separator"
+                    continue
+                row = self._decode_value()
+                if self._peek() == ",":
+                    self._pos += 1
+                self.rows_read += 1
+                yield row
+            elif self._state == "separator":
+                if self._peek() == ",":
+                    self._pos += 1
+                self._state = "key"
+        if self._extraction_notes is None:
+            self._extraction_notes = ExtractionNotes.from_body(self.metadata)
+
+    def iter_batches(self, batch_size=10000):
+        """
+        Yield the Contents in lists of batch_size rows
+        :param int batch_size: number of rows in each batch
+        :return: a generator of lists of dictionaries
+        :rtype: iterable
+        """
+        batch = list()
+        for row in self:
+            batch.append(row)
+            if len(batch) == batch_size:
+                yield batch
+                batch = list()
+        if batch:
+            yield batch
+
+    def to_columns(self, columns=None):
+        """
+        Consume the stream straight into column buffers, one list per field
+        :param list columns: optional list of fields to keep. If None, all the fields found are kept
+        :return: a dictionary of lists, one per column
+        :rtype: dict
+        """
+        buffers = dict()
+        for position, row in enumerate(self):
+            for field, value in row.items():
+                if columns is not None and field not in columns:
+                    continue
+                if field not in buffers:
+                    buffers[field] = [None] * position
+                buffers[field].append(value)
+            for field, values in buffers.items():
+                if len(values) == position:
+                    values.append(None)
+        return buffers
+
+    def to_pandas(self, columns=None):
+        """
+        Consume the stream in a DataFrame going through the column buffers
+        :param list columns: optional list of fields to keep
+        :return: a DataFrame with the Contents of the response
+        :rtype: pd.DataFrame
+        """
+        return pd.DataFrame(self.to_columns(columns), columns=columns)
+
+    def to_buffer(self, memory_limit=256 * 1024 * 1024, chunk_rows=10000, spill_dir=None):
+        """
+        Consume the stream in a ResultBuffer, spilling the rows to disk beyond memory_limit bytes
+        :param int memory_limit: number of bytes of rows kept in memory
+        :param int chunk_rows: number of rows of each chunk of the buffer
+        :param str spill_dir: directory where the spilled chunks are written. Default: the temporary directory
+        :return: a ResultBuffer with the Contents of the response
+        :rtype: ResultBuffer
+        """
+        buffer = ResultBuffer(memory_limit, chunk_rows, spill_dir)
+        buffer.extend(self)
+        buffer.notes = self.extraction_notes
+        return buffer
+
+    def _fill(self):
+        """
+        Read the next chunk from the response in the text buffer
+        :return: False when the response has been fully read
+        :rtype: bool
+        """
+        if self._eof:
+            return False
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            self._buffer += self._text_decoder.decode(b"", final=True)
+            return False
+        self.bytes_read += len(chunk)
+        self._buffer += self._text_decoder.decode(chunk)
+        return True
+
+    def _skip_whitespace(self):
+        """Move the cursor to the next meaningful character, reading more data if needed"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in self._whitespace:
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill():
+                return
+
+    def _peek(self):
+        """
+        Return the next meaningful character without consuming it
+        :return: a single character or an empty string at the end of the response
+        :rtype: str
+        """
+        self._skip_whitespace()
+        return self._buffer[self._pos:self._pos + 1]
+
+    def _expect(self, char):
+        """
+        Consume the given character or raise an error if the response doesn't match the expected layout
+        :param str char: character expected at the cursor position
+        """
+        if self._peek() != char:
+            raise ValueError(f"Malformed ExtractWithNotes response: expected '{char}' at position {self._pos}")
+        self._pos += 1
+
+    def _decode_value(self):
+        """
+        Decode the next JSON value at the cursor position, reading more data until it is complete
+        :return: the decoded value
+        :rtype: dict or list or str or int or float or bool or None
+        """
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return value
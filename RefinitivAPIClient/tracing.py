@@ -0,0 +1,204 @@
+"""Tracing Module recording the stages of the Operations workflows"""
+
+import contextlib
+import contextvars
+import json
+import threading
+import time
+
+from datetime import datetime, timezone
+
+from RefinitivAPIClient.metrics import MetricsClass
+
+_current_trace = contextvars.ContextVar("refinitiv_current_trace", default=None)
+_current_span = contextvars.ContextVar("refinitiv_current_span", default=None)
+
+
+class Span:
+    """A single stage of a workflow run"""
+
+    def __init__(self, name, parent=None):
+        """
+        Initialize the span, starting its clock
+        :param str name: name of the stage
+        :param Span parent: span of the enclosing stage, if any
+        """
+        self.name = name
+        self.parent = parent
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.wall_time = None
+        self.requests = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.rows = 0
+        self.attributes = dict()
+        self.error = None
+
+    def finish(self):
+        """Stop the clock of the span"""
+        self.wall_time = time.perf_counter() - self.start
+
+    def to_dict(self):
+        """
+        Return the span as a dictionary
+        :return: a dictionary with the measures of the stage
+        :rtype: dict
+        """
+        return {"name": self.name, "parent": self.parent.name if self.parent else None,
+                "started_at": self.started_at.isoformat().replace("+00:00", "Z"), "wall_time": self.wall_time,
+                "requests": self.requests, "bytes_in": self.bytes_in, "bytes_out": self.bytes_out, "rows": self.rows,
+                "attributes": self.attributes, "error": self.error}
+
+
+class Trace:
+    """
+    Collect the spans of a workflow run. The stages of a trace may run on several threads at the same time, so the
+    counters of its spans are updated holding the lock of the trace
+    """
+
+    def __init__(self, name):
+        """
+        Initialize an empty trace
+        :param str name: name of the workflow
+        """
+        self.name = name
+        self.spans = list()
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.wall_time = None
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Make the trace the active one for the stages run within the context"""
+        token = _current_trace.set(self)
+        try:
+            yield self
+        finally:
+            self.wall_time = time.perf_counter() - self.start
+            _current_trace.reset(token)
+
+    def add(self, span):
+        """
+        Add a span to the trace
+        :param Span span: span to add
+        """
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self):
+        """
+        Return the trace as a dictionary
+        :return: a dictionary with the trace and all its spans
+        :rtype: dict
+        """
+        with self._lock:
+            spans = [i.to_dict() for i in self.spans]
+        return {"name": self.name, "started_at": self.started_at.isoformat().replace("+00:00", "Z"),
+                "wall_time": self.wall_time, "spans": spans}
+
+    def summary(self):
+        """
+        Return a human readable table of the stages
+        :return: a string with one line per stage
+        :rtype: str
+        """
+        lines = [f"{self.name}: {self.wall_time or 0:.3f}s"]
+        for span in self.spans:
+            name = f"{span.parent.name}/{span.name}" if span.parent else span.name
+            lines.append(f"\t{name:<48} {span.wall_time or 0:>9.3f}s {span.requests:>5} calls "
+                         f"{span.bytes_in:>12} B in {span.rows:>10} rows")
+        return "\n".join(lines)
+
+    def export(self, destination):
+        """
+        Export the trace to a callback or append it as a JSON line to a file
+        :param callable or str destination: function accepting the trace dictionary or name of the file
+        """
+        if callable(destination):
+            return destination(self.to_dict())
+        with open(destination, "a") as a:
+            a.write(json.dumps(self.to_dict(), default=str) + "\n")
+
+
+class Tracing:
+    """Helpers to record stages in the active trace. Without an active trace, they do nothing"""
+
+    @staticmethod
+    def current_trace():
+        """
+        Return the active trace
+        :return: the trace or None
+        :rtype: Trace
+        """
+        return _current_trace.get()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def stage(name, **attributes):
+        """
+        Record a stage of the active trace, timing the code run within the context
+        :param str name: name of the stage
+        :param attributes: additional attributes stored in the span
+        """
+        trace = _current_trace.get()
+        if trace is None:
+            yield None
+            return
+        span = Span(name, _current_span.get())
+        span.attributes.update(attributes)
+        trace.add(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = repr(e)
+            raise
+        finally:
+            span.finish()
+            _current_span.reset(token)
+
+    @staticmethod
+    def add_rows(rows):
+        """
+        Add the rows processed to the current stage
+        :param int rows: number of rows
+        """
+        span = _current_span.get()
+        trace = _current_trace.get()
+        if span is not None and trace is not None:
+            with trace._lock:
+                span.rows += rows
+
+    @staticmethod
+    def annotate(**attributes):
+        """
+        Add attributes to the current stage
+        :param attributes: attributes stored in the span
+        """
+        span = _current_span.get()
+        trace = _current_trace.get()
+        if span is not None and trace is not None:
+            with trace._lock:
+                span.attributes.update(attributes)
+
+    @staticmethod
+    def record_request(record):
+        """
+        Metrics hook adding the bytes of each HTTP call to the current stage and its parents
+        :param RefinitivAPIClient.metrics.RequestRecord record: measures of the call
+        """
+        span = _current_span.get()
+        trace = _current_trace.get()
+        if span is None or trace is None:
+            return
+        with trace._lock:
+            while span is not None:
+                span.requests += 1
+                span.bytes_in += record.bytes_in
+                span.bytes_out += record.bytes_out
+                span = span.parent
+
+
+MetricsClass.add_hook(Tracing.record_request)
@@ -0,0 +1,267 @@
+"""Transport Module wrapping every HTTP call made to DSS with retries and instrumentation"""
+
+import re
+import socket
+import threading
+import time
+
+import requests
+
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+from RefinitivAPIClient.datashelf import Datashelf
+from RefinitivAPIClient.dss_requests import ENDPOINT
+from RefinitivAPIClient.identifiers import IdentifierBatch
+from RefinitivAPIClient.metrics import MetricsClass, RequestRecord
+
+# Connections kept alive per host: the most threads calling DSS at the same time (Utility.run_concurrently runs up to
+# 32 by default)
+POOL_SIZE = 32
+
+_connection_timings = threading.local()
+
+
+class _TimedConnectionMixin:
+    """Measure the DNS resolution and the connection (TCP and TLS) time of new connections"""
+
+    def _new_conn(self):
+        """
+        Resolve the host, timing the lookup, then let urllib3 connect to the addresses found in turn
+        :return: the connected socket
+        :rtype: socket.socket
+        """
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host.strip("[]"), self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NewConnectionError(self, f"Failed to resolve {host}: {e}") from e
+        finally:
+            _connection_timings.dns = time.perf_counter() - start
+        error = NewConnectionError(self, f"No address found for {host}")
+        try:
+            for address in dict.fromkeys(i[4][0] for i in addresses):
+                # A numeric address is resolved by urllib3 without another lookup
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    error = e
+            raise error
+        finally:
+            self._dns_host = host
+
+    def connect(self):
+        """Open the connection, storing the timings in a thread-local for the Transport"""
+        start = time.perf_counter()
+        _connection_timings.dns = 0.0
+        super().connect()
+        _connection_timings.connect = time.perf_counter() - start - _connection_timings.dns
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools create timed connections"""
+
+    _pool_classes = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._pool_classes
+
+    def proxy_manager_for(self, *args, **kwargs):
+        manager = super().proxy_manager_for(*args, **kwargs)
+        manager.pool_classes_by_scheme = self._pool_classes
+        return manager
+
+
+def _build_session(pool_size=POOL_SIZE):
+    """
+    Build the session shared by all the calls, which keeps the connections to DSS alive
+    :param int pool_size: number of connections kept alive per host
+    :return: a session with the timed adapters mounted
+    :rtype: requests.Session
+    """
+    session = requests.Session()
+    session.mount("http://", _TimedAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+    session.mount("https://", _TimedAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+    return session
+
+
+class Transport:
+    """
+    Send the HTTP calls to DSS, retrying throttled calls and recording the metrics of each call. A call failing on a
+    connection error is retried only if its method is idempotent or if the connection failed before the call was sent,
+    so that a POST processed by DSS is never replayed. A RateLimiter assigned to rate_limiter keeps all the calls to
+    the DSS endpoint within its budget. The session keeps up to POOL_SIZE connections alive per host, see
+    set_pool_size to serve more threads at the same time. The headers, the proxy and the rate limiter of the account
+    are the ones of the Datashelf active in the calling context
+    """
+
+    session = _build_session()
+    max_retries = 3
+    retry_statuses = [429, 503]
+    idempotent_methods = ["GET", "PUT", "DELETE"]
+    backoff = 1.0
+    rate_limiter = None
+
+    @staticmethod
+    def set_pool_size(pool_size):
+        """
+        Replace the shared session with one keeping pool_size connections alive per host. Above that number of
+        calls in flight, the extra connections are closed once used instead of being reused. The calls in flight
+        complete on the previous session
+        :param int pool_size: maximum number of calls made at the same time
+        """
+        Transport.session = _build_session(pool_size)
+
+    @staticmethod
+    def endpoint_name(url):
+        """
+        Name of the endpoint of a url, with the ids replaced by a placeholder to keep the metrics cardinality low
+        :param str url: url of the call
+        :return: a string with the endpoint
+        :rtype: str
+        """
+        if not url.startswith(ENDPOINT):
+            return urlparse(url).netloc
+        return re.sub(r"([(=])'[^']*'", r"\1'{id}'", url[len(ENDPOINT):])
+
+    @staticmethod
+    def retryable(method, error):
+        """
+        Check if a call which failed on a connection error can be sent again
+        :param str method: HTTP method of the call
+        :param requests.exceptions.ConnectionError error: error raised by the call
+        :return: True if the method is idempotent or the connection failed before the call was sent
+        :rtype: bool
+        """
+        if method.upper() in Transport.idempotent_methods or isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+
+    @staticmethod
+    def request(method, url, headers=None, json=None, data=None, stream=False, allow_redirects=True):
+        """
+        Send an HTTP call to DSS with the headers and proxy of the active Datashelf, retrying on throttling and on the
+        connection errors which are safe to retry
+        :param str method: HTTP method
+        :param str url: url of the call
+        :param dict headers: headers of the call. If None, the DSS session headers are used
+        :param dict json: body to send serialized as JSON. It may contain IdentifierBatch objects
+        :param bytes data: body to send as it is
+        :param bool stream: if True, the body of the response isn't read
+        :param bool allow_redirects: follow the redirects
+        :return: the response of the call
+        :rtype: requests.Response
+        """
+        datashelf = Datashelf.current()
+        headers = headers if headers is not None else datashelf.dss_headers
+        if json is not None:
+            # Bodies are serialized here so that the IdentifierBatch they contain are spliced without conversion
+            data = IdentifierBatch.dumps(json)
+            json = None
+            if "Content-Type" not in headers:
+                headers = dict(headers, **{"Content-Type": "application/json"})
+        record = RequestRecord(method, url, Transport.endpoint_name(url))
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            if Transport.rate_limiter is not None and url.startswith(ENDPOINT):
+                Transport.rate_limiter.acquire()
+            if datashelf.rate_limiter is not None and url.startswith(ENDPOINT):
+                datashelf.rate_limiter.acquire()
+            _connection_timings.dns = 0.0
+            _connection_timings.connect = 0.0
+            try:
+                response = Transport.session.request(method, url, headers=headers, json=json, data=data,
+                                                     proxies=datashelf.proxy, verify=False, stream=stream,
+                                                     allow_redirects=allow_redirects)
+            except requests.exceptions.ConnectionError as e:
+                if attempt >= Transport.max_retries or not Transport.retryable(method, e):
+                    record.error = repr(e)
+                    record.retries = attempt
+                    record.total = time.perf_counter() - start
+                    MetricsClass.record_request(record)
+                    raise
+                attempt += 1
+                time.sleep(Transport.backoff * 2 ** (attempt - 1))
+                continue
+            if response.status_code not in Transport.retry_statuses or attempt >= Transport.max_retries:
+                break
+            attempt += 1
+            retry_after = response.headers.get("Retry-After")
+            response.close()
+            time.sleep(float(retry_after) if retry_after and retry_after.isdigit()
+                       else Transport.backoff * 2 ** (attempt - 1))
+        record.status = response.status_code
+        record.retries = attempt
+        record.dns = _connection_timings.dns
+        record.connect = _connection_timings.connect
+        record.ttfb = response.elapsed.total_seconds()
+        record.bytes_out = len(response.request.body or b"") if response.request is not None else 0
+        record.bytes_in = int(response.headers.get("Content-Length") or 0) if stream else len(response.content)
+        record.total = time.perf_counter() - start
+        MetricsClass.record_request(record)
+        return response
+
+    @staticmethod
+    def get(url, **kwargs):
+        """
+        Send a GET call to DSS
+        :param str url: url of the call
+        :return: the response of the call
+        :rtype: requests.Response
+        """
+        return Transport.request("GET", url, **kwargs)
+
+    @staticmethod
+    def post(url, **kwargs):
+        """
+        Send a POST call to DSS
+        :param str url: url of the call
+        :return: the response of the call
+        :rtype: requests.Response
+        """
+        return Transport.request("POST", url, **kwargs)
+
+    @staticmethod
+    def put(url, **kwargs):
+        """
+        Send a PUT call to DSS
+        :param str url: url of the call
+        :return: the response of the call
+        :rtype: requests.Response
+        """
+        return Transport.request("PUT", url, **kwargs)
+
+    @staticmethod
+    def delete(url, **kwargs):
+        """
+        Send a DELETE call to DSS
+        :param str url: url of the call
+        :return: the response of the call
+        :rtype: requests.Response
+        """
+        return Transport.request("DELETE", url, **kwargs)
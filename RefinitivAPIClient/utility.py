@@ -1,11 +1,49 @@
 """Utility Module containing utility classes"""
 
+import contextvars
+import io
+import os
 import pandas as pd
 import pickle
 import requests
+import threading
+import time
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from dateutil import parser
 
+from RefinitivAPIClient.identifiers import IdentifierBatch
+
+
+class RateLimiter:
+    """Token bucket shared by threads to keep the calls within a rate budget"""
+
+    def __init__(self, rate, burst=None):
+        """
+        Initialize a full bucket
+        :param float rate: number of calls allowed per second
+        :param int burst: number of calls which can be sent at once. Default: one second of calls
+        """
+        self.rate = rate
+        self.burst = burst if burst else max(int(rate), 1)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call is allowed by the budget"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
 
 class Utility:
     """Static class to contain methods"""
@@ -42,15 +80,109 @@ class Utility:
         return pd.DataFrame(response)
 
     @staticmethod
-    def read_csv(filename):
+    def read_csv(filename, chunksize=None):
         """
-        Read the CSV filename and returns a Pandas DataFrame
+        Read the CSV filename and returns a Pandas DataFrame. A gzip-compressed file is decompressed whatever its
+        extension
         :param str filename: name of the file to read and process
+        :param int chunksize: if given, return an iterator of DataFrames of chunksize rows instead
         :return: a DataFrame with the parsed CSV file
-        :rtype: pd.DataFrame
+        :rtype: pd.DataFrame or iterable
         """
-        return pd.read_csv(filename, low_memory=False)
-        
+        compression = "gzip" if Utility.is_gzip_file(filename) else "infer"
+        return pd.read_csv(filename, low_memory=False, chunksize=chunksize, compression=compression)
+
+    @staticmethod
+    def split_file_at_lines(filename, ranges, min_range_size=16 * 1024 * 1024):
+        """
+        Split a text file in byte ranges ending at a line boundary, skipping the header line
+        :param str filename: name of the file to split
+        :param int ranges: number of ranges wanted
+        :param int min_range_size: minimum size in bytes of each range
+        :return: the header line and the list of (start, end) byte offsets
+        :rtype: tuple
+        """
+        size = os.path.getsize(filename)
+        with open(filename, "rb") as r:
+            header = r.readline()
+            start = r.tell()
+            step = max((size - start) // max(ranges, 1), min_range_size)
+            offsets = list()
+            while start < size:
+                r.seek(min(start + step, size))
+                r.readline()
+                end = min(r.tell(), size)
+                offsets.append((start, end))
+                start = end
+        return header, offsets
+
+    @staticmethod
+    def read_csv_range(filename, header, start, end, parquet_part=None):
+        """
+        Parse a byte range of a CSV file. Used by read_csv_in_parallel in the worker processes
+        :param str filename: name of the CSV file
+        :param bytes header: header line of the file
+        :param int start: first byte of the range
+        :param int end: byte after the end of the range
+        :param str parquet_part: if given, write the range in this Parquet file instead of returning it
+        :return: the DataFrame with the rows of the range, or the number of rows written
+        :rtype: pd.DataFrame or int
+        """
+        with open(filename, "rb") as r:
+            r.seek(start)
+            dataframe = pd.read_csv(io.BytesIO(header + r.read(end - start)), low_memory=False)
+        if parquet_part is None:
+            return dataframe
+        dataframe.to_parquet(parquet_part, index=False)
+        return len(dataframe)
+
+    @staticmethod
+    def read_csv_in_parallel(filename, processes=None, sink=None, min_range_size=16 * 1024 * 1024):
+        """
+        Read a large CSV file splitting it at line boundaries and parsing the ranges in a pool of processes. Fields
+        with line breaks within quotes aren't supported. Compressed files and files without rows are read with read_csv
+        :param str filename: name of the file to read and process
+        :param int processes: number of processes. Default: number of CPUs
+        :param sink: optional sink from RefinitivAPIClient.sinks. A ParquetSink gets one part file per range written
+        directly by the workers, any other sink gets the DataFrame of each range in order
+        :param int min_range_size: minimum size in bytes of each range
+        :return: a DataFrame with the parsed CSV file, or the output of the sink
+        :rtype: pd.DataFrame or str
+        """
+        processes = processes if processes else os.cpu_count()
+        header, offsets = (None, list()) if Utility.is_gzip_file(filename) else \
+            Utility.split_file_at_lines(filename, processes, min_range_size)
+        if not offsets:
+            # Compressed or without rows after the header: nothing to split
+            dataframe = Utility.read_csv(filename)
+            if sink is None:
+                return dataframe
+            sink.write(dataframe)
+            return sink.close()
+        parts = [sink.next_part() if hasattr(sink, "next_part") else None for _ in offsets]
+        with ProcessPoolExecutor(max_workers=min(processes, len(offsets))) as executor:
+            futures = [executor.submit(Utility.read_csv_range, filename, header, start, end, part)
+                       for (start, end), part in zip(offsets, parts)]
+            if sink is None:
+                return pd.concat([future.result() for future in futures], ignore_index=True)
+            for future, part in zip(futures, parts):
+                if part is None:
+                    sink.write(future.result())
+                else:
+                    future.result()
+        return sink.close()
+
+    @staticmethod
+    def is_gzip_file(filename):
+        """
+        Check if a file on disk is gzip-compressed looking at its magic number
+        :param str filename: name of the file to check
+        :return: True if the file is gzip-compressed
+        :rtype: bool
+        """
+        with open(filename, "rb") as r:
+            return r.read(2) == b"\x1f\x8b"
+
     @staticmethod
     def select_proxy(proxy):
         """
@@ -59,6 +191,8 @@ class Utility:
         :return: a dictionary with the correct proxy addresses
         :rtype: dict
         """
+        if not any(proxy.values()):
+            return proxy
         try:
             requests.get("https://www.google.com", proxies=proxy, verify=False)
         except requests.exceptions.ProxyError:
@@ -68,12 +202,13 @@ class Utility:
         return proxy
 
     @staticmethod
-    def format_identifiers(ids):
+    def format_identifiers(ids, as_batch=False):
         """
         Format the identifiers according to their layout
         :param: list or str ids: list of the identifiers to format
+        :param bool as_batch: if True, return an IdentifierBatch instead of a list of tuples
         :return: a list of tuples formatted ids
-        :rtype: list
+        :rtype: list or IdentifierBatch
         """
         if type(ids) is str:
             input_ids = ids.split(",")
@@ -95,7 +230,7 @@ class Utility:
                 formatted_ids.append((single_id, "Ticker"))
             else:
                 print(f"No id_type recognized for {single_id}. Skipping it...")
-        return formatted_ids
+        return IdentifierBatch.from_tuples(formatted_ids) if as_batch else formatted_ids
 
     @staticmethod
     def split_list(identifiers, chunks=100):
@@ -106,8 +241,6 @@ class Utility:
         :return: a dictionary of chunks
         :rtype: iterable
         """
-        if len(identifiers) < chunks:
-            return identifiers
         for i in range(0, len(identifiers), chunks):
             yield identifiers[i:i + chunks]
 
@@ -134,6 +267,24 @@ class Utility:
             results.append(list_to_convert[len(list_to_convert) - reminder:len(list_to_convert)])
             return results
 
+    @staticmethod
+    def run_concurrently(func, items, max_workers=None):
+        """
+        Call func on each item in a pool of threads, each call running in a copy of the caller's context
+        :param callable func: function accepting a single item
+        :param list items: items to process
+        :param int max_workers: maximum number of threads. If None, one thread per item (up to 32)
+        :return: a list with the results, in the same order of the items
+        :rtype: list
+        """
+        items = list(items)
+        if not items:
+            return list()
+        max_workers = max_workers if max_workers else min(32, len(items))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, func, item) for item in items]
+            return [future.result() for future in futures]
+
     @staticmethod
     def get_valid_token():
         """
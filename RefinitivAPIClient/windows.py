@@ -0,0 +1,181 @@
+"""Windows Module splitting long Price History requests in identifier batches by time windows fetched concurrently"""
+
+import threading
+
+from datetime import datetime, timedelta
+
+from dateutil import parser
+
+from RefinitivAPIClient.codec import Codec
+from RefinitivAPIClient.metrics import MetricsClass
+from RefinitivAPIClient.notes import ExtractionNotes, ExtractionResult
+from RefinitivAPIClient.tracing import Tracing
+from RefinitivAPIClient.utility import Utility
+
+
+class TimeWindowSharder:
+    """
+    Split a Price History request in shards small enough to be answered on-demand: batches of identifiers by windows
+    of dates, sized from the expected number of rows per identifier and day. The shards are requested at the same time
+    and their rows merged in (Identifier, Trade Date) order. Consecutive windows share their boundary day, so the rows
+    of that day are requested twice and deduplicated. An adaptive sharder keeps the density observed by its requests
+    for each type of identifier, so the windows of the instruments trading less often grow over time. The shared
+    TimeWindowSharderClass is not adaptive: every request is sized from rows_per_day
+    """
+
+    def __init__(self, max_rows_per_request=100000, max_identifiers_per_request=2000, min_window_days=30,
+                 rows_per_day=5 / 7, max_workers=8, adaptive=False):
+        """
+        Initialize the sharder with its limits
+        :param int max_rows_per_request: maximum number of rows expected from each shard
+        :param int max_identifiers_per_request: maximum number of identifiers of each shard
+        :param int min_window_days: minimum number of days of a window. Batches of identifiers are made smaller first
+        :param float rows_per_day: expected number of rows per identifier and calendar day (business days by default)
+        :param int max_workers: number of shards requested at the same time
+        :param bool adaptive: if True, size the next requests from the density observed for each type of identifier
+        """
+        self.max_rows_per_request = max_rows_per_request
+        self.max_identifiers_per_request = max_identifiers_per_request
+        self.min_window_days = min_window_days
+        self.rows_per_day = rows_per_day
+        self.max_workers = max_workers
+        self.adaptive = adaptive
+        self.observed = dict()
+        self._lock = threading.Lock()
+
+    def plan(self, identifiers, days, rows_per_day=None):
+        """
+        Size the batches of identifiers and the windows of dates
+        :param int identifiers: number of identifiers requested
+        :param int days: number of days requested
+        :param float rows_per_day: expected number of rows per identifier and day. Default: the one of the sharder
+        :return: the number of identifiers of each batch and the number of days of each window
+        :rtype: tuple
+        """
+        rows_per_day = rows_per_day or self.rows_per_day
+        batch_size = max(min(identifiers, self.max_identifiers_per_request), 1)
+        window_days = int(self.max_rows_per_request / (batch_size * rows_per_day))
+        if window_days < self.min_window_days:
+            batch_size = max(int(self.max_rows_per_request / (self.min_window_days * rows_per_day)), 1)
+            window_days = max(int(self.max_rows_per_request / (batch_size * rows_per_day)), 1)
+        return batch_size, max(min(window_days, days), 1)
+
+    def density(self, identifier_types):
+        """
+        Return the expected number of rows per identifier and day of a request
+        :param list identifier_types: types of the identifiers requested
+        :return: the highest density observed among the types if the sharder is adaptive, rows_per_day otherwise
+        :rtype: float
+        """
+        with self._lock:
+            observed = [self.observed[i] for i in set(identifier_types) if i in self.observed]
+        return max(observed) if self.adaptive and observed else self.rows_per_day
+
+    def observe(self, identifier_type, rows, identifiers, days):
+        """
+        Blend the density observed by a request into the one expected for its type of identifier
+        :param str identifier_type: type of the identifiers requested
+        :param int rows: number of rows returned
+        :param int identifiers: number of identifiers requested
+        :param int days: number of days requested
+        """
+        if not self.adaptive or not identifiers or not rows:
+            return
+        with self._lock:
+            expected = self.observed.get(identifier_type, self.rows_per_day)
+            self.observed[identifier_type] = max((expected + rows / (identifiers * days)) / 2, 0.05)
+
+    @staticmethod
+    def windows(start, end, window_days):
+        """
+        Split a range of dates in windows of window_days days, each one starting on the last day of the previous one
+        :param datetime start: first day of the range
+        :param datetime end: last day of the range
+        :param int window_days: number of days of each window
+        :return: a list of tuples with pair (start, end)
+        :rtype: list
+        """
+        windows = list()
+        window_start = start
+        while True:
+            window_end = min(window_start + timedelta(days=window_days), end)
+            windows.append((window_start, window_end))
+            if window_end >= end:
+                return windows
+            window_start = window_end
+
+    @staticmethod
+    def merge(results):
+        """
+        Merge the rows of the shards in (Identifier, Trade Date) order, dropping the rows of the boundary days
+        requested twice
+        :param list results: list of lists of rows
+        :return: the merged rows and the number of duplicates dropped
+        :rtype: tuple
+        """
+        seen = set()
+        rows = list()
+        for result in results:
+            for row in result:
+                key = (row.get("IdentifierType"), row.get("Identifier"), row.get("Trade Date"))
+                if key in seen:
+                    continue
+                seen.add(key)
+                rows.append(row)
+        rows.sort(key=lambda row: (str(row.get("Identifier")), str(row.get("Trade Date") or "")))
+        return rows, sum(len(i) for i in results) - len(rows)
+
+    def request(self, sec_list, start_date=None, end_date=None, fields=None, max_workers=None):
+        """
+        Request the Price History of the securities splitting it in shards fetched concurrently
+        :param list or IdentifierBatch sec_list: List of tuples with pair (identifier, identifierType)
+        :param str start_date: first day of the history. Default: 1440 days ago
+        :param str end_date: last day of the history. Default: today
+        :param list fields: fields of the history. Default: the ones of price_history_request.json. Trade Date is
+        always requested, to merge the shards
+        :param int max_workers: number of shards requested at the same time. Default: the one of the sharder
+        :return: the merged rows with the combined notes of the shards, or the message of error of the first shard
+        which failed
+        :rtype: ExtractionResult or str
+        """
+        from RefinitivAPIClient.dss import Requests
+
+        start = parser.parse(start_date) if start_date else datetime.now() - timedelta(days=1440)
+        end = parser.parse(end_date) if end_date else datetime.now()
+        if fields is None:
+            fields = Codec.load_template("price_history_request.json")["ExtractionRequest"]["ContentFieldNames"]
+        fields = Utility.transform_in_list_of_elements(fields)
+        fields = fields if "Trade Date" in fields else fields + ["Trade Date"]
+        identifiers = list(dict.fromkeys((i[0], i[1]) for i in sec_list))
+        days = (end - start).days + 1
+        batch_size, window_days = self.plan(len(identifiers), days, self.density([i[1] for i in identifiers]))
+        shards = [(identifiers[i:i + batch_size], window)
+                  for i in range(0, len(identifiers), batch_size)
+                  for window in TimeWindowSharder.windows(start, end, window_days)]
+        print(f"Price History of {len(identifiers)} identifiers over {days} days split in {len(shards)} shards of "
+              f"{batch_size} identifiers by {window_days} days")
+
+        def fetch(shard):
+            batch, (window_start, window_end) = shard
+            condition = {"QueryStartDate": window_start.isoformat() + "Z", "QueryEndDate": window_end.isoformat() + "Z"}
+            return Requests.request_extraction(batch, "PriceHistoryReportTemplate", fields, condition=condition)
+
+        with Tracing.stage("sharded_price_history", shards=len(shards), batch_size=batch_size,
+                           window_days=window_days):
+            results = Utility.run_concurrently(fetch, shards, max_workers or self.max_workers)
+            MetricsClass.increment("refinitiv_price_history_shards_total", len(shards))
+            errors = [i for i in results if type(i) is str]
+            if errors:
+                return errors[0]
+            rows, duplicates = TimeWindowSharder.merge(results)
+            Tracing.add_rows(len(rows))
+            Tracing.annotate(duplicates=duplicates)
+        for identifier_type in dict.fromkeys(i[1] for i in identifiers):
+            self.observe(identifier_type, sum(1 for i in rows if i.get("IdentifierType") == identifier_type),
+                         sum(1 for i in identifiers if i[1] == identifier_type), days)
+        return ExtractionResult(rows, ExtractionNotes.combine([getattr(i, "notes", None) for i in results]))
+
+
+TimeWindowSharderClass = TimeWindowSharder()
+MetricsClass.describe("refinitiv_price_history_shards_total", "counter",
+                      "Requests the sharded Price History extractions have been split in")
@@ -0,0 +1,237 @@
+"""Cross-Reference Module storing the identifiers resolved by the searches and the extractions"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from datetime import timedelta
+
+from RefinitivAPIClient.codec import Codec
+from RefinitivAPIClient.utility import Utility
+
+XREF_PATH = os.environ.get("REFINITIV_XREF_PATH", "xref.sqlite")
+
+# Columns of the extractions holding an identifier, with the type of the identifier
+IDENTIFIER_COLUMNS = {"RIC": "Ric", "ISIN": "Isin", "CUSIP": "Cusip", "SEDOL": "Sedol"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    identifier_type TEXT NOT NULL, identifier TEXT NOT NULL, preferred_type TEXT NOT NULL,
+    results TEXT NOT NULL, updated_at REAL NOT NULL,
+    PRIMARY KEY (identifier_type, identifier, preferred_type)
+);
+CREATE TABLE IF NOT EXISTS links (
+    source_type TEXT NOT NULL, source TEXT NOT NULL, target_type TEXT NOT NULL, target TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (source_type, source, target_type, target)
+);
+CREATE INDEX IF NOT EXISTS links_by_target ON links (target_type, target);
+CREATE INDEX IF NOT EXISTS links_by_age ON links (updated_at);
+"""
+
+
+class CrossReference:
+    """
+    Persistent SQLite store of the search results and of the links between identifiers of different types
+    (e.g. Isin to Ric). Entries older than max_age are stale and treated as missing. The downloaded extractions are
+    learnt from only when learn_from_extractions is True
+    """
+
+    def __init__(self, path=XREF_PATH, max_age=timedelta(days=7), learn_from_extractions=False):
+        """
+        Initialize the store. The database is opened at the first use
+        :param str path: name of the SQLite file, or ":memory:" for a store living within the process
+        :param timedelta max_age: age after which an entry is stale. If None, entries never expire
+        :param bool learn_from_extractions: if True, link the identifiers found in the extractions downloaded
+        """
+        self.path = path
+        self.max_age = max_age
+        self.learn_from_extractions = learn_from_extractions
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """
+        Return the connection to the database, creating the schema at the first call. Call it holding the lock
+        :return: the connection
+        :rtype: sqlite3.Connection
+        """
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def _oldest_fresh(self):
+        """
+        Return the oldest update time of a fresh entry
+        :return: a UNIX timestamp
+        :rtype: float
+        """
+        return time.time() - self.max_age.total_seconds() if self.max_age is not None else 0
+
+    def get(self, identifier_type, identifier, preferred_type):
+        """
+        Return the search results stored for an identifier
+        :param str identifier_type: type of the identifier searched
+        :param str identifier: identifier searched
+        :param str preferred_type: identifier type returned by the search
+        :return: the list of search results, or None if the identifier hasn't been resolved yet or is stale
+        :rtype: list or None
+        """
+        return self.get_many(identifier_type, [identifier], preferred_type).get(identifier)
+
+    def get_many(self, identifier_type, identifiers, preferred_type):
+        """
+        Return the search results stored for many identifiers
+        :param str identifier_type: type of the identifiers searched
+        :param list identifiers: identifiers searched
+        :param str preferred_type: identifier type returned by the search
+        :return: a dictionary with the identifiers found as keys and their search results as values
+        :rtype: dict
+        """
+        found = dict()
+        with self._lock:
+            connection = self._connect()
+            for chunk in Utility.split_list(list(identifiers), 500):
+                rows = connection.execute(
+                    f"SELECT identifier, results FROM searches WHERE identifier_type = ? AND preferred_type = ? "
+                    f"AND updated_at >= ? AND identifier IN ({','.join('?' * len(chunk))})",
+                    [identifier_type, preferred_type, self._oldest_fresh()] + chunk).fetchall()
+                found.update({identifier: Codec.loads(results) for identifier, results in rows})
+        return found
+
+    def put(self, identifier_type, identifier, preferred_type, results):
+        """
+        Store the search results of an identifier
+        :param str identifier_type: type of the identifier searched
+        :param str identifier: identifier searched
+        :param str preferred_type: identifier type returned by the search
+        :param list results: list of search results
+        """
+        self.put_many(identifier_type, {identifier: results}, preferred_type)
+
+    def put_many(self, identifier_type, results, preferred_type):
+        """
+        Store the search results of many identifiers, linking each identifier to the identifiers returned
+        :param str identifier_type: type of the identifiers searched
+        :param dict results: dictionary with the identifiers as keys and their search results as values
+        :param str preferred_type: identifier type returned by the search
+        """
+        now = time.time()
+        links = list()
+        for identifier, values in results.items():
+            for value in values:
+                if value.get("Identifier") and value.get("IdentifierType"):
+                    links.append(((identifier_type, identifier), (value["IdentifierType"], value["Identifier"])))
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany("INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?, ?)",
+                                       [(identifier_type, identifier, preferred_type, Codec.dumps(values), now)
+                                        for identifier, values in results.items()])
+                self._insert_links(connection, links, now)
+
+    def link(self, pairs):
+        """
+        Store links between identifiers, in both directions
+        :param list pairs: list of pairs of (identifierType, identifier) tuples
+        """
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                self._insert_links(connection, pairs, time.time())
+
+    @staticmethod
+    def _insert_links(connection, pairs, now):
+        """
+        Insert the links in both directions within the current transaction
+        :param sqlite3.Connection connection: connection to the database
+        :param list pairs: list of pairs of (identifierType, identifier) tuples
+        :param float now: update time of the links
+        """
+        rows = [(a[0], a[1], b[0], b[1], now) for a, b in pairs if a != b] + \
+               [(b[0], b[1], a[0], a[1], now) for a, b in pairs if a != b]
+        connection.executemany("INSERT OR REPLACE INTO links VALUES (?, ?, ?, ?, ?)", rows)
+
+    def learn_from_dataframe(self, dataframe):
+        """
+        Link the identifiers found on the same row of an extraction (the RIC, ISIN, CUSIP and SEDOL columns and the
+        Identifier of the row)
+        :param pd.DataFrame dataframe: extracted data
+        :return: the number of links stored
+        :rtype: int
+        """
+        columns = {column: id_type for column, id_type in IDENTIFIER_COLUMNS.items() if column in dataframe.columns}
+        with_identifier = "Identifier" in dataframe.columns and "IdentifierType" in dataframe.columns
+        if len(columns) + with_identifier < 2:
+            return 0
+        selected = list(columns) + (["IdentifierType", "Identifier"] if with_identifier else list())
+        pairs = set()
+        for row in dataframe[selected].drop_duplicates().itertuples(index=False):
+            row = dict(zip(selected, row))
+            identifiers = [(id_type, str(row[column])) for column, id_type in columns.items()
+                           if row[column] == row[column] and row[column]]
+            if with_identifier and row["Identifier"] == row["Identifier"] and row["Identifier"]:
+                identifiers.append((row["IdentifierType"], str(row["Identifier"])))
+            pairs.update((a, b) for a in identifiers for b in identifiers if a < b)
+        self.link(list(pairs))
+        return len(pairs)
+
+    def learn_from_extraction(self, dataframe):
+        """
+        Link the identifiers of a downloaded extraction, if learn_from_extractions is True
+        :param pd.DataFrame dataframe: extracted data
+        :return: the number of links stored
+        :rtype: int
+        """
+        if not self.learn_from_extractions:
+            return 0
+        return self.learn_from_dataframe(dataframe)
+
+    def translate(self, identifier_type, identifiers, target_type):
+        """
+        Translate identifiers locally with the links stored
+        :param str identifier_type: type of the identifiers to translate
+        :param list identifiers: identifiers to translate
+        :param str target_type: type of the identifiers wanted
+        :return: a dictionary with the identifiers found as keys and the list of their fresh translations as values
+        :rtype: dict
+        """
+        found = dict()
+        with self._lock:
+            connection = self._connect()
+            for chunk in Utility.split_list(list(identifiers), 500):
+                rows = connection.execute(
+                    f"SELECT source, target FROM links WHERE source_type = ? AND target_type = ? AND updated_at >= ? "
+                    f"AND source IN ({','.join('?' * len(chunk))}) ORDER BY source, target",
+                    [identifier_type, target_type, self._oldest_fresh()] + chunk).fetchall()
+                for source, target in rows:
+                    found.setdefault(source, list()).append(target)
+        return found
+
+    def purge(self):
+        """
+        Delete the stale entries
+        :return: the number of entries deleted
+        :rtype: int
+        """
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                deleted = connection.execute("DELETE FROM searches WHERE updated_at < ?",
+                                             [self._oldest_fresh()]).rowcount
+                deleted += connection.execute("DELETE FROM links WHERE updated_at < ?",
+                                              [self._oldest_fresh()]).rowcount
+        return deleted
+
+    def clear(self):
+        """Delete all the entries"""
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM searches")
+                connection.execute("DELETE FROM links")
+
+
+CrossReferenceClass = CrossReference()
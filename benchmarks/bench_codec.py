@@ -0,0 +1,105 @@
+"""Benchmark of the JSON backends of RefinitivAPIClient.codec on representative DSS payloads
+
+Usage:
+    python benchmarks/bench_codec.py --identifiers 100000 --rows 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from mock_dss import MockDSSServer, synthetic_notes, synthetic_value
+
+EOD_FIELDS = ["Instrument ID", "RIC", "ISIN", "Trade Date", "Open Price", "High Price", "Low Price",
+              "Universal Close Price", "Volume", "Currency Code", "Exchange Code", "Security Description"]
+
+
+def build_payloads(identifiers, rows):
+    """
+    Build an extraction request body and an ExtractWithNotes response like the ones of the price history flows
+    :param int identifiers: identifiers in the request body
+    :param int rows: rows in the Contents of the response
+    :return: the request body and the response body
+    :rtype: tuple
+    """
+    request = {"ExtractionRequest": {
+        "@odata.type": "#ThomsonReuters.Dss.Api.Extractions.ExtractionRequests.PriceHistoryExtractionRequest",
+        "ContentFieldNames": EOD_FIELDS,
+        "IdentifierList": {"@odata.type": "#ThomsonReuters.Dss.Api.Extractions.ExtractionRequests."
+                                          "InstrumentIdentifierList",
+                           "InstrumentIdentifiers": [{"Identifier": f"ID{i:07d}.O", "IdentifierType": "Ric"}
+                                                     for i in range(identifiers)],
+                           "ValidationOptions": None, "UseUserPreferencesForValidationOptions": False},
+        "Condition": {"AdjustedPrices": True, "QueryStartDate": "2019-01-01T00:00:00Z"}}}
+    per_instrument = 250
+    contents = list()
+    for row in range(rows):
+        identifier = f"ID{row // per_instrument:07d}.O"
+        values = {"IdentifierType": "Ric", "Identifier": identifier}
+        values.update({field: synthetic_value(field, identifier, row % per_instrument) for field in EOD_FIELDS})
+        contents.append(values)
+    response = {"@odata.context": "$metadata#ExtractionResult", "Contents": contents,
+                "Notes": synthetic_notes(max(rows // per_instrument, 1))}
+    return request, response
+
+
+def measure(func, repeat):
+    """
+    Best wall time of a function over some runs
+    :param callable func: function to time
+    :param int repeat: number of runs
+    :return: the best time in seconds
+    :rtype: float
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    """
+    Command line entry point of the codec benchmark
+    :param list argv: command line arguments
+    :return: the exit code
+    :rtype: int
+    """
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--identifiers", type=int, default=100000, help="identifiers in the request body")
+    arg_parser.add_argument("--rows", type=int, default=200000, help="rows in the response Contents")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="runs of each measure, the best is kept")
+    args = arg_parser.parse_args(argv)
+    with MockDSSServer() as server:
+        # The package logs in at import time, so it is pointed at the stand-in server first
+        os.environ["REFINITIV_DSS_ENDPOINT"] = server.endpoint
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from RefinitivAPIClient.codec import Codec, orjson
+        from RefinitivAPIClient.identifiers import IdentifierBatch
+        request, response = build_payloads(args.identifiers, args.rows)
+        batch = IdentifierBatch.from_tuples([(i["Identifier"], i["IdentifierType"]) for i in
+                                             request["ExtractionRequest"]["IdentifierList"]["InstrumentIdentifiers"]])
+        batch_request = {"ExtractionRequest": dict(request["ExtractionRequest"],
+                                                   IdentifierList={"InstrumentIdentifiers": batch})}
+        backends = ["json", "orjson"] if orjson is not None else ["json"]
+        print(f"{'measure':<36}" + "".join(f"{backend:>12}" for backend in backends))
+        results = dict()
+        for backend in backends:
+            Codec.use(backend)
+            encoded = Codec.dumps(response)
+            results[backend] = {
+                f"encode request ({args.identifiers} ids)": measure(lambda: Codec.dumps(request), args.repeat),
+                f"encode request as IdentifierBatch": measure(lambda: IdentifierBatch.dumps(batch_request),
+                                                              args.repeat),
+                f"decode response ({len(encoded) / 1e6:.0f} MB)": measure(lambda: Codec.loads(encoded), args.repeat),
+                "load json_requests template": measure(lambda: Codec.load_template("price_history_request.json"),
+                                                       args.repeat)}
+        for name in results[backends[0]]:
+            print(f"{name:<36}" + "".join(f"{results[backend][name] * 1000:>10.1f}ms" for backend in backends))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
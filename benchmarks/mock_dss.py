@@ -0,0 +1,764 @@
+"""Offline DSS stand-in server emulating the REST API endpoints used by RefinitivAPIClient"""
+
+import gzip
+import hashlib
+import itertools
+import json
+import re
+import threading
+import time
+
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+API_ROOT = "/RestApi/v1/"
+
+
+class MockDSSConfig:
+    """Knobs of the stand-in server: payload sizes, latency, async behaviour and throttling"""
+
+    def __init__(self, rows_per_instrument=1, file_rows_per_instrument=1, latency=0.0, async_threshold=None,
+                 async_polls=1, schedule_polls=0, throttle_rate=None, throttle_burst=10, chain_size=10,
+                 chain_depth=1, chain_sub_chains=2, compress=True, recurrence_period=1.0, dated_history=False):
+        """
+        Initialize the configuration of the server
+        :param int rows_per_instrument: rows returned for each instrument by a PriceHistory ExtractWithNotes request
+        :param int file_rows_per_instrument: rows written for each instrument in the files of scheduled extractions
+        :param float latency: seconds waited before answering each request
+        :param int async_threshold: number of instruments above which ExtractWithNotes answers 202. None to disable
+        :param int async_polls: number of 202 answered by ExtractWithNotesResult before the data is ready
+        :param int schedule_polls: number of empty CompletedExtractions answered before the extraction is completed
+        :param float throttle_rate: requests per second allowed before answering 429. None to disable
+        :param int throttle_burst: number of requests allowed in a burst when throttling is enabled
+        :param int chain_size: number of constituents of each chain RIC
+        :param int chain_depth: levels of nested chains below the requested chain RIC
+        :param int chain_sub_chains: number of constituents which are chains themselves, at each level
+        :param bool compress: honour Accept-Encoding: gzip on extracted files
+        :param float recurrence_period: seconds between two runs of a recurring (daily, weekly) schedule
+        :param bool dated_history: if True, a PriceHistory ExtractWithNotes request returns one row per weekday between
+        the QueryStartDate and the QueryEndDate of its Condition instead of rows_per_instrument rows
+        """
+        self.rows_per_instrument = rows_per_instrument
+        self.file_rows_per_instrument = file_rows_per_instrument
+        self.latency = latency
+        self.async_threshold = async_threshold
+        self.async_polls = async_polls
+        self.schedule_polls = schedule_polls
+        self.throttle_rate = throttle_rate
+        self.throttle_burst = throttle_burst
+        self.chain_size = chain_size
+        self.chain_depth = chain_depth
+        self.chain_sub_chains = chain_sub_chains
+        self.compress = compress
+        self.recurrence_period = recurrence_period
+        self.dated_history = dated_history
+
+
+class MockDSSState:
+    """In-memory objects created through the stand-in server"""
+
+    def __init__(self):
+        """Initialize the empty state"""
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.lists = dict()
+        self.templates = dict()
+        self.schedules = dict()
+        self.report_extractions = dict()
+        self.files = dict()
+        self.async_jobs = dict()
+        self.tokens = None
+        self.last_refill = time.monotonic()
+        self.requests_count = 0
+        self.throttled_count = 0
+        self.requests_by_token = dict()
+
+    def new_id(self, prefix="0x"):
+        """
+        Return a new hexadecimal identifier
+        :param str prefix: prefix of the identifier
+        :return: a string with the identifier
+        :rtype: str
+        """
+        with self.lock:
+            return f"{prefix}{next(self.ids):016x}"
+
+
+def synthetic_value(field, identifier, position=0):
+    """
+    Build a deterministic synthetic value for a content field
+    :param str field: name of the content field
+    :param str identifier: identifier of the instrument
+    :param int position: position of the row for the instrument (e.g. the day for price history)
+    :return: a synthetic value consistent with the name of the field
+    :rtype: str or float or int
+    """
+    seed = int(hashlib.md5(f"{field}{identifier}".encode()).hexdigest()[:8], 16)
+    if "Date" in field:
+        return (datetime(2020, 1, 1) + timedelta(days=position + seed % 7)).strftime("%Y-%m-%d")
+    if "Price" in field or "Amount" in field or "Value" in field or "Rate" in field:
+        return round(10 + (seed % 10000) / 100 + position * 0.01, 4)
+    if "Volume" in field or "Count" in field or "Size" in field:
+        return seed % 1000000
+    if field in ["RIC", "Instrument ID"]:
+        return identifier
+    return f"{field[:8]}-{seed % 100000}"
+
+
+def synthetic_notes(instruments):
+    """
+    Build a Notes array resembling the one returned by DSS
+    :param int instruments: number of instruments in the request
+    :return: a list with a single string of notes
+    :rtype: list
+    """
+    now = datetime.utcnow()
+    return [
+        f"Extraction Services Version 16.0 (mock), Built {now:%b %d %Y}\r\n"
+        f"Processing started at {now:%m/%d/%Y %H:%M:%S}.\r\n"
+        f"User ID: 9000000\r\n"
+        f"Extraction ID: 2000000000000001\r\n"
+        f"Schedule Time: {now:%m/%d/%Y %H:%M:%S}\r\n"
+        f"Processing completed successfully at {now:%m/%d/%Y %H:%M:%S}, taking 0.125 Secs.\r\n"
+        f"Extraction finished at {now:%m/%d/%Y %H:%M:%S} UTC, with servers: mock01, QS: 0.010 Secs\r\n"
+        f"Usage Summary for User 9000000, Client 10000, Template Type Mock\r\n"
+        f"{instruments:7d} Total instruments charged.\r\n"
+        f"      0 Instruments with no reported data.\r\n"
+        f"=======\r\n"
+        f"{instruments:7d} Instruments in the input list.\r\n"
+        f"Quota Message: INFO: Quota Count Before Extraction: 100; Instruments Approved for Extraction: "
+        f"{instruments}; Quota Count After Extraction: {100 + instruments}, 10.0% of Limit; Quota Limit: 10000\r\n"
+    ]
+
+
+class MockDSSHandler(BaseHTTPRequestHandler):
+    """Route the requests to the emulated DSS endpoints"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_version = "MockDSS/1.0"
+
+    def log_message(self, format, *args):
+        """Silence the default access log"""
+        return None
+
+    @property
+    def config(self):
+        """Shortcut to the server configuration"""
+        return self.server.config
+
+    @property
+    def state(self):
+        """Shortcut to the server state"""
+        return self.server.state
+
+    def do_GET(self):
+        """Handle GET requests"""
+        self._dispatch("GET")
+
+    def do_POST(self):
+        """Handle POST requests"""
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        """Handle PUT requests"""
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        """Handle DELETE requests"""
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method):
+        """
+        Apply latency and throttling and route the request to its handler
+        :param str method: HTTP method of the request
+        """
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"null") if length else None
+        path = unquote(self.path)
+        if self.config.latency:
+            time.sleep(self.config.latency)
+        if self._throttled():
+            return self._send_json(429, {"error": {"message": "Too many requests"}}, {"Retry-After": "1"})
+        if path.startswith("/storage/"):
+            return self._storage(path[len("/storage/"):])
+        if not path.startswith(API_ROOT):
+            return self._send_json(404, {"error": {"message": f"Unknown path {path}"}})
+        route = path[len(API_ROOT):]
+        for pattern, route_method, handler in self.routes:
+            match = re.fullmatch(pattern, route)
+            if match and route_method == method:
+                return handler(self, body, *match.groups())
+        return self._send_json(404, {"error": {"message": f"Unknown route {method} {route}"}})
+
+    def _throttled(self):
+        """
+        Token bucket throttling of the incoming requests
+        :return: True if the request must be rejected with a 429
+        :rtype: bool
+        """
+        state = self.state
+        with state.lock:
+            state.requests_count += 1
+            authorization = self.headers.get("Authorization")
+            state.requests_by_token[authorization] = state.requests_by_token.get(authorization, 0) + 1
+            if not self.config.throttle_rate:
+                return False
+            now = time.monotonic()
+            if state.tokens is None:
+                state.tokens = float(self.config.throttle_burst)
+            state.tokens = min(self.config.throttle_burst,
+                               state.tokens + (now - state.last_refill) * self.config.throttle_rate)
+            state.last_refill = now
+            if state.tokens < 1:
+                state.throttled_count += 1
+                return True
+            state.tokens -= 1
+            return False
+
+    def _send_json(self, status, payload=None, headers=None):
+        """
+        Send a JSON response
+        :param int status: HTTP status code
+        :param dict payload: body of the response
+        :param dict headers: additional headers
+        """
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self._send_bytes(status, body, "application/json; charset=utf-8", headers)
+
+    def _send_bytes(self, status, body, content_type="application/octet-stream", headers=None, compress=False):
+        """
+        Send a binary response, gzip-encoded if requested by the client
+        :param int status: HTTP status code
+        :param bytes body: body of the response
+        :param str content_type: content type of the body
+        :param dict headers: additional headers
+        :param bool compress: if True, honour the Accept-Encoding header of the request
+        """
+        headers = dict(headers or dict())
+        if compress and self.config.compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _token(self, body):
+        """Authentication/RequestToken"""
+        username = ((body or dict()).get("Credentials") or dict()).get("Username")
+        return self._send_json(200, {"value": f"mock-session-token-{username}" if username else "mock-session-token"})
+
+    def _fields(self, body, template_type):
+        """Extractions/GetValidContentFieldTypes"""
+        fields = [{"Code": f"{template_type.upper()[:4]}.{i}", "Name": f"{template_type} Field {i}",
+                   "Description": f"Mock field {i}", "FieldType": "Text"} for i in range(50)]
+        return self._send_json(200, {"value": fields})
+
+    def _extract(self, body, extraction_id=None):
+        """Extractions/ExtractWithNotes and Extractions/ExtractWithNotesResult"""
+        if extraction_id is not None:
+            with self.state.lock:
+                job = self.state.async_jobs.get(extraction_id)
+                if job is None:
+                    return self._send_json(404, {"error": {"message": f"Unknown extraction {extraction_id}"}})
+                job["polls"] += 1
+                ready = job["polls"] > self.config.async_polls
+            if not ready:
+                return self._send_json(202, None, {"Location": self._async_location(extraction_id)})
+            return self._send_json(200, self._extraction_payload(job["request"]))
+        request = body["ExtractionRequest"]
+        identifiers = request["IdentifierList"]["InstrumentIdentifiers"] or list()
+        if self.config.async_threshold is not None and len(identifiers) > self.config.async_threshold:
+            extraction_id = self.state.new_id("")
+            with self.state.lock:
+                self.state.async_jobs[extraction_id] = {"request": request, "polls": 0}
+            return self._send_json(202, None, {"Location": self._async_location(extraction_id)})
+        return self._send_json(200, self._extraction_payload(request))
+
+    def _async_location(self, extraction_id):
+        """
+        Build the Location header returned with an async response
+        :param str extraction_id: id of the async extraction
+        :return: a string with the url to poll
+        :rtype: str
+        """
+        return f"http://{self.headers['Host']}{API_ROOT}Extractions/ExtractWithNotesResult(" \
+               f"ExtractionId='{extraction_id}')"
+
+    def _extraction_payload(self, request):
+        """
+        Build the synthetic body of an ExtractWithNotes response
+        :param dict request: the ExtractionRequest object of the body
+        :return: a dictionary with the Contents and the Notes
+        :rtype: dict
+        """
+        identifiers = request["IdentifierList"]["InstrumentIdentifiers"] or list()
+        fields = request.get("ContentFieldNames") or ["RIC"]
+        price_history = "PriceHistory" in request["@odata.type"]
+        contents = list()
+        for instrument in identifiers:
+            if instrument.get("IdentifierType") == "ChainRIC":
+                contents.extend(self._chain_rows(instrument["Identifier"]))
+                continue
+            if price_history and self.config.dated_history:
+                contents.extend(self._dated_rows(instrument, fields, request.get("Condition") or dict()))
+                continue
+            rows = self.config.rows_per_instrument if price_history else 1
+            for position in range(rows):
+                row = {"IdentifierType": instrument["IdentifierType"], "Identifier": instrument["Identifier"]}
+                for field in fields:
+                    row[field] = synthetic_value(field, instrument["Identifier"], position)
+                contents.append(row)
+        return {"@odata.context": f"{API_ROOT}$metadata#ThomsonReuters.Dss.Api.Extractions.ExtractionRequests."
+                                  f"ExtractionResult", "Contents": contents, "Notes": synthetic_notes(len(identifiers))}
+
+    @staticmethod
+    def _dated_rows(instrument, fields, condition):
+        """
+        Build the Price History rows of an instrument, one per weekday of the window of the Condition
+        :param dict instrument: identifier requested
+        :param list fields: content fields requested
+        :param dict condition: Condition of the request with QueryStartDate and QueryEndDate
+        :return: a list of rows, in date order
+        :rtype: list
+        """
+        start = datetime.fromisoformat(condition["QueryStartDate"].rstrip("Z")[:19]).date()
+        end = datetime.fromisoformat(condition["QueryEndDate"].rstrip("Z")[:19]).date()
+        rows = list()
+        day = start
+        while day <= end:
+            if day.weekday() < 5:
+                row = {"IdentifierType": instrument["IdentifierType"], "Identifier": instrument["Identifier"]}
+                for field in fields:
+                    row[field] = day.strftime("%Y-%m-%d") if field == "Trade Date" else \
+                        synthetic_value(field, instrument["Identifier"], day.toordinal() % 3650)
+                rows.append(row)
+            day += timedelta(days=1)
+        return rows
+
+    def _chain_rows(self, chain):
+        """
+        Build the constituents of a chain RIC. Nested chains are named after their parent followed by "/n"
+        :param str chain: chain RIC requested
+        :return: a list of rows, one per constituent
+        :rtype: list
+        """
+        depth = chain.count("/")
+        rows = list()
+        for i in range(self.config.chain_size):
+            if i < self.config.chain_sub_chains and depth < self.config.chain_depth:
+                ric = f"{chain}/{i}"
+            else:
+                ric = f"{chain[2:].lstrip('.').replace('/', '_')}{i}.MK"
+            rows.append({"IdentifierType": "ChainRIC", "Identifier": chain, "RIC": ric})
+        return rows
+
+    def _search(self, body, search_type):
+        """Search/*"""
+        request = body.get("SearchRequest", dict()) if body else dict()
+        identifier = request.get("Identifier") or request.get("Ticker") or request.get("CompanyName") or "MOCK"
+        preferred = request.get("PreferredIdentifierType") or request.get("IdentifierType") or "Ric"
+        seed = hashlib.md5(f"{identifier}".encode()).hexdigest()
+        value = {"Ric": f"{identifier.split('.')[0][:4].upper()}{seed[:2]}.MK", "Isin": f"US{seed[:10].upper()}",
+                 "Cusip": seed[:9].upper(), "Sedol": seed[:7].upper()}.get(preferred, identifier)
+        results = [{"Identifier": value, "IdentifierType": preferred, "Source": "MCK", "Key": f"0x{seed[:16]}",
+                    "Description": f"Mock {search_type} {identifier}", "InstrumentType": "EquityQuote",
+                    "Status": "Valid"}]
+        return self._send_json(200, {"value": results})
+
+    def _create_list(self, body, kind):
+        """Extractions/InstrumentLists and Extractions/EntityLists"""
+        list_id = self.state.new_id()
+        subject_list = {"ListId": list_id, "Name": body["Name"], "Kind": kind, "Identifiers": list(),
+                        "Created": datetime.utcnow().isoformat() + "Z",
+                        "Modified": datetime.utcnow().isoformat() + "Z"}
+        with self.state.lock:
+            if self._list_named(kind, body["Name"]) is not None:
+                return self._send_json(400, {"error": {"message": f"List name {body['Name']} already exists"}})
+            self.state.lists[list_id] = subject_list
+        return self._send_json(201, {key: value for key, value in subject_list.items() if key != "Identifiers"})
+
+    def _get_lists(self, body, kind):
+        """GET Extractions/InstrumentLists and Extractions/EntityLists"""
+        with self.state.lock:
+            values = [{key: value for key, value in i.items() if key != "Identifiers"}
+                      for i in self.state.lists.values() if i["Kind"] == kind]
+        return self._send_json(200, {"value": values})
+
+    def _get_list_by_name(self, body, kind, name):
+        """Extractions/InstrumentListGetByName and Extractions/EntityListGetByName"""
+        with self.state.lock:
+            for subject_list in self.state.lists.values():
+                if subject_list["Kind"] == kind and subject_list["Name"] == name:
+                    return self._send_json(200, {key: value for key, value in subject_list.items()
+                                                 if key != "Identifiers"})
+        return self._send_json(404, {"error": {"message": f"List {name} not found"}})
+
+    def _append_to_list(self, body, kind, list_id):
+        """Extractions/InstrumentLists('id')/...AppendIdentifiers"""
+        with self.state.lock:
+            subject_list = self.state.lists.get(list_id)
+            if subject_list is None:
+                return self._send_json(404, {"error": {"message": f"List {list_id} not found"}})
+            existing = {(i["Identifier"], i["IdentifierType"]) for i in subject_list["Identifiers"]}
+            duplicates = list()
+            for identifier in body["Identifiers"]:
+                key = (identifier["Identifier"], identifier["IdentifierType"])
+                if key in existing:
+                    duplicates.append(identifier["Identifier"])
+                    continue
+                existing.add(key)
+                subject_list["Identifiers"].append(identifier)
+        valid = len(body["Identifiers"]) - len(duplicates)
+        count_key = "ValidInstrumentCount" if kind == "InstrumentList" else "ValidEntityCount"
+        return self._send_json(200, {"ValidationResult": {count_key: valid, "OpenAccessSegments": list(),
+                                                          "StandardSegments": [{"Code": "E", "Description": "Equity",
+                                                                                "Count": valid}],
+                                                          "ValidationDuplicates": duplicates, "Messages": list()},
+                                     "AppendResult": {"AppendedInstrumentCount": valid,
+                                                      "AppendDuplicates": duplicates, "Messages": list()}})
+
+    def _get_list_content(self, body, kind, list_id):
+        """Extractions/InstrumentLists('id')/...GetAllInstruments"""
+        with self.state.lock:
+            subject_list = self.state.lists.get(list_id)
+            values = list(subject_list["Identifiers"]) if subject_list else list()
+        return self._send_json(200, {"value": values})
+
+    def _list_named(self, kind, name):
+        """
+        Return the list of a kind with the given name. Call it holding the lock
+        :param str kind: InstrumentList or EntityList
+        :param str name: name of the list
+        :return: the list or None
+        :rtype: dict
+        """
+        for subject_list in self.state.lists.values():
+            if subject_list["Kind"] == kind and subject_list["Name"] == name:
+                return subject_list
+        return None
+
+    def _rename_list(self, body, kind, list_id):
+        """PUT Extractions/InstrumentLists('id')"""
+        with self.state.lock:
+            subject_list = self.state.lists.get(list_id)
+            if subject_list is None:
+                return self._send_json(404, {"error": {"message": f"List {list_id} not found"}})
+            named = self._list_named(kind, body["Name"])
+            if named is not None and named is not subject_list:
+                return self._send_json(400, {"error": {"message": f"List name {body['Name']} already exists"}})
+            subject_list["Name"] = body["Name"]
+            subject_list["Modified"] = datetime.utcnow().isoformat() + "Z"
+        return self._send_bytes(204, b"")
+
+    def _delete_list(self, body, kind, list_id):
+        """DELETE Extractions/InstrumentLists('id')"""
+        with self.state.lock:
+            self.state.lists.pop(list_id, None)
+        return self._send_bytes(204, b"")
+
+    def _create_template(self, body, template_type):
+        """POST Extractions/<Type>ReportTemplates"""
+        template_id = self.state.new_id()
+        template = {"ReportTemplateId": template_id, "Name": body["Name"], "TemplateType": template_type,
+                    "ContentFields": body.get("ContentFields") or list(), "Condition": body.get("Condition"),
+                    "CompressionType": body.get("CompressionType"), "Created": datetime.utcnow().isoformat() + "Z",
+                    "LastChangedDate": datetime.utcnow().isoformat() + "Z"}
+        with self.state.lock:
+            self.state.templates[template_id] = template
+        return self._send_json(201, template)
+
+    def _get_templates(self, body):
+        """GET Extractions/ReportTemplates"""
+        with self.state.lock:
+            values = list(self.state.templates.values())
+        return self._send_json(200, {"value": values})
+
+    def _get_template_by_name(self, body, name):
+        """Extractions/ReportTemplateGetByName"""
+        with self.state.lock:
+            for template in self.state.templates.values():
+                if template["Name"] == name:
+                    return self._send_json(200, template)
+        return self._send_json(404, {"error": {"message": f"Template {name} not found"}})
+
+    def _modify_template(self, body, template_id, action):
+        """Extractions/ReportTemplates('id')/...ReportTemplateAddContentField or RemoveContentField"""
+        with self.state.lock:
+            template = self.state.templates.get(template_id)
+            if template is None:
+                return self._send_json(404, {"error": {"message": f"Template {template_id} not found"}})
+            field = body["ContentField"]["FieldName"]
+            if action == "Add":
+                template["ContentFields"].append({"FieldName": field, "Format": None})
+            else:
+                template["ContentFields"] = [i for i in template["ContentFields"] if i["FieldName"] != field]
+        return self._send_bytes(204, b"")
+
+    def _delete_template(self, body, template_id):
+        """DELETE Extractions/ReportTemplates('id')"""
+        with self.state.lock:
+            self.state.templates.pop(template_id, None)
+        return self._send_bytes(204, b"")
+
+    def _create_schedule(self, body):
+        """POST Extractions/Schedules"""
+        schedule_id = self.state.new_id()
+        schedule = dict(body)
+        schedule["ScheduleId"] = schedule_id
+        # DSS fills in the values left to the account defaults
+        schedule["TimeZone"] = schedule.get("TimeZone") or "Coordinated Universal Time"
+        schedule["polls"] = 0
+        schedule["created"] = time.monotonic()
+        schedule["runs"] = list()
+        with self.state.lock:
+            self.state.schedules[schedule_id] = schedule
+        return self._send_json(201, self._public_schedule(schedule))
+
+    @staticmethod
+    def _public_schedule(schedule):
+        """
+        Return a schedule without the fields used internally by the stand-in server
+        :param dict schedule: schedule of the state
+        :return: the schedule as returned by DSS
+        :rtype: dict
+        """
+        return {key: value for key, value in schedule.items() if key not in ["polls", "created", "runs"]}
+
+    def _get_schedules(self, body):
+        """GET Extractions/Schedules"""
+        with self.state.lock:
+            values = [self._public_schedule(i) for i in self.state.schedules.values()]
+        return self._send_json(200, {"value": values})
+
+    def _delete_schedule(self, body, schedule_id):
+        """DELETE Extractions/Schedules('id')"""
+        with self.state.lock:
+            self.state.schedules.pop(schedule_id, None)
+        return self._send_bytes(204, b"")
+
+    def _recurring_runs(self, schedule):
+        """
+        Complete the runs of a recurring schedule due so far, one every recurrence_period seconds. Call it holding
+        the lock
+        :param dict schedule: schedule of the state
+        :return: the list of the completed report extractions of the schedule
+        :rtype: list
+        """
+        if "SingleRecurrence" in schedule.get("Recurrence", dict()).get("@odata.type", "SingleRecurrence"):
+            if "ReportExtractionId" not in schedule:
+                return list()
+            return [self._report_extraction(schedule, schedule["ReportExtractionId"])]
+        due = int((time.monotonic() - schedule["created"]) / self.config.recurrence_period)
+        while len(schedule["runs"]) < due:
+            report_extraction_id = f"{next(self.state.ids)}"
+            self.state.report_extractions[report_extraction_id] = schedule["ScheduleId"]
+            schedule["runs"].append(self._report_extraction(schedule, report_extraction_id))
+        return list(schedule["runs"])
+
+    @staticmethod
+    def _report_extraction(schedule, report_extraction_id):
+        """
+        Build a completed report extraction of a schedule
+        :param dict schedule: schedule of the state
+        :param str report_extraction_id: id of the report extraction
+        :return: the report extraction as returned by DSS
+        :rtype: dict
+        """
+        return {"ReportExtractionId": report_extraction_id, "ScheduleId": schedule["ScheduleId"],
+                "Status": "Completed", "DetailedStatus": "Done",
+                "ExtractionDateUtc": datetime.utcnow().isoformat() + "Z", "ScheduleName": schedule["Name"],
+                "IsTriggered": "DataAvailableTrigger" in schedule.get("Trigger", dict()).get("@odata.type", "")}
+
+    def _completed_extractions(self, body, schedule_id):
+        """Extractions/Schedules('id')/CompletedExtractions"""
+        with self.state.lock:
+            schedule = self.state.schedules.get(schedule_id)
+            if schedule is None:
+                return self._send_json(404, {"error": {"message": f"Schedule {schedule_id} not found"}})
+            if "SingleRecurrence" not in schedule.get("Recurrence", dict()).get("@odata.type", "SingleRecurrence"):
+                return self._send_json(200, {"value": self._recurring_runs(schedule)})
+            schedule["polls"] += 1
+            if schedule["polls"] <= self.config.schedule_polls:
+                return self._send_json(200, {"value": list()})
+            if "ReportExtractionId" not in schedule:
+                schedule["ReportExtractionId"] = f"{next(self.state.ids)}"
+                self.state.report_extractions[schedule["ReportExtractionId"]] = schedule_id
+            return self._send_json(200, {"value": [self._report_extraction(schedule,
+                                                                           schedule["ReportExtractionId"])]})
+
+    def _completed_report_extractions(self, body):
+        """GET Extractions/ReportExtractionGetCompleted"""
+        with self.state.lock:
+            values = [run for schedule in self.state.schedules.values() for run in self._recurring_runs(schedule)]
+        return self._send_json(200, {"value": values})
+
+    def _report_files(self, body, report_extraction_id):
+        """Extractions/ReportExtractions('id')/Files"""
+        with self.state.lock:
+            schedule_id = self.state.report_extractions.get(report_extraction_id)
+            schedule = self.state.schedules.get(schedule_id)
+            if schedule is None:
+                return self._send_json(404, {"error": {"message": f"Extraction {report_extraction_id} not found"}})
+            template = self.state.templates.get(schedule["ReportTemplateId"], dict())
+            subject_list = self.state.lists.get(schedule["ListId"], dict())
+            data_file_id = f"VjF8{report_extraction_id}data"
+            notes_file_id = f"VjF8{report_extraction_id}notes"
+            self.state.files[data_file_id] = (template, list(subject_list.get("Identifiers", list())))
+            self.state.files[notes_file_id] = None
+        name = f"{schedule_id}.{report_extraction_id}"
+        return self._send_json(200, {"value": [
+            {"ExtractedFileId": data_file_id, "ReportExtractionId": report_extraction_id, "ScheduleId": schedule_id,
+             "FileType": "Full", "ExtractedFileName": f"{name}.csv", "Size": 0},
+            {"ExtractedFileId": notes_file_id, "ReportExtractionId": report_extraction_id, "ScheduleId": schedule_id,
+             "FileType": "Note", "ExtractedFileName": f"{name}.notes.txt", "Size": 0}
+        ]})
+
+    def _extracted_files(self, body):
+        """GET Extractions/ExtractedFiles"""
+        with self.state.lock:
+            values = [{"ExtractedFileId": i} for i in self.state.files]
+        return self._send_json(200, {"value": values})
+
+    def _file_value(self, body, file_id):
+        """Extractions/ExtractedFiles('id')/$value, redirecting to the storage host on X-Direct-Download"""
+        with self.state.lock:
+            if file_id not in self.state.files:
+                return self._send_json(404, {"error": {"message": f"File {file_id} not found"}})
+        if self.headers.get("X-Direct-Download", "").lower() == "true":
+            return self._send_bytes(302, b"", headers={"Location": f"http://{self.headers['Host']}/storage/{file_id}"})
+        return self._send_bytes(200, self._file_content(file_id), "text/plain", compress=True)
+
+    def _storage(self, file_id):
+        """
+        Emulate the storage host of the direct download, which rejects the DSS authorization header
+        :param str file_id: id of the extracted file
+        """
+        if self.headers.get("Authorization"):
+            return self._send_bytes(400, b"Only one auth mechanism allowed", "text/plain")
+        with self.state.lock:
+            if file_id not in self.state.files:
+                return self._send_bytes(404, b"NoSuchKey", "text/plain")
+        return self._send_bytes(200, self._file_content(file_id), "text/plain", compress=True)
+
+    def _file_content(self, file_id):
+        """
+        Build the CSV (or the notes) of an extracted file
+        :param str file_id: id of the extracted file
+        :return: the content of the file
+        :rtype: bytes
+        """
+        with self.state.lock:
+            extracted = self.state.files[file_id]
+        if extracted is None:
+            return "\r\n".join(synthetic_notes(0)).encode()
+        template, identifiers = extracted
+        fields = [i["FieldName"] for i in template.get("ContentFields") or list()] or ["RIC"]
+        price_history = "PriceHistory" in template.get("TemplateType", "")
+        rows = self.config.file_rows_per_instrument if price_history else 1
+        lines = [",".join(["IdentifierType", "Identifier"] + [f'"{i}"' for i in fields])]
+        for instrument in identifiers:
+            for position in range(rows):
+                values = [str(synthetic_value(field, instrument["Identifier"], position)) for field in fields]
+                lines.append(",".join([instrument["IdentifierType"], instrument["Identifier"]] + values))
+        return ("\n".join(lines) + "\n").encode()
+
+
+MockDSSHandler.routes = [
+    (r"Authentication/RequestToken", "POST", MockDSSHandler._token),
+    (r"Extractions/GetValidContentFieldTypes\(ReportTemplateType=.*'(\w+)'\)", "GET", MockDSSHandler._fields),
+    (r"Extractions/ExtractWithNotes", "POST", MockDSSHandler._extract),
+    (r"Extractions/ExtractWithNotesResult\(ExtractionId='(.+)'\)", "GET", MockDSSHandler._extract),
+    (r"Search/(\w+)", "POST", MockDSSHandler._search),
+    (r"Extractions/(InstrumentList|EntityList)s", "POST", MockDSSHandler._create_list),
+    (r"Extractions/(InstrumentList|EntityList)s", "GET", MockDSSHandler._get_lists),
+    (r"Extractions/(InstrumentList|EntityList)GetByName\(ListName='(.*)'\)", "GET",
+     MockDSSHandler._get_list_by_name),
+    (r"Extractions/(InstrumentList|EntityList)s\('(.+)'\)/ThomsonReuters\.Dss\.Api\.Extractions\.\w+AppendIdentifiers",
+     "POST", MockDSSHandler._append_to_list),
+    (r"Extractions/(InstrumentList|EntityList)s\('(.+)'\)/ThomsonReuters\.Dss\.Api\.Extractions\.\w+GetAll\w+",
+     "GET", MockDSSHandler._get_list_content),
+    (r"Extractions/(InstrumentList|EntityList)s\('(.+)'\)", "PUT", MockDSSHandler._rename_list),
+    (r"Extractions/(InstrumentList|EntityList)s\('(.+)'\)", "DELETE", MockDSSHandler._delete_list),
+    (r"Extractions/ReportTemplates", "GET", MockDSSHandler._get_templates),
+    (r"Extractions/ReportTemplateGetByName\(Name='(.*)'\)", "GET", MockDSSHandler._get_template_by_name),
+    (r"Extractions/ReportTemplates\('(.+)'\)/ThomsonReuters\.Dss\.Api\.Extractions\.ReportTemplate(Add|Remove)"
+     r"ContentField", "POST", MockDSSHandler._modify_template),
+    (r"Extractions/ReportTemplates\('(.+)'\)", "DELETE", MockDSSHandler._delete_template),
+    (r"Extractions/(\w+ReportTemplate)s", "POST", MockDSSHandler._create_template),
+    (r"Extractions/Schedules", "POST", MockDSSHandler._create_schedule),
+    (r"Extractions/Schedules", "GET", MockDSSHandler._get_schedules),
+    (r"Extractions/Schedules\('(.+)'\)/CompletedExtractions", "GET", MockDSSHandler._completed_extractions),
+    (r"Extractions/Schedules\('(.+)'\)", "DELETE", MockDSSHandler._delete_schedule),
+    (r"Extractions/ReportExtractions\('(.+)'\)/Files", "GET", MockDSSHandler._report_files),
+    (r"Extractions/ExtractedFiles\('(.+)'\)/\$value", "GET", MockDSSHandler._file_value),
+    (r"Extractions/ReportExtractionGetCompleted", "GET", MockDSSHandler._completed_report_extractions),
+    (r"Extractions/ExtractedFiles", "GET", MockDSSHandler._extracted_files),
+]
+
+
+class MockDSSServer:
+    """Run the stand-in server in a background thread"""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        """
+        Initialize the server. With port=0 a free port is picked
+        :param MockDSSConfig config: configuration of the server
+        :param str host: interface where to listen
+        :param int port: port where to listen
+        """
+        self.config = config if config is not None else MockDSSConfig()
+        self._httpd = ThreadingHTTPServer((host, port), MockDSSHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.config = self.config
+        self._httpd.state = MockDSSState()
+        self._thread = None
+
+    @property
+    def state(self):
+        """The in-memory state of the server"""
+        return self._httpd.state
+
+    @property
+    def endpoint(self):
+        """
+        Base url to use as REFINITIV_DSS_ENDPOINT
+        :rtype: str
+        """
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{API_ROOT}"
+
+    def start(self):
+        """
+        Start serving in a daemon thread
+        :return: the server itself
+        :rtype: MockDSSServer
+        """
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server and release the port"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+if __name__ == "__main__":
+    server = MockDSSServer(port=8089).start()
+    print(f"Mock DSS listening on {server.endpoint}. Press Ctrl+C to stop")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,233 @@
+"""End-to-end benchmark suite of RefinitivAPIClient against the offline DSS stand-in server
+
+Usage:
+    python benchmarks/run_benchmarks.py --instruments 500 --iterations 20 --output results.json
+    python benchmarks/run_benchmarks.py --baseline results.json --tolerance 0.15
+"""
+
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from datetime import datetime
+
+from mock_dss import MockDSSConfig, MockDSSServer
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a list of values
+    :param list values: list of measures
+    :param float pct: percentile to compute, between 0 and 100
+    :return: the value at the given percentile
+    :rtype: float
+    """
+    ordered = sorted(values)
+    rank = max(1, int(math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def count_rows(result):
+    """
+    Count the rows returned by a flow, when the result is a collection
+    :param result: output of the flow
+    :return: the number of rows or None
+    :rtype: int or None
+    """
+    if isinstance(result, dict):
+        result = result.get("value", result.get("Contents"))
+    if hasattr(result, "__len__") and not isinstance(result, (str, bytes, dict)):
+        return len(result)
+    return None
+
+
+def build_flows(client, identifiers):
+    """
+    Build the flows to benchmark, one per Requests, Searches, ListFields and Operations entry point
+    :param RefinitivAPIClient.dss.Refinitiv client: client pointing at the stand-in server
+    :param list identifiers: list of tuples (identifier, identifier_type)
+    :return: a dictionary with the name of the flow as key and a callable as value
+    :rtype: dict
+    """
+    raw_identifiers = [i[0] for i in identifiers]
+    eod_fields = ["Instrument ID", "Trade Date", "Universal Close Price", "Volume"]
+    return {
+        "list_fields.eod": lambda: client.list_fields.list_available_fields_for_eod(),
+        "requests.eod_pricing": lambda: client.request_data.request_eod_pricing(identifiers),
+        "requests.eod_pricing_streaming": lambda: list(
+            client.request_data.request_eod_pricing(identifiers, streaming=True)),
+        "requests.price_history": lambda: client.request_data.request_price_history_data(identifiers),
+        "requests.ca_events": lambda: client.request_data.request_ca_events(identifiers, prev_days=30),
+        "requests.ownership": lambda: client.request_data.request_ownership_data(identifiers),
+        "requests.tc": lambda: client.request_data.request_tc_data(identifiers),
+        "requests.composite": lambda: client.request_data.request_composite_data(identifiers),
+        "requests.chain_ric": lambda: client.request_data.request_components_of_chain_ric("0#.SPX"),
+        "searches.instrument": lambda: client.securities_search.instrument_search(
+            "Isin", "US0378331005", "Ric"),
+        "searches.equities": lambda: client.securities_search.search_equities(ticker="AAPL", pref_id_type="Ric"),
+        "searches.govcorp": lambda: client.securities_search.search_govcorp(ticker="T", pref_id="Ric"),
+        "searches.futures_and_options": lambda: client.securities_search.search_futures_and_options(
+            id_type="Ric", identifier="ES", pref_identifier="Ric"),
+        "operations.create_list_template_extract_data": lambda: client.operations.create_list_template_extract_data(
+            raw_identifiers, "EndOfDayPricingReportTemplate", eod_fields),
+        "operations.download_data_end_to_end": lambda: client.operations.download_data_end_to_end(
+            raw_identifiers, "EndOfDayPricingReportTemplate", eod_fields),
+    }
+
+
+def run_flow(func, iterations, warmup):
+    """
+    Run a flow several times and collect its latencies
+    :param callable func: flow to run
+    :param int iterations: number of measured runs
+    :param int warmup: number of runs discarded before measuring
+    :return: a dictionary with the statistics of the flow
+    :rtype: dict
+    """
+    for _ in range(warmup):
+        func()
+    latencies = list()
+    rows = None
+    started = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = func()
+        latencies.append(time.perf_counter() - start)
+        rows = count_rows(result)
+    elapsed = time.perf_counter() - started
+    stats = {
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "throughput_ops": round(iterations / elapsed, 3),
+    }
+    if rows is not None:
+        stats["rows"] = rows
+        stats["throughput_rows"] = round(rows * iterations / elapsed, 3)
+    return stats
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare the results with a baseline run and list the regressions
+    :param dict results: results of the current run
+    :param dict baseline: results of the baseline run
+    :param float tolerance: relative degradation accepted before flagging a regression
+    :return: a list of strings describing the regressions
+    :rtype: list
+    """
+    regressions = list()
+    for flow, stats in results["flows"].items():
+        reference = baseline["flows"].get(flow)
+        if reference is None:
+            continue
+        for metric in ["p50_ms", "p99_ms"]:
+            if stats[metric] > reference[metric] * (1 + tolerance):
+                regressions.append(f"{flow}: {metric} {reference[metric]} -> {stats[metric]}")
+        if stats["throughput_ops"] < reference["throughput_ops"] * (1 - tolerance):
+            regressions.append(f"{flow}: throughput_ops {reference['throughput_ops']} -> {stats['throughput_ops']}")
+    return regressions
+
+
+def package_version():
+    """
+    Version of the installed RefinitivAPIClient package
+    :return: a string with the version or "dev" when the package isn't installed
+    :rtype: str
+    """
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        return "dev"
+    try:
+        return version("RefinitivAPIClient")
+    except PackageNotFoundError:
+        return "dev"
+
+
+def run(args):
+    """
+    Start the stand-in server, point the client at it and run the selected flows
+    :param argparse.Namespace args: parsed command line arguments
+    :return: a dictionary with the metadata of the run and the statistics of each flow
+    :rtype: dict
+    """
+    config = MockDSSConfig(rows_per_instrument=args.rows_per_instrument,
+                           file_rows_per_instrument=args.rows_per_instrument, latency=args.latency,
+                           async_threshold=args.async_threshold, throttle_rate=args.throttle_rate)
+    results = {"label": args.label or package_version(), "python": platform.python_version(),
+               "date": datetime.now().isoformat(), "instruments": args.instruments,
+               "rows_per_instrument": args.rows_per_instrument, "latency": args.latency, "flows": dict()}
+    cwd = os.getcwd()
+    with MockDSSServer(config) as server, tempfile.TemporaryDirectory() as workdir:
+        os.environ["REFINITIV_DSS_ENDPOINT"] = server.endpoint
+        # The client caches the token and writes the extracted files in the working directory
+        os.chdir(workdir)
+        try:
+            sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            with contextlib.redirect_stdout(io.StringIO()):
+                from RefinitivAPIClient import Refinitiv
+            identifiers = [(f"MOCK{i}.O", "Ric") for i in range(args.instruments)]
+            flows = build_flows(Refinitiv, identifiers)
+            for name, func in flows.items():
+                if args.flows and not any(fnmatch.fnmatch(name, pattern) for pattern in args.flows):
+                    continue
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stats = run_flow(func, args.iterations, args.warmup)
+                results["flows"][name] = stats
+                print(f"{name:<50} p50 {stats['p50_ms']:>10.3f} ms  p99 {stats['p99_ms']:>10.3f} ms  "
+                      f"{stats['throughput_ops']:>10.3f} ops/s")
+        finally:
+            os.chdir(cwd)
+        results["server_requests"] = server.state.requests_count
+        results["server_throttled"] = server.state.throttled_count
+    return results
+
+
+def main(argv=None):
+    """
+    Command line entry point of the benchmark suite
+    :param list argv: command line arguments
+    :return: the exit code, 1 when a regression is found against the baseline
+    :rtype: int
+    """
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--instruments", type=int, default=100, help="instruments in each request")
+    arg_parser.add_argument("--rows-per-instrument", type=int, default=250, help="rows of price history")
+    arg_parser.add_argument("--iterations", type=int, default=10, help="measured runs of each flow")
+    arg_parser.add_argument("--warmup", type=int, default=1, help="runs discarded before measuring")
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="seconds of latency of the server")
+    arg_parser.add_argument("--async-threshold", type=int, default=None, help="instruments before answering 202")
+    arg_parser.add_argument("--throttle-rate", type=float, default=None, help="requests/s before answering 429")
+    arg_parser.add_argument("--flows", nargs="*", help="glob patterns of the flows to run, e.g. 'requests.*'")
+    arg_parser.add_argument("--label", help="label of the run, defaults to the installed package version")
+    arg_parser.add_argument("--output", help="JSON file where to save the results")
+    arg_parser.add_argument("--baseline", help="JSON file of a previous run to compare with")
+    arg_parser.add_argument("--tolerance", type=float, default=0.15, help="relative degradation accepted")
+    args = arg_parser.parse_args(argv)
+    results = run(args)
+    if args.output:
+        with open(args.output, "w") as w:
+            json.dump(results, w, indent=2)
+    if args.baseline:
+        with open(args.baseline) as r:
+            baseline = json.load(r)
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"\nCompared with {baseline['label']}: {len(regressions)} regression(s)")
+        for regression in regressions:
+            print(f"\t{regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
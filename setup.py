@@ -23,5 +23,7 @@ setuptools.setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.7',
+    extras_require={'fast': ['orjson']},
+    entry_points={'console_scripts': ['refinitiv-extract=RefinitivAPIClient.cli:main']},
 )
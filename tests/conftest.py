@@ -0,0 +1,51 @@
+"""Run the tests against the offline DSS stand-in server, started before the client is imported"""
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from mock_dss import MockDSSServer  # noqa: E402
+
+SERVER = MockDSSServer().start()
+WORKDIR = tempfile.mkdtemp(prefix="refinitiv_tests_")
+os.environ["REFINITIV_DSS_ENDPOINT"] = SERVER.endpoint
+os.environ["REFINITIV_XREF_PATH"] = ":memory:"
+os.environ["REFINITIV_HISTORY_PATH"] = ":memory:"
+os.environ["REFINITIV_CA_SYNC_PATH"] = os.path.join(WORKDIR, "ca_sync.sqlite")
+os.environ["REFINITIV_REUSE_PATH"] = ":memory:"
+# The client caches its token and writes the extracted files in the working directory
+os.chdir(WORKDIR)
+atexit.register(shutil.rmtree, WORKDIR, True)
+atexit.register(SERVER.stop)
+
+
+@pytest.fixture
+def server():
+    """The stand-in server, with a fresh configuration for each test"""
+    from mock_dss import MockDSSConfig, MockDSSState
+
+    SERVER.config.__dict__.update(MockDSSConfig().__dict__)
+    SERVER._httpd.state = MockDSSState()
+    return SERVER
+
+
+@pytest.fixture
+def client(server):
+    """The client pointing at the stand-in server"""
+    from RefinitivAPIClient import Refinitiv
+
+    return Refinitiv
+
+
+@pytest.fixture
+def identifiers():
+    """A small universe of RICs"""
+    return [(f"MOCK{i}.O", "Ric") for i in range(5)]
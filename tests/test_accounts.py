@@ -0,0 +1,32 @@
+"""Calls made with the Datashelf of each account"""
+
+import os
+import subprocess
+import sys
+
+from RefinitivAPIClient.datashelf import Datashelf
+from RefinitivAPIClient.dss import Refinitiv
+from RefinitivAPIClient.history import PriceHistoryStoreClass
+from RefinitivAPIClient.schedules import ScheduleManagerClass
+
+from tests.conftest import ROOT
+
+
+def test_import_does_not_log_in(tmp_path):
+    environment = dict(os.environ, PYTHONPATH=ROOT, REFINITIV_DSS_ENDPOINT="http://127.0.0.1:9/RestApi/v1/")
+    code = "import RefinitivAPIClient\nfrom RefinitivAPIClient import datashelf\n" \
+           "assert datashelf._default_datashelf is None"
+    completed = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=environment, capture_output=True)
+    assert completed.returncode == 0, completed.stderr.decode()
+    assert not list(tmp_path.iterdir())
+
+
+def test_bound_client_uses_its_account(server, identifiers):
+    client = Refinitiv(datashelf=Datashelf("alice", "password"))
+    assert client.schedule_manager.remote_schedules() == dict()
+    client.price_history.query(identifiers[:1], "2024-01-01", "2024-01-31")
+    # The request of the token is the only one without Authorization
+    assert set(server.state.requests_by_token) == {None, "Token mock-session-token-alice"}
+    assert client.schedule_manager._target is not ScheduleManagerClass
+    assert client.price_history._target is PriceHistoryStoreClass
+    PriceHistoryStoreClass.clear()
@@ -0,0 +1,76 @@
+"""Extraction results kept within a memory ceiling, spilling the excess to disk"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from RefinitivAPIClient import buffers
+from RefinitivAPIClient.buffers import ResultBuffer
+from RefinitivAPIClient.dss import Requests
+
+ROWS = [{"Identifier": f"MOCK{i}.O", "Trade Date": f"2024-01-{i % 28 + 1:02d}", "Close": i * 1.5} for i in range(50)]
+
+
+@pytest.fixture
+def without_arrow(monkeypatch):
+    monkeypatch.setattr(buffers, "pa", None)
+
+
+def fill(spill_dir, rows=ROWS):
+    buffer = ResultBuffer(memory_limit=2000, chunk_rows=10, spill_dir=str(spill_dir))
+    buffer.extend(rows)
+    return buffer
+
+
+def spilled_files(buffer):
+    return sorted(os.path.basename(i["path"]) for i in buffer._chunks if "path" in i)
+
+
+def test_spilled_rows_are_pickled_without_pyarrow(tmp_path, without_arrow):
+    buffer = fill(tmp_path)
+    assert buffer.spilled and 0 < buffer.spilled_rows < len(ROWS)
+    assert buffer.memory_used <= buffer.memory_limit
+    assert spilled_files(buffer) and all(i.endswith(".pickle") for i in spilled_files(buffer))
+    pd.testing.assert_frame_equal(buffer.to_pandas(), pd.DataFrame(ROWS))
+    assert list(buffer) == ROWS
+    pd.testing.assert_frame_equal(buffer.to_pandas(columns=["Close", "Missing"]),
+                                  pd.DataFrame(ROWS)[["Close"]].reindex(columns=["Close", "Missing"]))
+
+
+def test_spilled_rows_are_written_in_arrow(tmp_path):
+    pytest.importorskip("pyarrow")
+    buffer = fill(tmp_path)
+    assert buffer.spilled and all(i.endswith(".arrow") for i in spilled_files(buffer))
+    pd.testing.assert_frame_equal(buffer.to_pandas(), pd.DataFrame(ROWS))
+    pd.testing.assert_frame_equal(buffer.to_pandas(columns=["Identifier"]), pd.DataFrame(ROWS)[["Identifier"]])
+
+
+def test_columns_mixing_types_are_pickled(tmp_path):
+    pytest.importorskip("pyarrow")
+    rows = [dict(row, Close="n/a" if i % 2 else row["Close"]) for i, row in enumerate(ROWS)]
+    buffer = fill(tmp_path, rows)
+    assert buffer.spilled and all(i.endswith(".pickle") for i in spilled_files(buffer))
+    assert list(buffer) == rows
+
+
+def test_frames_and_close(tmp_path, without_arrow):
+    buffer = fill(tmp_path)
+    buffer.append_frame(pd.DataFrame(ROWS[:5]))
+    assert len(buffer) == len(ROWS) + 5
+    assert len(buffer.to_pandas()) == len(ROWS) + 5
+    assert os.listdir(tmp_path)
+    buffer.close()
+    assert os.listdir(tmp_path) == list() and len(buffer) == 0
+    assert buffer.to_pandas().empty
+
+
+def test_request_with_memory_limit_returns_a_buffer(server, client, identifiers, without_arrow):
+    server.config.rows_per_instrument = 5000
+    with Requests.request_price_history_data(identifiers, "20240101", "20240131", memory_limit=1) as buffer:
+        assert isinstance(buffer, ResultBuffer)
+        assert len(buffer) == 5000 * len(identifiers)
+        assert buffer.spilled_rows == 20000 and buffer.memory_used == 0
+        dataframe = buffer.to_pandas(columns=["Identifier"])
+        assert dataframe["Identifier"].value_counts().to_dict() == {i[0]: 5000 for i in identifiers}
+        assert buffer.notes is not None
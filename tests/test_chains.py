@@ -0,0 +1,58 @@
+"""Breadth-first expansion of nested Chain RICs"""
+
+from datetime import timedelta
+
+import pytest
+
+from RefinitivAPIClient.chains import ChainExpander
+from RefinitivAPIClient.dss import Requests
+
+
+@pytest.fixture
+def requested(server, monkeypatch):
+    """Chains requested to the server, in the order of the calls, over two levels of two sub-chains each"""
+    server.config.chain_size, server.config.chain_sub_chains, server.config.chain_depth = 3, 2, 2
+    request = Requests.request_components_of_chain_ric
+    calls = list()
+
+    def counting(chain_ric):
+        calls.append(chain_ric)
+        return request(chain_ric)
+
+    monkeypatch.setattr(Requests, "request_components_of_chain_ric", staticmethod(counting))
+    return calls
+
+
+def test_chains_are_expanded_level_by_level(client, requested):
+    constituents = ChainExpander().expand(".MOCK")
+    assert requested[0] == "0#.MOCK"
+    assert sorted(requested[1:3]) == ["0#.MOCK/0", "0#.MOCK/1"]
+    assert sorted(requested[3:]) == ["0#.MOCK/0/0", "0#.MOCK/0/1", "0#.MOCK/1/0", "0#.MOCK/1/1"]
+    assert len(constituents) == len(set(constituents)) == 1 + 2 + 4 * 3
+    assert not any(i[:2] == "0#" for i in constituents)
+
+
+def test_max_depth_stops_the_expansion(client, requested):
+    constituents = ChainExpander().expand("0#.MOCK", max_depth=1)
+    assert len(requested) == 3
+    assert sorted(constituents) == ["MOCK2.MK", "MOCK_02.MK", "MOCK_12.MK"]
+
+
+def test_memoized_chains_are_not_requested_again(client, requested):
+    expander = ChainExpander()
+    first = expander.expand_many(["0#.MOCK", ".MOCK"])
+    assert len(requested) == 7
+    second = expander.expand_many(["0#.MOCK/1", "0#.MOCK"])
+    assert second["0#.MOCK"] == first["0#.MOCK"]
+    assert len(second["0#.MOCK/1"]) == 7 and set(second["0#.MOCK/1"]) < set(first["0#.MOCK"])
+    assert len(requested) == 7
+    expander.clear()
+    expander.expand("0#.MOCK/1")
+    assert len(requested) == 10
+
+
+def test_expired_chains_are_requested_again(client, requested):
+    expander = ChainExpander(ttl=timedelta(0))
+    expander.expand("0#.MOCK")
+    expander.expand("0#.MOCK")
+    assert len(requested) == 14
@@ -0,0 +1,54 @@
+"""Append of large instrument lists in chunks sent at the same time"""
+
+import time
+
+from RefinitivAPIClient.dss import GUIOperations
+
+
+def create_list(name):
+    return GUIOperations.create_instrument_list(name)["ListId"]
+
+
+def test_chunks_are_merged_in_one_report(server, client):
+    securities = [(f"MOCK{i}.O", "Ric") for i in range(7)] + [("MOCK0.O", "Ric"), ("MOCK1.O", "Ric")]
+    list_id = create_list("chunked")
+    report = GUIOperations.add_securities_to_instrument_list_in_chunks(securities, list_id, chunk_size=2,
+                                                                       max_workers=4)
+    assert report["Submitted"] == 9
+    assert report["ValidCount"] == 7
+    assert report["DuplicateCount"] == 2 and sorted(report["Duplicates"]) == ["MOCK0.O", "MOCK1.O"]
+    assert report["InvalidCount"] == 0 and report["FailedChunks"] == list()
+    assert sorted(i["Identifier"] for i in server.state.lists[list_id]["Identifiers"]) == \
+        sorted(f"MOCK{i}.O" for i in range(7))
+
+
+def test_chunks_are_sent_at_the_same_time(server, client):
+    list_id = create_list("concurrent")
+    server.config.latency = 0.2
+    started = time.monotonic()
+    report = GUIOperations.add_securities_to_instrument_list_in_chunks([(f"MOCK{i}.O", "Ric") for i in range(8)],
+                                                                       list_id, chunk_size=2, max_workers=4)
+    assert time.monotonic() - started < 0.6
+    assert report["ValidCount"] == 8
+
+
+def test_failed_chunks_are_retried_then_reported(server, client, monkeypatch):
+    append = GUIOperations.add_securities_to_instrument_list
+    calls = list()
+
+    def failing(chunk, list_id, source=None, entity=False):
+        calls.append(chunk[0][0])
+        if chunk[0][0] == "MOCK0.O" and calls.count("MOCK0.O") == 1:
+            raise ConnectionError("Connection dropped")
+        if chunk[0][0] == "MOCK4.O":
+            return "There was an error while getting the data. Error Code: 500"
+        return append(chunk, list_id, source, entity)
+
+    monkeypatch.setattr(GUIOperations, "add_securities_to_instrument_list", staticmethod(failing))
+    securities = [(f"MOCK{i}.O", "Ric") for i in range(6)]
+    report = GUIOperations.add_securities_to_instrument_list_in_chunks(securities, create_list("retried"),
+                                                                       chunk_size=2, retries=2)
+    assert calls.count("MOCK0.O") == 2 and calls.count("MOCK4.O") == 3 and calls.count("MOCK2.O") == 1
+    assert report["ValidCount"] == 4
+    assert report["FailedChunks"] == [{"Chunk": 2, "Size": 2,
+                                       "Error": "There was an error while getting the data. Error Code: 500"}]
@@ -0,0 +1,81 @@
+"""refinitiv-extract command line runner and its checkpoints"""
+
+import pandas as pd
+import pytest
+
+from RefinitivAPIClient import cli
+from RefinitivAPIClient.codec import Codec
+from RefinitivAPIClient.dss import Operations
+
+HEADER = {"identifiers": "/data/universe.txt", "template": "EndOfDayPricingReportTemplate", "fields": "RIC",
+          "start_date": None, "batch_size": 3}
+
+
+@pytest.fixture
+def universe(tmp_path):
+    path = tmp_path / "universe.txt"
+    path.write_text("".join(f"MOCK{i}.O\n" for i in range(8)) + "\nUS0378331005,Isin\n")
+    return str(path)
+
+
+def run(universe, output, *extra):
+    return cli.main([universe, "--template", "EndOfDayPricingReportTemplate", "--fields", "RIC,Universal Close Price",
+                     "--output", output, "--batch-size", "3", "--interval", "0", "--extract-workers", "1",
+                     "--download-workers", "1"] + list(extra))
+
+
+def read_lines(checkpoint):
+    with open(checkpoint, "rb") as r:
+        return [Codec.loads(i) for i in r]
+
+
+def test_identifiers_are_read_with_their_types(universe):
+    assert list(cli.read_identifiers(universe)) == [(f"MOCK{i}.O", "Ric") for i in range(8)] + \
+        [("US0378331005", "Isin")]
+
+
+def test_checkpoint_is_read_only_with_the_same_parameters(tmp_path):
+    checkpoint = str(tmp_path / "out.csv.checkpoint")
+    assert cli.read_checkpoint(checkpoint, HEADER) == dict()
+    with open(checkpoint, "wb") as w:
+        w.write(Codec.dumps(HEADER) + b"\n")
+        w.write(Codec.dumps({"batch": 1, "identifiers": 3, "rows": 3}) + b"\n")
+    assert cli.read_checkpoint(checkpoint, HEADER) == {1: 3}
+    with pytest.raises(ValueError, match="different parameters"):
+        cli.read_checkpoint(checkpoint, dict(HEADER, batch_size=4))
+
+
+def test_run_writes_the_output_and_the_checkpoint(server, client, universe, tmp_path):
+    output = str(tmp_path / "out.csv")
+    assert run(universe, output) == 0
+    assert len(pd.read_csv(output)) == 9
+    lines = read_lines(output + ".checkpoint")
+    assert lines[0]["batch_size"] == 3 and lines[0]["fields"] == "RIC,Universal Close Price"
+    assert sorted(i["identifiers"] for i in lines[1:]) == [3, 3, 3]
+
+
+def test_resume_extracts_only_the_failed_batches(server, client, universe, tmp_path, monkeypatch):
+    download = Operations.download_extraction_file
+    calls = list()
+
+    def failing(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 2:
+            return "There was an error. Error Code: 500"
+        return download(*args, **kwargs)
+
+    monkeypatch.setattr(Operations, "download_extraction_file", staticmethod(failing))
+    output = str(tmp_path / "out.csv")
+    assert run(universe, output) == 1
+    assert len(pd.read_csv(output)) == 6 and len(read_lines(output + ".checkpoint")) == 3
+    assert run(universe, output, "--resume") == 0
+    assert len(calls) == 4
+    assert sorted(pd.read_csv(output)["Identifier"]) == sorted([f"MOCK{i}.O" for i in range(8)] + ["US0378331005"])
+    assert len(read_lines(output + ".checkpoint")) == 4
+
+
+def test_resume_with_other_parameters_is_refused(server, client, universe, tmp_path):
+    output = str(tmp_path / "out.csv")
+    assert run(universe, output) == 0
+    assert run(universe, output, "--resume", "--batch-size", "4") == 2
+    assert len(read_lines(output + ".checkpoint")) == 4
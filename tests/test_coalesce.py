@@ -0,0 +1,74 @@
+"""Extractions shared by the threads requesting identifiers at the same time"""
+
+import contextvars
+import threading
+
+import pytest
+
+from RefinitivAPIClient.coalesce import SingleFlight
+from RefinitivAPIClient.dss import CompositeCoalescer, EodPricingCoalescer, Requests, TermsAndConditionsCoalescer
+
+
+def run_together(func, arguments):
+    """Call func with each argument in its own thread, all at the same time"""
+    results = [None] * len(arguments)
+    barrier = threading.Barrier(len(arguments))
+
+    def call(position):
+        barrier.wait()
+        results[position] = func(arguments[position])
+
+    threads = [threading.Thread(target=contextvars.copy_context().run, args=(call, i)) for i in range(len(arguments))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@pytest.mark.parametrize("coalescer, function", [(EodPricingCoalescer, Requests.request_eod_pricing),
+                                                 (TermsAndConditionsCoalescer, Requests.request_tc_data),
+                                                 (CompositeCoalescer, Requests.request_composite_data)])
+def test_two_callers_share_one_extraction(server, client, monkeypatch, coalescer, function):
+    monkeypatch.setattr(coalescer, "window", 0.2)
+    Requests.request_eod_pricing([("WARMUP.O", "Ric")])
+    requests_count = server.state.requests_count
+    wanted = [[("MOCK0.O", "Ric"), ("MOCK1.O", "Ric")], [("MOCK1.O", "Ric"), ("MOCK2.O", "Ric")]]
+    results = run_together(lambda sec_list: function(sec_list, coalesce=True), wanted)
+    assert server.state.requests_count == requests_count + 1
+    for sec_list, rows in zip(wanted, results):
+        assert sorted(i["Identifier"] for i in rows) == sorted(i[0] for i in sec_list)
+        assert rows.notes["instruments_in_list"] == 3
+
+
+def test_composite_without_coalescing_keeps_the_response(server, client, identifiers):
+    values = Requests.request_composite_data(identifiers)
+    assert type(values) is dict
+    assert [i["Identifier"] for i in values["Contents"]] == [i[0] for i in identifiers]
+    assert values["ExtractionNotes"]["instruments_in_list"] == len(identifiers)
+
+
+def test_single_flight_shares_identical_calls():
+    calls = list()
+    started = threading.Event()
+    gate = threading.Event()
+    flight = SingleFlight()
+    results = list()
+
+    def slow(value):
+        calls.append(value)
+        started.set()
+        gate.wait(5)
+        return value * 2
+
+    leader = threading.Thread(target=lambda: results.append(flight.call(slow, 21)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(flight.call(slow, 21)))
+    follower.start()
+    follower.join(0.1)
+    gate.set()
+    leader.join()
+    follower.join()
+    assert results == [42, 42]
+    assert calls == [21]
@@ -0,0 +1,71 @@
+"""Incremental sync of the Corporate Actions events"""
+
+import json
+
+import pytest
+
+from RefinitivAPIClient.corporate_actions import CorporateActionsSync
+from RefinitivAPIClient.dss import Requests
+from RefinitivAPIClient.streaming import ExtractionStream
+
+UNIVERSE = [("MOCK0.O", "Ric"), ("MOCK1.O", "Ric")]
+
+
+def event(number, amount=1.0, deleted="N"):
+    return {"IdentifierType": "Ric", "Identifier": f"MOCK{number % 2}.O", "Corporate Actions ID": str(number),
+            "Dividend Rate": amount, "Delete Marker": deleted}
+
+
+def serve(monkeypatch, events, fail_after=None):
+    """Make request_ca_events stream the given events, failing after fail_after bytes if given"""
+    body = json.dumps({"Contents": events, "Notes": list()}).encode()
+
+    def chunks():
+        for position in range(0, len(body), 64):
+            if fail_after is not None and position >= fail_after:
+                raise ConnectionError("Connection dropped")
+            yield body[position:position + 64]
+
+    monkeypatch.setattr(Requests, "request_ca_events", staticmethod(lambda *args, **kwargs: ExtractionStream(chunks())))
+
+
+@pytest.fixture
+def store():
+    return CorporateActionsSync(":memory:")
+
+
+def test_sync_reports_new_changed_and_deleted(store, monkeypatch):
+    serve(monkeypatch, [event(1), event(2), event(3)])
+    assert len(store.sync(UNIVERSE, batch_size=2)["new"]) == 3
+    serve(monkeypatch, [event(1), event(2, 2.0), event(3, deleted="Y"), event(4)])
+    changes = store.sync(UNIVERSE, batch_size=2)
+    assert [i["Corporate Actions ID"] for i in changes["new"]] == ["4"]
+    assert [i["Corporate Actions ID"] for i in changes["changed"]] == ["2"]
+    assert [i["Corporate Actions ID"] for i in changes["deleted"]] == ["3"]
+    assert changes["unchanged"] == 1
+    assert sorted(i["Corporate Actions ID"] for i in store.events(store.universe_name(UNIVERSE))) == \
+        ["1", "2", "4"]
+
+
+def test_failed_sync_leaves_index_and_watermark_untouched(store, monkeypatch):
+    serve(monkeypatch, [event(1), event(2)])
+    store.sync(UNIVERSE)
+    universe = store.universe_name(UNIVERSE)
+    watermark = store.watermark(universe)
+    events = [event(1, 5.0)] + [event(number) for number in range(10, 60)]
+    serve(monkeypatch, events, fail_after=len(json.dumps({"Contents": events})) // 2)
+    with pytest.raises(ConnectionError):
+        store.sync(UNIVERSE, batch_size=2)
+    assert store.watermark(universe) == watermark
+    assert sorted(i["Corporate Actions ID"] for i in store.events(universe)) == ["1", "2"]
+    serve(monkeypatch, events)
+    changes = store.sync(UNIVERSE, batch_size=2)
+    assert [i["Corporate Actions ID"] for i in changes["changed"]] == ["1"]
+    assert len(changes["new"]) == 50
+
+
+def test_event_repeated_across_batches_is_new_once(store, monkeypatch):
+    serve(monkeypatch, [event(1), event(2), event(1)])
+    changes = store.sync(UNIVERSE, batch_size=2)
+    assert [i["Corporate Actions ID"] for i in changes["new"]] == ["1", "2"]
+    assert changes["unchanged"] == 1
@@ -0,0 +1,81 @@
+"""Download of the extracted files through the storage redirect"""
+
+import requests
+
+from RefinitivAPIClient.dss import GUIOperations, Operations
+from RefinitivAPIClient.transport import Transport
+
+
+def add_file(server, identifiers, fields=("RIC", "Universal Close Price")):
+    """
+    Register an extracted file on the stand-in server
+    :return: the id of the file
+    :rtype: str
+    """
+    file_id = "VjF8testdata"
+    template = {"TemplateType": "EndOfDayPricing", "ContentFields": [{"FieldName": i} for i in fields]}
+    server.state.files[file_id] = (template, [{"Identifier": i, "IdentifierType": j} for i, j in identifiers])
+    return file_id
+
+
+def record_responses(monkeypatch):
+    """
+    Record the responses of the calls made by the Transport
+    :return: the list where the responses are appended
+    :rtype: list
+    """
+    responses = list()
+    request = Transport.session.request
+
+    def recording(*args, **kwargs):
+        response = request(*args, **kwargs)
+        responses.append(response)
+        return response
+
+    monkeypatch.setattr(Transport.session, "request", recording)
+    return responses
+
+
+def test_storage_rejects_the_authorization_header(server, client, identifiers):
+    add_file(server, identifiers)
+    response = requests.get(server.endpoint.replace("/RestApi/v1/", "/storage/VjF8testdata"),
+                            headers={"Authorization": "Token mock-session-token"})
+    assert response.status_code == 400
+
+
+def test_direct_download_drops_the_authorization_header(server, client, identifiers, monkeypatch):
+    file_id = add_file(server, identifiers)
+    responses = record_responses(monkeypatch)
+    content = GUIOperations.get_extracted_data_or_notes(file_id)
+    assert type(content) is bytes
+    assert content.decode().splitlines()[1].startswith("Ric,MOCK0.O")
+    assert [i.status_code for i in responses] == [302, 200]
+    assert "Authorization" in responses[0].request.headers
+    assert "Authorization" not in responses[1].request.headers
+
+
+def test_download_without_redirect(server, client, identifiers, monkeypatch):
+    file_id = add_file(server, identifiers)
+    responses = record_responses(monkeypatch)
+    content = GUIOperations.get_extracted_data_or_notes(file_id, direct_download=False)
+    assert len(content.decode().splitlines()) == len(identifiers) + 1
+    assert [i.status_code for i in responses] == [200]
+
+
+def test_gzip_body_is_decoded_on_disk(server, client, identifiers, monkeypatch, tmp_path):
+    file_id = add_file(server, identifiers)
+    responses = record_responses(monkeypatch)
+    filename = GUIOperations.get_extracted_data_or_notes(file_id, filename=str(tmp_path / "data.csv"),
+                                                         chunk_size=16)
+    assert responses[-1].headers["Content-Encoding"] == "gzip"
+    with open(filename) as r:
+        lines = r.read().splitlines()
+    assert lines[0] == 'IdentifierType,Identifier,"RIC","Universal Close Price"'
+    assert [i.split(",")[1] for i in lines[1:]] == [i[0] for i in identifiers]
+
+
+def test_download_data_end_to_end(server, client, identifiers):
+    dataframe = Operations.download_data_end_to_end([i[0] for i in identifiers], "EndOfDayPricingReportTemplate",
+                                                    ["RIC", "Universal Close Price"])
+    assert list(dataframe["Identifier"]) == [i[0] for i in identifiers]
+    assert list(dataframe["RIC"]) == [i[0] for i in identifiers]
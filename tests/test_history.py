@@ -0,0 +1,44 @@
+"""Local Price History store filled from DSS only where there are gaps"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from RefinitivAPIClient.history import PriceHistoryStore
+
+
+@pytest.fixture
+def store(server):
+    server.config.dated_history = True
+    store = PriceHistoryStore(":memory:", fields=["Trade Date", "Universal Close Price"])
+    yield store
+    store.clear()
+
+
+def test_query_fills_only_the_gaps(server, client, store, identifiers):
+    dataframe = store.query(identifiers, "2024-01-01", "2024-03-31")
+    assert len(dataframe) == len(identifiers) * 65
+    assert store.gaps(identifiers, "2024-01-01", "2024-03-31") == dict()
+
+    requests_count = server.state.requests_count
+    again = store.query(identifiers, "2024-01-01", "2024-03-31")
+    assert server.state.requests_count == requests_count
+    assert again.equals(dataframe)
+
+    gaps = store.gaps(identifiers, "2023-12-01", "2024-04-30")
+    assert gaps[identifiers[0]] == [(date(2023, 12, 1), date(2023, 12, 31)), (date(2024, 4, 1), date(2024, 4, 30))]
+    wider = store.query(identifiers, "2023-12-01", "2024-04-30")
+    assert len(wider) == len(identifiers) * (21 + 65 + 22)
+    assert not wider.duplicated(["Identifier", "Trade Date"]).any()
+
+
+def test_today_is_never_covered(server, client, store, identifiers):
+    today = date.today()
+    store.query(identifiers[:1], today - timedelta(days=10), today)
+    assert store.gaps(identifiers[:1], today - timedelta(days=10), today) == {identifiers[0]: [(today, today)]}
+
+
+def test_read_without_fill(server, client, store, identifiers):
+    dataframe = store.query(identifiers, "2024-01-01", "2024-01-31", fill=False)
+    assert dataframe.empty
+    assert server.state.requests_count == 0
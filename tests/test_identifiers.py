@@ -0,0 +1,63 @@
+"""Columnar batches of identifiers serialized in the requests"""
+
+import json
+
+import pytest
+
+from RefinitivAPIClient.identifiers import IdentifierBatch
+
+PAIRS = [("AAPL.O", "Ric"), ('we"ird\\id', "Ric"), ("US0378331005", "Isin"), ("café€", "Isin"),
+         ("nul\x00tab\t", "Ric"), ("", "Sedol"), ("MSFT.O", "Ric")]
+
+
+def as_dicts(pairs, **fields):
+    return [dict({"Identifier": i[0], "IdentifierType": i[1]}, **fields) for i in pairs]
+
+
+def test_json_round_trips_escaped_and_mixed_types():
+    batch = IdentifierBatch.from_tuples(PAIRS)
+    assert json.loads(batch.to_json()) == as_dicts(PAIRS)
+    assert list(batch) == PAIRS
+    assert batch[1] == PAIRS[1] and batch[-1] == PAIRS[-1]
+
+
+@pytest.mark.parametrize("start, stop", [(0, 0), (1, 4), (2, 3), (3, 7), (5, 100)])
+def test_slices_share_the_buffers(start, stop):
+    batch = IdentifierBatch.from_tuples(PAIRS)[start:stop]
+    assert list(batch) == PAIRS[start:stop]
+    assert json.loads(batch.to_json()) == as_dicts(PAIRS[start:stop])
+    assert json.loads(batch.with_fields(Source="*").to_json()) == as_dicts(PAIRS[start:stop], Source="*")
+
+
+def test_invalid_access_is_rejected():
+    batch = IdentifierBatch.from_tuples(PAIRS)
+    with pytest.raises(IndexError):
+        batch[len(PAIRS)]
+    with pytest.raises(ValueError):
+        batch[::2]
+
+
+def test_duplicates_are_removed_keeping_the_first():
+    batch = IdentifierBatch.from_tuples(PAIRS + [PAIRS[1], ("AAPL.O", "Isin"), PAIRS[3]]).with_fields(Source="*")
+    deduplicated = batch.deduplicate()
+    assert list(deduplicated) == PAIRS + [("AAPL.O", "Isin")]
+    assert deduplicated.fields == {"Source": "*"}
+
+
+def test_identifiers_of_one_type():
+    identifiers = ["AAPL.O", 'quo"te', "é"]
+    batch = IdentifierBatch.from_identifiers(identifiers, "Ric")
+    assert json.loads(batch.to_json()) == as_dicts([(i, "Ric") for i in identifiers])
+
+
+def test_request_body_splices_the_batches():
+    batch = IdentifierBatch.from_tuples(PAIRS)
+    body = {"ExtractionRequest": {"ContentFieldNames": ["RIC"],
+                                  "IdentifierList": {"InstrumentIdentifiers": batch[:3],
+                                                     "ValidationOptions": {"AllowHistoricalInstruments": True}}},
+            "Other": IdentifierBatch.request_identifiers(batch[3:], Source="*")}
+    expected = json.loads(json.dumps(body, default=lambda i: as_dicts(i, **i.fields)))
+    assert json.loads(IdentifierBatch.dumps(body)) == expected
+    assert IdentifierBatch.request_identifiers(PAIRS[:2], Source="*") == as_dicts(PAIRS[:2], Source="*")
+    with pytest.raises(TypeError):
+        IdentifierBatch.dumps({"value": object()})
@@ -0,0 +1,32 @@
+"""Extraction of several templates over one shared instrument list"""
+
+import os
+
+from RefinitivAPIClient.dss import Operations
+from RefinitivAPIClient.sinks import CSVSink
+
+TEMPLATES = [{"template_type": "EndOfDayPricingReportTemplate", "fields": ["RIC", "Universal Close Price"]},
+             {"template_type": "TermsAndConditionsReportTemplate", "fields": ["RIC", "Issue Date"], "name": "tc"}]
+RICS = [f"MOCK{i}.O" for i in range(5)]
+
+
+def test_templates_share_one_list(server, client):
+    results = Operations.download_multiple_templates_end_to_end(RICS, TEMPLATES, interval=0)
+    assert sorted(results) == ["EndOfDayPricingReportTemplate", "tc"]
+    for dataframe in results.values():
+        assert sorted(set(dataframe["Identifier"])) == RICS
+    assert len(server.state.lists) == 1
+    list_id = next(iter(server.state.lists))
+    assert len(server.state.lists[list_id]["Identifiers"]) == len(RICS)
+    assert len(server.state.templates) == 2
+    assert [i["ListId"] for i in server.state.schedules.values()] == [list_id, list_id]
+
+
+def test_sink_output_replaces_the_dataframe(server, client):
+    results, trace = Operations.download_multiple_templates_end_to_end(
+        RICS, TEMPLATES, sinks={"tc": CSVSink("tc.csv")}, interval=0, with_trace=True)
+    assert results["tc"] == "tc.csv" and os.path.getsize("tc.csv") > 0
+    assert len(results["EndOfDayPricingReportTemplate"]) > 0
+    names = [i.name for i in trace.spans]
+    assert names.count("create_list") == 1 and names.count("schedule") == 2
+    assert {"EndOfDayPricingReportTemplate", "tc", "sink"} <= set(names)
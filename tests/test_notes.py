@@ -0,0 +1,26 @@
+"""Parsed Notes carried by the results of the extractions"""
+
+from RefinitivAPIClient.chains import ChainExpanderClass
+
+
+def test_ownership_keeps_the_response(server, client, identifiers):
+    values = client.request_data.request_ownership_data(identifiers)
+    assert type(values) is dict
+    assert [i["Identifier"] for i in values["Contents"]] == [i[0] for i in identifiers]
+    assert values["Notes"] == values["ExtractionNotes"].raw
+    assert values["ExtractionNotes"]["instruments_in_list"] == len(identifiers)
+
+
+def test_chain_keeps_the_response(server, client):
+    values = client.request_data.request_components_of_chain_ric(".MOCK")
+    assert type(values) is dict
+    assert len(values["Contents"]) == server.config.chain_size
+    assert values["ExtractionNotes"]["instruments_in_list"] == 1
+
+
+def test_chain_expansion_reads_the_result(server, client):
+    ChainExpanderClass.clear()
+    server.config.chain_size, server.config.chain_sub_chains, server.config.chain_depth = 3, 1, 1
+    constituents = client.request_data.expand_chain_rics("0#.MOCK")
+    ChainExpanderClass.clear()
+    assert sorted(constituents) == ["MOCK1.MK", "MOCK2.MK", "MOCK_00.MK", "MOCK_01.MK", "MOCK_02.MK"]
@@ -0,0 +1,68 @@
+"""Extraction of large universes in batches through the pipeline"""
+
+import pytest
+
+from RefinitivAPIClient.dss import GUIOperations, Operations
+from RefinitivAPIClient.sinks import DataFrameSink
+
+FIELDS = ["RIC", "Universal Close Price"]
+
+
+@pytest.fixture
+def universe():
+    return [(f"MOCK{i}.O", "Ric") for i in range(9)]
+
+
+def run(universe, **kwargs):
+    return Operations.extract_in_pipeline(universe, "EndOfDayPricingReportTemplate", FIELDS, DataFrameSink(),
+                                          batch_size=3, interval=0, **kwargs)
+
+
+def fail_once(monkeypatch, owner, name, outcome):
+    """Make the first call of a function return outcome, or raise it if it is an exception"""
+    func = getattr(owner, name)
+    calls = list()
+
+    def failing(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        return func(*args, **kwargs)
+
+    monkeypatch.setattr(owner, name, staticmethod(failing))
+
+
+def test_lists_and_schedules_are_deleted(server, client, universe):
+    result = run(universe)
+    assert sorted(result["output"]["Identifier"]) == sorted(i[0] for i in universe)
+    assert result["failed_batches"] == list()
+    assert server.state.lists == dict()
+    assert server.state.schedules == dict()
+
+
+def test_failed_download_is_reported(server, client, universe, monkeypatch):
+    fail_once(monkeypatch, Operations, "download_extraction_file", "There was an error. Error Code: 500")
+    result = run(universe, extract_workers=1, download_workers=1)
+    assert len(result["failed_batches"]) == 1 and len(result["failed_batches"][0]) == 3
+    assert len(result["output"]) == 6
+    assert server.state.lists == dict() and server.state.schedules == dict()
+
+
+@pytest.mark.parametrize("outcome", ["There was an error while getting the data. Error Code: 500",
+                                     ConnectionError("Connection dropped")])
+def test_failed_list_creation_is_reported(server, client, universe, monkeypatch, outcome):
+    fail_once(monkeypatch, GUIOperations, "create_instrument_list", outcome)
+    result = run(universe, extract_workers=1)
+    assert len(result["failed_batches"]) == 1
+    assert len(result["output"]) == 6
+
+
+def test_failed_reusable_list_is_reported(server, client, universe, monkeypatch):
+    fail_once(monkeypatch, GUIOperations, "create_instrument_list", "There was an error. Error Code: 500")
+    result = run(universe, extract_workers=1, reuse=True)
+    assert len(result["failed_batches"]) == 1
+    assert len(result["output"]) == 6
+    assert len(server.state.lists) == 2
+    assert server.state.schedules == dict()
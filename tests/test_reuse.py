@@ -0,0 +1,80 @@
+"""Content-addressed instrument lists"""
+
+import contextvars
+import threading
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from RefinitivAPIClient.dss import GUIOperations
+from RefinitivAPIClient.reuse import ReusableObjects
+
+
+def test_list_is_named_once_complete(server, client, identifiers):
+    list_id = ReusableObjects.get_or_create_instrument_list(identifiers)
+    subject_list = server.state.lists[list_id]
+    assert subject_list["Name"] == ReusableObjects.list_name(identifiers)
+    assert len(subject_list["Identifiers"]) == len(identifiers)
+    assert ReusableObjects.get_or_create_instrument_list(list(reversed(identifiers))) == list_id
+    assert len(server.state.lists) == 1
+
+
+def test_list_partly_filled_is_deleted(server, client, identifiers, monkeypatch):
+    add = GUIOperations.add_securities_to_instrument_list
+
+    def failing(list_of_securities, list_id, source=None, entity=False):
+        if ("MOCK3.O", "Ric") in [(i[0], i[1]) for i in list_of_securities]:
+            return "There was an error while getting the data. Error Code: 500"
+        return add(list_of_securities, list_id, source, entity)
+
+    monkeypatch.setattr(GUIOperations, "add_securities_to_instrument_list", staticmethod(failing))
+    in_chunks = GUIOperations.add_securities_to_instrument_list_in_chunks
+    monkeypatch.setattr(GUIOperations, "add_securities_to_instrument_list_in_chunks", staticmethod(
+        lambda securities, list_id, **kwargs: in_chunks(securities, list_id, chunk_size=2, retries=0, **kwargs)))
+    with pytest.raises(RuntimeError, match="1 chunks"):
+        ReusableObjects.get_or_create_instrument_list(identifiers)
+    assert server.state.lists == dict()
+
+
+def test_concurrent_callers_share_one_complete_list(server, client, identifiers):
+    results = list()
+
+    def create():
+        results.append(ReusableObjects.get_or_create_instrument_list(identifiers))
+
+    threads = [threading.Thread(target=contextvars.copy_context().run, args=(create,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(results)) == 1 and len(results) == 4
+    assert len(server.state.lists) == 1
+    assert len(server.state.lists[results[0]]["Identifiers"]) == len(identifiers)
+
+
+def test_name_taken_by_another_process(server, client, identifiers):
+    name = ReusableObjects.list_name(identifiers)
+    other = GUIOperations.create_instrument_list(name)["ListId"]
+    GUIOperations.add_securities_to_instrument_list(identifiers, other)
+    assert ReusableObjects.get_or_create_instrument_list(identifiers) == other
+
+
+def test_collect_garbage_keeps_the_objects_in_use(server, client, identifiers):
+    from RefinitivAPIClient.reuse import _uses
+
+    list_id = ReusableObjects.get_or_create_instrument_list(identifiers)
+    entity_list_id = ReusableObjects.get_or_create_instrument_list(identifiers, entity=True)
+    for subject_list in server.state.lists.values():
+        subject_list["Created"] = subject_list["Modified"] = "2020-01-01T00:00:00Z"
+    # Never modified, but resolved just now
+    assert ReusableObjects.collect_garbage(max_age=timedelta(days=7), dry_run=True) == \
+        {"lists": list(), "entity_lists": list(), "templates": list()}
+    with _uses["lock"], _uses["connection"]:
+        _uses["connection"].execute("UPDATE last_used SET used_at = ?",
+                                    [(datetime.now() - timedelta(days=8)).timestamp()])
+    deleted = ReusableObjects.collect_garbage(max_age=timedelta(days=7))
+    assert deleted["lists"] == [ReusableObjects.list_name(identifiers)]
+    assert deleted["entity_lists"] == [ReusableObjects.list_name(identifiers, entity=True)]
+    assert entity_list_id not in server.state.lists and list_id not in server.state.lists
+    assert ReusableObjects.last_uses() == dict()
@@ -0,0 +1,72 @@
+"""Extractions routed on-demand or scheduled by estimated size"""
+
+import pytest
+
+from RefinitivAPIClient.dss import Operations, Requests
+from RefinitivAPIClient.routing import ON_DEMAND, SCHEDULED, ExtractionRouter
+
+
+@pytest.fixture
+def router():
+    return ExtractionRouter(max_on_demand_identifiers=10, max_on_demand_cells=100)
+
+
+def test_identifier_threshold(router):
+    assert router.route(10, "EndOfDayPricingReportTemplate", ["RIC"]) == ON_DEMAND
+    assert router.route(11, "EndOfDayPricingReportTemplate", ["RIC"]) == SCHEDULED
+
+
+def test_cell_threshold(router):
+    assert router.route(10, "EndOfDayPricingReportTemplate", ["Field"] * 10) == ON_DEMAND
+    assert router.route(10, "EndOfDayPricingReportTemplate", ["Field"] * 11) == SCHEDULED
+
+
+def test_price_history_counts_the_business_days(router):
+    assert ExtractionRouter.rows_per_identifier("PriceHistoryReportTemplate", "2024-01-01", "2024-01-15") == 10
+    assert router.estimate(2, "PriceHistoryReportTemplate", ["Close"], "2024-01-01", "2024-01-15") == 20
+    assert router.route(5, "PriceHistoryReportTemplate", ["Close"], "2024-01-01", "2024-01-15") == ON_DEMAND
+    assert router.route(5, "PriceHistoryReportTemplate", ["Close"], "2024-01-01", "2024-02-15") == SCHEDULED
+
+
+def test_forced_route(router):
+    assert router.route(1000, "EndOfDayPricingReportTemplate", ["RIC"], force=ON_DEMAND) == ON_DEMAND
+    with pytest.raises(ValueError):
+        router.route(1, "EndOfDayPricingReportTemplate", ["RIC"], force="later")
+
+
+@pytest.fixture
+def routes(monkeypatch):
+    """Record the Condition of the on-demand extractions and the templates of the scheduled ones"""
+    routes = list()
+
+    def on_demand(securities, template_type, fields, condition=None):
+        routes.append((ON_DEMAND, template_type, condition))
+        return list()
+
+    def scheduled(securities, template_type, fields, sink, **kwargs):
+        routes.append((SCHEDULED, template_type, None))
+        return {"output": sink.close()}
+
+    monkeypatch.setattr(Requests, "request_extraction", staticmethod(on_demand))
+    monkeypatch.setattr(Operations, "extract_in_pipeline", staticmethod(scheduled))
+    return routes
+
+
+def test_on_demand_corporate_actions_get_the_scheduled_condition(routes, identifiers):
+    Operations.extract(identifiers, "CorporateActionsStandardReportTemplate", ["Corporate Action Type"])
+    route, template_type, condition = routes[0]
+    assert route == ON_DEMAND
+    assert condition["ReportDateRangeType"] == "Range" and condition["PreviousDays"] == 30
+    assert condition["IncludeDividendEvents"] is True
+    Operations.extract(identifiers, "CorporateActionsStandardReportTemplate", ["Corporate Action Type"],
+                       condition={"ReportDateRangeType": "Last"})
+    assert routes[1] == (ON_DEMAND, "CorporateActionsStandardReportTemplate", {"ReportDateRangeType": "Last"})
+
+
+def test_templates_without_a_default_condition_are_scheduled(routes, identifiers):
+    Operations.extract(identifiers, "EndOfDayPricingReportTemplate", ["RIC"])
+    Operations.extract(identifiers, "CorporateActionsIpoReportTemplate", ["RIC"])
+    Operations.extract(identifiers, "CorporateActionsIpoReportTemplate", ["RIC"], condition={"PreviousDays": 5})
+    assert routes == [(ON_DEMAND, "EndOfDayPricingReportTemplate", None),
+                      (SCHEDULED, "CorporateActionsIpoReportTemplate", None),
+                      (ON_DEMAND, "CorporateActionsIpoReportTemplate", {"PreviousDays": 5})]
@@ -0,0 +1,86 @@
+"""Recurring schedules watched by the ScheduleManager"""
+
+import time
+
+import pytest
+
+from RefinitivAPIClient.dss import GUIOperations
+from RefinitivAPIClient.schedules import ScheduleManager
+from RefinitivAPIClient.sinks import DataFrameSink
+
+
+class FlakySink(DataFrameSink):
+    """DataFrameSink whose first writes fail"""
+
+    def __init__(self, failures=1):
+        super().__init__()
+        self.failures = failures
+
+    def write(self, dataframe):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("Disk full")
+        super().write(dataframe)
+
+
+@pytest.fixture
+def objects(server, client, identifiers):
+    server.config.recurrence_period = 0.05
+    list_id = GUIOperations.create_instrument_list("schedules_test_list")["ListId"]
+    GUIOperations.add_securities_to_instrument_list(identifiers, list_id)
+    report_id = GUIOperations.create_template("EndOfDayPricingReportTemplate", ["RIC", "Universal Close Price"],
+                                              "schedules_test_template")["ReportTemplateId"]
+    return list_id, report_id
+
+
+def test_unchanged_schedule_is_not_recreated(server, objects):
+    list_id, report_id = objects
+    schedule_id = ScheduleManager().ensure("daily_eod", list_id, report_id, DataFrameSink(), at="18:30")
+    requests_count = server.state.requests_count
+    assert ScheduleManager().ensure("daily_eod", list_id, report_id, DataFrameSink(), at="18:30") == schedule_id
+    assert server.state.requests_count == requests_count + 1
+    changed = ScheduleManager().ensure("daily_eod", list_id, report_id, DataFrameSink(), at="19:00")
+    assert changed != schedule_id
+    assert list(server.state.schedules) == [changed]
+
+
+def test_failed_write_is_retried(server, objects):
+    list_id, report_id = objects
+    manager = ScheduleManager()
+    sink = FlakySink()
+    manager.ensure("daily_eod", list_id, report_id, sink, backfill=True)
+    time.sleep(0.12)
+    first = manager.poll()
+    # No more runs from now on
+    server.config.recurrence_period = 3600
+    runs = [i["ReportExtractionId"] for i in next(iter(server.state.schedules.values()))["runs"]]
+    assert len(runs) >= 2
+    assert [i[1] for i in first] == runs[1:]
+    assert [i[1] for i in manager.poll()] == runs[:1]
+    assert manager.poll() == list()
+    assert len(sink._frames) == len(runs)
+
+
+def test_failed_download_leaves_nothing_in_flight(server, objects, monkeypatch):
+    from RefinitivAPIClient.dss import Operations
+
+    list_id, report_id = objects
+    manager = ScheduleManager()
+    sink = DataFrameSink()
+    manager.ensure("daily_eod", list_id, report_id, sink, backfill=True)
+    time.sleep(0.12)
+    download = Operations.download_extraction_in_dataframe
+
+    def failing(report_extraction_id):
+        raise ConnectionError("Connection reset by peer")
+
+    monkeypatch.setattr(Operations, "download_extraction_in_dataframe", staticmethod(failing))
+    assert manager.poll() == list()
+    # No more runs from now on
+    server.config.recurrence_period = 3600
+    assert manager._watched["daily_eod"]["in_flight"] == set()
+    monkeypatch.setattr(Operations, "download_extraction_in_dataframe", staticmethod(download))
+    runs = [i["ReportExtractionId"] for i in next(iter(server.state.schedules.values()))["runs"]]
+    assert len(runs) >= 2
+    assert sorted(i[1] for i in manager.poll()) == sorted(runs)
+    assert len(sink._frames) == len(runs)
@@ -0,0 +1,47 @@
+"""Search of many identifiers at the same time"""
+
+import time
+
+import pytest
+
+from RefinitivAPIClient.dss import Searches
+from RefinitivAPIClient.xref import CrossReferenceClass
+
+
+@pytest.fixture
+def searched(monkeypatch):
+    """Identifiers searched remotely, in the order of the calls"""
+    CrossReferenceClass.clear()
+    search = Searches.instrument_search
+    calls = list()
+
+    def counting(identifier_type, identifier, preferred_return_type, instrument_type_groups=None):
+        calls.append(identifier)
+        return search(identifier_type, identifier, preferred_return_type, instrument_type_groups)
+
+    monkeypatch.setattr(Searches, "instrument_search", staticmethod(counting))
+    yield calls
+    CrossReferenceClass.clear()
+
+
+def test_duplicates_are_searched_once(server, client, searched):
+    results = Searches.batch_instrument_search("Ric", ["AAPL.O", "MSFT.O", "AAPL.O"], "Isin", rate=None)
+    assert list(results) == ["AAPL.O", "MSFT.O"]
+    assert sorted(searched) == ["AAPL.O", "MSFT.O"]
+    assert all(i[0]["IdentifierType"] == "Isin" for i in results.values())
+
+
+def test_resolved_identifiers_are_read_from_the_cache(server, client, searched):
+    first = Searches.batch_instrument_search("Ric", ["AAPL.O", "MSFT.O"], "Isin", rate=None)
+    second = Searches.batch_instrument_search("Ric", ["AAPL.O", "MSFT.O", "IBM.N"], "Isin", rate=None)
+    assert sorted(searched[:2]) == ["AAPL.O", "MSFT.O"] and searched[2:] == ["IBM.N"]
+    assert {key: second[key] for key in first} == first
+    Searches.batch_instrument_search("Ric", ["AAPL.O"], "Isin", rate=None, use_cache=False)
+    assert searched[3:] == ["AAPL.O"]
+
+
+def test_searches_are_kept_within_the_rate(server, client, searched):
+    started = time.monotonic()
+    results = Searches.batch_instrument_search("Ric", [f"MOCK{i}.O" for i in range(8)], "Isin", rate=5)
+    assert time.monotonic() - started >= 0.5
+    assert len(results) == 8 and len(searched) == 8
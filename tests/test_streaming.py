@@ -0,0 +1,45 @@
+"""Incremental parse of the ExtractWithNotes responses"""
+
+import json
+
+from RefinitivAPIClient.dss import Requests
+from RefinitivAPIClient.streaming import ExtractionStream
+
+
+def chunked(body, size):
+    """Split a body in chunks of size bytes, as read from the socket"""
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def test_rows_split_across_chunks():
+    contents = [{"Identifier": "MOCK.O", "Name": "Société Générale", "Price": 12.5 + i, "Volume": 1000 * i}
+                for i in range(20)]
+    body = json.dumps({"@odata.context": "mock", "Contents": contents, "Notes": ["Processing completed"]},
+                      ensure_ascii=False).encode()
+    for size in [1, 3, 7, 64, len(body)]:
+        stream = ExtractionStream(chunked(body, size))
+        assert list(stream) == contents
+        assert stream.notes == ["Processing completed"]
+        assert stream.metadata["@odata.context"] == "mock"
+        assert stream.bytes_read == len(body)
+
+
+def test_notes_before_contents():
+    body = json.dumps({"Notes": ["first"], "Contents": [{"a": 1}, {"a": 2}]}).encode()
+    stream = ExtractionStream(chunked(body, 5))
+    assert [[i["a"] for i in batch] for batch in stream.iter_batches(1)] == [[1], [2]]
+    assert stream.notes == ["first"]
+
+
+def test_streaming_matches_the_loaded_response(server, client, identifiers):
+    server.config.rows_per_instrument = 30
+    loaded = Requests.request_price_history_data(identifiers)
+    stream = Requests.request_price_history_data(identifiers, streaming=True)
+    assert list(stream) == list(loaded)
+    assert stream.extraction_notes["instruments_in_list"] == len(identifiers)
+    assert loaded.notes["instruments_in_list"] == len(identifiers)
+
+
+def test_streaming_to_pandas(server, client, identifiers):
+    dataframe = Requests.request_eod_pricing(identifiers, streaming=True).to_pandas()
+    assert list(dataframe["Identifier"]) == [i[0] for i in identifiers]
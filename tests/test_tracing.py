@@ -0,0 +1,41 @@
+"""Stages of a trace updated from several threads"""
+
+import contextvars
+import threading
+
+from RefinitivAPIClient.metrics import RequestRecord
+from RefinitivAPIClient.tracing import Trace, Tracing
+
+
+def test_concurrent_requests_are_all_counted():
+    record = RequestRecord("GET", "http://mock", "mock")
+    record.bytes_in = 3
+    record.bytes_out = 2
+    trace = Trace("concurrent")
+    with trace.activate():
+        with Tracing.stage("parent") as parent:
+            def work():
+                with Tracing.stage("child"):
+                    for _ in range(2000):
+                        Tracing.record_request(record)
+                        Tracing.add_rows(1)
+
+            threads = [threading.Thread(target=contextvars.copy_context().run, args=(work,)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    assert parent.requests == 8 * 2000
+    assert parent.bytes_in == 3 * 8 * 2000
+    assert parent.bytes_out == 2 * 8 * 2000
+    assert sum(i.rows for i in trace.spans if i.name == "child") == 8 * 2000
+
+
+def test_timestamps_are_utc():
+    trace = Trace("utc")
+    with trace.activate():
+        with Tracing.stage("stage"):
+            pass
+    exported = trace.to_dict()
+    assert exported["started_at"].endswith("Z") and "+" not in exported["started_at"]
+    assert exported["spans"][0]["started_at"].endswith("Z")
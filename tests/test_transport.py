@@ -0,0 +1,107 @@
+"""Timings and retries of the Transport"""
+
+import socket
+import threading
+
+import pytest
+import requests
+
+from RefinitivAPIClient.metrics import MetricsClass
+from RefinitivAPIClient.transport import Transport, _build_session
+
+
+class DroppingServer:
+    """Accept the connections and close them once the call has been read, without answering"""
+
+    def __init__(self):
+        self.socket = socket.create_server(("127.0.0.1", 0))
+        self.port = self.socket.getsockname()[1]
+        self.connections = 0
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                connection, _ = self.socket.accept()
+            except OSError:
+                return
+            self.connections += 1
+            connection.recv(65536)
+            connection.close()
+
+    def close(self):
+        self.socket.close()
+
+
+@pytest.fixture
+def records():
+    records = list()
+    MetricsClass.add_hook(records.append)
+    yield records
+    MetricsClass.remove_hook(records.append)
+
+
+@pytest.fixture
+def fresh_session(monkeypatch):
+    monkeypatch.setattr(Transport, "session", _build_session())
+    monkeypatch.setattr(Transport, "backoff", 0.0)
+
+
+def test_host_resolved_once_per_connection(server, client, records, fresh_session, monkeypatch):
+    lookups = list()
+    getaddrinfo = socket.getaddrinfo
+
+    def counting(host, *args, **kwargs):
+        lookups.append(host)
+        return getaddrinfo(host, *args, **kwargs)
+
+    monkeypatch.setattr(socket, "getaddrinfo", counting)
+    url = server.endpoint.replace("127.0.0.1", "localhost") + "Extractions/ExtractedFiles"
+    assert Transport.get(url).status_code == 200
+    assert Transport.get(url).status_code == 200
+    assert lookups.count("localhost") == 1
+    assert records[0].dns > 0 and records[0].connect > 0
+    assert records[1].dns == 0 and records[1].connect == 0
+
+
+def test_dropped_post_is_not_replayed(fresh_session, records):
+    dropping = DroppingServer()
+    try:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            Transport.post(f"http://127.0.0.1:{dropping.port}/Extractions/InstrumentLists", json={"Name": "list"})
+        assert dropping.connections == 1
+        assert records[-1].retries == 0
+        with pytest.raises(requests.exceptions.ConnectionError):
+            Transport.get(f"http://127.0.0.1:{dropping.port}/Extractions/InstrumentLists")
+        assert dropping.connections == 1 + 1 + Transport.max_retries
+        assert records[-1].retries == Transport.max_retries
+    finally:
+        dropping.close()
+
+
+def test_post_retried_when_not_sent(fresh_session, records):
+    unused = socket.create_server(("127.0.0.1", 0))
+    port = unused.getsockname()[1]
+    unused.close()
+    with pytest.raises(requests.exceptions.ConnectionError):
+        Transport.post(f"http://127.0.0.1:{port}/Extractions/InstrumentLists", json={"Name": "list"})
+    assert records[-1].retries == Transport.max_retries
+
+
+def test_concurrent_calls_reuse_their_connections(server, client, records, fresh_session):
+    from RefinitivAPIClient.utility import Utility
+
+    server.config.latency = 0.1
+    url = server.endpoint + "Extractions/ExtractedFiles"
+    for _ in range(2):
+        statuses = Utility.run_concurrently(lambda i: Transport.get(url).status_code, range(20), max_workers=20)
+        assert statuses == [200] * 20
+    assert len(records) == 40
+    assert [i for i in records[20:] if i.connect > 0] == list()
+
+
+def test_pool_size_can_be_raised(monkeypatch):
+    monkeypatch.setattr(Transport, "session", Transport.session)
+    Transport.set_pool_size(64)
+    adapter = Transport.session.get_adapter("https://hosted.datascopeapi.reuters.com")
+    assert adapter._pool_maxsize == 64 and adapter._pool_connections == 64
@@ -0,0 +1,44 @@
+"""Parallel parse of the extracted CSV files"""
+
+import gzip
+
+import pandas as pd
+import pytest
+
+from RefinitivAPIClient.sinks import CSVSink, DataFrameSink
+from RefinitivAPIClient.utility import Utility
+
+CSV = "IdentifierType,Identifier,Price\n" + "".join(f"Ric,MOCK{i}.O,{i}.5\n" for i in range(50))
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text(CSV)
+    return str(path)
+
+
+def test_parallel_parse_matches_read_csv(csv_file):
+    dataframe = Utility.read_csv_in_parallel(csv_file, processes=2, min_range_size=64)
+    assert dataframe.equals(Utility.read_csv(csv_file))
+
+
+def test_parallel_parse_to_sink(csv_file):
+    dataframe = Utility.read_csv_in_parallel(csv_file, processes=2, sink=DataFrameSink(), min_range_size=64)
+    assert len(dataframe) == 50
+
+
+@pytest.mark.parametrize("content", ["IdentifierType,Identifier,Price\n", CSV])
+def test_file_not_split_is_written_to_sink(tmp_path, content):
+    source = tmp_path / "data.csv"
+    source.write_text(content)
+    output = Utility.read_csv_in_parallel(str(source), processes=1, sink=CSVSink(str(tmp_path / "out.csv")))
+    assert output == str(tmp_path / "out.csv")
+    assert list(pd.read_csv(output).columns) == ["IdentifierType", "Identifier", "Price"]
+
+
+def test_compressed_file_is_written_to_sink(tmp_path):
+    source = tmp_path / "data.csv"
+    source.write_bytes(gzip.compress(CSV.encode()))
+    output = Utility.read_csv_in_parallel(str(source), sink=CSVSink(str(tmp_path / "out.csv")))
+    assert len(pd.read_csv(output)) == 50
@@ -0,0 +1,22 @@
+"""Price History split in identifier batches by time windows"""
+
+from RefinitivAPIClient.windows import TimeWindowSharder, TimeWindowSharderClass
+
+
+def test_shared_sharder_does_not_adapt(server, client, identifiers):
+    server.config.dated_history = True
+    rows = client.request_data.request_price_history_data(identifiers, "2024-01-01", "2024-03-31", shard=True)
+    assert len(rows) == len(identifiers) * 65
+    assert TimeWindowSharderClass.rows_per_day == 5 / 7
+    assert TimeWindowSharderClass.observed == dict()
+
+
+def test_adaptive_sharder_keeps_density_by_identifier_type(server, identifiers):
+    server.config.dated_history = True
+    sharder = TimeWindowSharder(rows_per_day=2, adaptive=True)
+    assert sharder.density(["Ric"]) == 2
+    sharder.request(identifiers, "2024-01-01", "2024-03-31")
+    assert sharder.observed["Ric"] == (2 + 65 / 91) / 2
+    assert sharder.density(["Ric"]) == sharder.observed["Ric"]
+    assert sharder.density(["Isin"]) == 2
+    assert sharder.rows_per_day == 2
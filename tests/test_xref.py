@@ -0,0 +1,44 @@
+"""Cross-reference of the identifiers kept in SQLite"""
+
+import time
+
+from datetime import timedelta
+
+from RefinitivAPIClient import xref
+from RefinitivAPIClient.dss import Operations
+from RefinitivAPIClient.xref import CrossReference, CrossReferenceClass
+
+RESULTS = {"US0378331005": [{"IdentifierType": "Ric", "Identifier": "AAPL.O"}]}
+
+
+def test_entries_persist_across_connections(tmp_path):
+    path = str(tmp_path / "xref.sqlite")
+    CrossReference(path).put_many("Isin", RESULTS, "Ric")
+    reopened = CrossReference(path)
+    assert reopened.get("Isin", "US0378331005", "Ric") == RESULTS["US0378331005"]
+    assert reopened.translate("Isin", ["US0378331005", "US5949181045"], "Ric") == {"US0378331005": ["AAPL.O"]}
+    assert reopened.translate("Ric", ["AAPL.O"], "Isin") == {"AAPL.O": ["US0378331005"]}
+
+
+def test_entries_expire_after_max_age(tmp_path, monkeypatch):
+    store = CrossReference(str(tmp_path / "xref.sqlite"), max_age=timedelta(days=7))
+    store.put_many("Isin", RESULTS, "Ric")
+    now = time.time()
+    monkeypatch.setattr(xref.time, "time", lambda: now + timedelta(days=6).total_seconds())
+    assert store.get("Isin", "US0378331005", "Ric") is not None
+    monkeypatch.setattr(xref.time, "time", lambda: now + timedelta(days=8).total_seconds())
+    assert store.get("Isin", "US0378331005", "Ric") is None
+    assert store.translate("Isin", ["US0378331005"], "Ric") == dict()
+    assert CrossReference(store.path, max_age=None).get("Isin", "US0378331005", "Ric") is not None
+    assert store.purge() == 3
+    assert CrossReference(store.path, max_age=None).get("Isin", "US0378331005", "Ric") is None
+
+
+def test_extractions_are_learnt_only_when_enabled(server, client, identifiers, monkeypatch):
+    CrossReferenceClass.clear()
+    Operations.extract(identifiers, "EndOfDayPricingReportTemplate", ["RIC", "ISIN"], route="on_demand")
+    assert CrossReferenceClass.translate("Ric", [i[0] for i in identifiers], "Isin") == dict()
+    monkeypatch.setattr(CrossReferenceClass, "learn_from_extractions", True)
+    Operations.extract(identifiers, "EndOfDayPricingReportTemplate", ["RIC", "ISIN"], route="on_demand")
+    assert len(CrossReferenceClass.translate("Ric", [i[0] for i in identifiers], "Isin")) == len(identifiers)
+    CrossReferenceClass.clear()